@@ -15,7 +15,7 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def create_service(client_secret_file,api_name,api_version,*scopes,prefix=''):
+def create_service(client_secret_file,api_name,api_version,*scopes,prefix='',static_discovery=False):
     CLIENT_SECRET_FILE= resource_path(client_secret_file)
     API_SERVICE_NAME= api_name
     API_VERSION= api_version
@@ -42,7 +42,7 @@ def create_service(client_secret_file,api_name,api_version,*scopes,prefix=''):
         with open(os.path.join(working_dir,token_dir,token_file),'w') as token:
             token.write(creds.to_json())
     try:
-        service=build(API_SERVICE_NAME, API_VERSION, credentials=creds,static_discovery=False)
+        service=build(API_SERVICE_NAME, API_VERSION, credentials=creds,static_discovery=static_discovery)
         print(API_SERVICE_NAME,API_VERSION,'service created successfully')
         return service
     except Exception as e:
@@ -0,0 +1,239 @@
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+from config import (ALERT_EMAIL_TO, ALERT_DIGEST_SECONDS, ALERT_RATE_LIMIT, ALERT_RATE_WINDOW, ALERT_RETRY_ATTEMPTS,
+                    ALERT_RETRY_BACKOFF)
+from settings_cache import settings_cache
+
+GMAIL_CLIENT_FILE = "client_secret.json"
+# Outbound items held while the worker waits on a digest window, the rate limit or a retry;
+# beyond this new alerts are dropped (and counted) rather than growing without bound
+MAX_QUEUED = 1000
+# Longest single wait between retries (seconds)
+MAX_RETRY_DELAY = 300
+# Alerts listed in one digest body; the rest are only counted
+DIGEST_MAX_LINES = 50
+
+# attachments are (filename, bytes) pairs built in memory
+OutboundEmail = namedtuple('OutboundEmail', 'subject body attachment_paths attachments')
+
+
+def notifications_enabled():
+    """The 'email notifications' switch on the settings page, read from the settings cache."""
+    return settings_cache.get().settings['email_notify']
+
+
+class GmailTransport:
+    """Sends through the Gmail API with one service object, built on first use and reused.
+
+    The client is built from the discovery document bundled with the library, so
+    there is no discovery request per email. After a failed send it is rebuilt on
+    the next attempt, in case the credentials or connection went stale.
+    """
+
+    def __init__(self, client_file=GMAIL_CLIENT_FILE):
+        self.client_file = client_file
+        self._service = None
+
+    def send(self, to, email):
+        # Imported here so the google libraries are only loaded once there is mail to send
+        from gmail_api import init_gmail_service, send_email
+
+        if self._service is None:
+            self._service = init_gmail_service(self.client_file, static_discovery=True)
+            if self._service is None:
+                raise RuntimeError("Gmail service could not be created")
+        try:
+            return send_email(self._service, to, email.subject, email.body, body_type='plain',
+                              attachment_paths=list(email.attachment_paths), attachments=email.attachments)
+        except Exception:
+            self._service = None
+            raise
+
+
+class FakeTransport:
+    """Stands in for Gmail when trying the dispatcher locally: keeps (to, email) pairs in `sent`.
+
+    The first `fail` sends raise, to exercise the retry path.
+    """
+
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.attempts = 0
+        self.sent = []
+
+    def send(self, to, email):
+        self.attempts += 1
+        if self.attempts <= self.fail:
+            raise ConnectionError(f"fake send failure {self.attempts}/{self.fail}")
+        self.sent.append((to, email))
+        return {'id': f"fake-{len(self.sent)}"}
+
+
+def digest_email(alerts):
+    """One email for a burst of alert state changes, oldest first."""
+    firing = sum(1 for alert in alerts if alert['state'] == 'firing')
+    if len(alerts) == 1:
+        subject = f"[Process Monitor] {alerts[0]['state'].capitalize()}: {alerts[0]['message']}"
+    else:
+        subject = f"[Process Monitor] {len(alerts)} alerts ({firing} firing, {len(alerts) - firing} resolved)"
+    lines = [f"{alert['timestamp']}  {alert['state'].upper():<8} {alert['severity']:<8} {alert['message']}"
+             for alert in alerts[:DIGEST_MAX_LINES]]
+    if len(alerts) > DIGEST_MAX_LINES:
+        lines.append(f"... and {len(alerts) - DIGEST_MAX_LINES} more")
+    return OutboundEmail(subject, "\n".join(lines), (), ())
+
+
+class AlertDispatcher:
+    """Outbound email queue with one worker thread, so callers never wait on Gmail.
+
+    The first alert of a burst opens a digest window of `digest_seconds`; every alert
+    that arrives before it closes goes into the same email. At most `rate_limit`
+    emails are sent per `rate_window` seconds; alerts that pile up while the limit
+    holds are folded into the next digest. A failed send is retried `retries` times,
+    waiting `backoff` seconds and doubling after each attempt.
+    """
+
+    def __init__(self, transport=None, to=ALERT_EMAIL_TO, digest_seconds=ALERT_DIGEST_SECONDS,
+                 rate_limit=ALERT_RATE_LIMIT, rate_window=ALERT_RATE_WINDOW, retries=ALERT_RETRY_ATTEMPTS,
+                 backoff=ALERT_RETRY_BACKOFF, enabled=notifications_enabled):
+        self.transport = transport or GmailTransport()
+        self.to = to
+        self.digest_seconds = digest_seconds
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.retries = retries
+        self.backoff = backoff
+        self.enabled = enabled
+        self._queue = queue.Queue(maxsize=MAX_QUEUED)
+        # Send times inside the current rate window
+        self._sent_at = deque()
+        self._lock = threading.Lock()
+        self._stats = {'queued': 0, 'sent': 0, 'digested': 0, 'failed': 0, 'dropped': 0, 'retries': 0}
+        self._thread = None
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('queued')
+        return True
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def enqueue_alerts(self, alerts):
+        """RuleEngine listener: queues alert state changes for the next digest."""
+        if not self.enabled():
+            return
+        for alert in alerts:
+            self._put(('alert', alert))
+
+    def send(self, subject, body, attachment_paths=(), attachments=()):
+        """Queues one email as is (not digested); False if notifications are off or the queue is full."""
+        if not self.enabled():
+            return False
+        return self._put(('email', OutboundEmail(subject, body, tuple(attachment_paths), tuple(attachments))))
+
+    def _collect_digest(self, first):
+        """Alerts for one digest, starting with `first`; emails met on the way are returned separately."""
+        alerts, emails = [first], []
+
+        def take(item):
+            kind, payload = item
+            (alerts if kind == 'alert' else emails).append(payload)
+            self._queue.task_done()
+
+        deadline = time.monotonic() + self.digest_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                take(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Whatever arrived while waiting for a send slot joins this digest too
+        self._wait_for_slot()
+        while True:
+            try:
+                take(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return alerts, emails
+
+    def _wait_for_slot(self):
+        while True:
+            now = time.monotonic()
+            while self._sent_at and self._sent_at[0] <= now - self.rate_window:
+                self._sent_at.popleft()
+            if len(self._sent_at) < self.rate_limit:
+                return
+            time.sleep(self._sent_at[0] + self.rate_window - now)
+
+    def _deliver(self, email):
+        self._wait_for_slot()
+        delay = self.backoff
+        for attempt in range(1, self.retries + 1):
+            try:
+                self.transport.send(self.to, email)
+            except Exception as e:
+                print(f"[Alert Dispatch] Send failed (attempt {attempt}/{self.retries}): {e}")
+                if attempt == self.retries:
+                    break
+                self._count('retries')
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+                continue
+            self._sent_at.append(time.monotonic())
+            self._count('sent')
+            print(f"[INFO] Email sent: {email.subject}")
+            return True
+        self._count('failed')
+        return False
+
+    def run(self):
+        """Worker loop (blocking)."""
+        while True:
+            kind, payload = self._queue.get()
+            try:
+                if kind == 'email':
+                    self._deliver(payload)
+                    continue
+                alerts, emails = self._collect_digest(payload)
+                self._count('digested', len(alerts))
+                self._deliver(digest_email(alerts))
+                for email in emails:
+                    self._deliver(email)
+            except Exception as e:
+                print(f"[Error in alert dispatch] {e}")
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="Alert_Dispatch_Thread", daemon=True)
+            self._thread.start()
+        return self
+
+    def join(self):
+        """Blocks until everything queued so far has been sent or given up on."""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=self._queue.qsize())
+
+
+alert_dispatcher = AlertDispatcher()
+
+
+def start_alert_dispatch(rule_engine):
+    """Emails the rule engine's alerts from the dispatcher's own thread."""
+    rule_engine.add_listener(alert_dispatcher.enqueue_alerts)
+    return alert_dispatcher.start()
@@ -4,30 +4,156 @@ import sys
 import os
 from io import BytesIO
 import json
-from flask import Flask, render_template, jsonify, request, send_file
+import hashlib
+import itertools
+import threading
+import time
+from flask import Flask, render_template, jsonify, request, send_file, Response, stream_with_context
 from flask_cors import CORS
-import mysql.connector
 from datetime import datetime, timedelta
-from main_script import kill_process, restart_process, get_visible_active_apps, enqueue_settings_update,get_monitor_settings,get_idle_time
+from main_script import kill_process, restart_process, get_visible_active_apps, enqueue_settings_update,get_monitor_settings,get_idle_time, get_settings_update_status
+from sampler import get_latest_sample, metrics_sampler, start_sampler
+from storage import get_db_cursor, storage
+from db_writer import db_writer
+from rollups import choose_resolution, fetch_rollup_series, range_is_final
+from settings_cache import settings_cache
+from downsample import downsample_rows, lttb_indices, read_series
+from enforcement import blacklist_enforcer
+from rules import rule_engine
+from event_bus import event_bus, STREAM_TOPICS
+from snapshot_store import process_store
+from process_dimensions import PROCESS_LOG_VIEW
+from top_processes import (TOP_N, TOP_PROCESSES_EVENT, SORT_KEYS as TOP_SORT_KEYS, WINDOWS as TOP_WINDOWS,
+                           QUERY_WINDOWS as TOP_QUERY_WINDOWS, query_top_processes, top_processes)
+from shared_metrics import attached_segment
+from ring_store import get_ring_store
+from http_compression import compress_response
+from bulk_export import EXPORT_FORMATS, EXPORT_TABLES, export_chunks
+from config import HISTORY_CACHE_MAX_AGE, SAMPLE_HZ
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 app = Flask(__name__)
 CORS(app)  # Allow frontend to access backend API
 
-# Database connection
-def connect_db():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="password",
-        database="process_db"
-    )
+
+def _system_stats_payload(sample):
+    return {
+        'cpu_usage': sample['cpu_percent'],
+        'memory_usage': sample['memory_percent'],
+        'sampled_at': datetime.fromtimestamp(sample['timestamp']).strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def _ring_rows(ring, start, end, max_points):
+    """History rows for [start, end) straight from the memory-mapped sample ring."""
+    columns = ring.series(start.timestamp(), end.timestamp() if end else None)
+    times, cpu, memory = columns['timestamp'], columns['cpu_percent'], columns['memory_percent']
+    keep = lttb_indices(times, (cpu, memory), max_points) if max_points else range(len(times))
+    return [{
+        'timestamp': datetime.fromtimestamp(times[i]).strftime('%Y-%m-%d %H:%M:%S'),
+        'cpu_percent': round(float(cpu[i]), 2),
+        'memory_percent': round(float(memory[i]), 2)
+    } for i in keep]
+
+
+def _latest_sample():
+    # Headless API workers read the collector's shared segment instead of sampling themselves
+    segment = attached_segment()
+    sample = segment.latest_sample() if segment else None
+    return sample or get_latest_sample()
+
+
+def _refresh_process_store():
+    segment = attached_segment()
+    if segment is None:
+        return process_store.update(get_visible_active_apps())
+    version, body = segment.processes()
+    if version is None or version == process_store.version:
+        return process_store.version
+    return process_store.update(json.loads(body), version=version, encoded=body)
+
+
+def _process_list_response():
+    """Visible processes as a full list, or with ?since=<version> only what changed after it.
+
+    Both forms carry an ETag, so an unchanged list is answered with 304 Not Modified.
+    """
+    _refresh_process_store()
+    since = request.args.get('since', type=int)
+    if since is None:
+        version, body = process_store.full_json()
+        response = Response(body, mimetype='application/json')
+        response.set_etag(f'procs-{version}')
+    else:
+        delta = process_store.delta(since)
+        version = delta['version']
+        response = jsonify(delta)
+        response.set_etag(f'procs-{version}' if delta['full'] else f'procs-{since}-{version}')
+    response.headers['X-Snapshot-Version'] = str(version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+def _conditional_json(payload):
+    """JSON response with an ETag over its bytes; answers 304 when the client already has them."""
+    response = jsonify(payload)
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+def _process_delta_event():
+    # Changes since the previous event; a client that missed one catches up with ?since=
+    base = process_store.version
+    if _refresh_process_store() == base:
+        return None
+    return process_store.delta(base)
+
+
+def start_shared_segment_relay(segment, interval=1.0):
+    """Headless API workers: republishes the collector's samples and events on this worker's stream."""
+    def relay():
+        last_sample = None
+        seen = {}
+        while True:
+            sample = segment.latest_sample()
+            if sample and sample['timestamp'] != last_sample:
+                last_sample = sample['timestamp']
+                event_bus.publish('system', _system_stats_payload(sample))
+            for topic, (seq, data) in segment.events().items():
+                # Other entries (e.g. the top process lists) are read on request, not streamed
+                if topic in STREAM_TOPICS and seen.get(topic) != seq:
+                    seen[topic] = seq
+                    event_bus.publish(topic, data)
+            time.sleep(interval)
+
+    threading.Thread(target=relay, name="Shared_Segment_Relay_Thread", daemon=True).start()
+
+
+# In high-frequency mode the dashboard still gets about one system update per second
+_system_event_every = max(1, round(SAMPLE_HZ))
+_system_samples = itertools.count()
+
+
+def _publish_system_sample(sample):
+    if next(_system_samples) % _system_event_every == 0:
+        event_bus.publish('system', _system_stats_payload(sample))
+
+
+# Live stream sources: sampler readings, and process list changes while a dashboard is open
+metrics_sampler.add_listener(_publish_system_sample)
+event_bus.add_producer('processes', _process_delta_event, interval=5)
 
 @app.context_processor
 def inject_request():
     return dict(request=request)
 
+@app.after_request
+def compress(response):
+    # Negotiated gzip/deflate for large JSON/text bodies
+    return compress_response(response, request)
+
 # Route to fetch all process logs
 @app.route('/')
 def homepage():
@@ -36,17 +162,7 @@ def homepage():
 @app.route('/api/list-processes')
 def list_processes():
     try:
-        visible_apps = get_visible_active_apps()  # Fetch active processes
-        current_user = getpass.getuser()
-        
-        print(f"Current User: {current_user}")
-        print("[DEBUG] List of visible processes Flask can see:")
-        
-        for app in visible_apps:
-            print(f"PID: {app['pid']} | Name: {app['name']} | Username: {app['username']}")
-
-        return jsonify(visible_apps)  # Return all processes as JSON
-
+        return _process_list_response()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 @app.route('/api/debug-processes', methods=['GET'])
@@ -63,12 +179,9 @@ def debug_processes():
 @app.route('/api/processes', methods=['GET'])
 def get_process_logs():
     try:
-        db = connect_db()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM process_logs ORDER BY timestamp DESC LIMIT 10")
-        processes = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with get_db_cursor(dictionary=True) as cursor:
+            cursor.execute(f"SELECT * FROM {PROCESS_LOG_VIEW} ORDER BY timestamp DESC LIMIT 10")
+            processes = cursor.fetchall()
         
         # Convert any non-serializable values to strings
         for proc in processes:
@@ -76,52 +189,94 @@ def get_process_logs():
                 if not isinstance(value, (str, int, float, bool, type(None))):
                     proc[key] = str(value)
                     
-        return jsonify(processes)
+        return _conditional_json(processes)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/system-stats')
 def system_stats():
-    cpu_usage = psutil.cpu_percent(interval=1)
-    memory_info = psutil.virtual_memory()
-    memory_usage = memory_info.percent
-
-    print(f"CPU Usage: {cpu_usage}%, Memory Usage: {memory_usage}%")  # Debugging
+    sample = _latest_sample()  # Latest background reading, no blocking
+    return jsonify(_system_stats_payload(sample))
 
-    return jsonify({
-        'cpu_usage': cpu_usage,
-        'memory_usage': memory_usage
-    })
 @app.route('/api/historical-system-stats', methods=['GET'])
 def historical_stats():
     range_param = request.args.get('range', 'day')
+    now = datetime.now()
     time_threshold = {
-        'day': datetime.now() - timedelta(days=1),
-        'week': datetime.now() - timedelta(weeks=1),
-        'month': datetime.now() - timedelta(days=30),
-    }.get(range_param, datetime.now() - timedelta(days=1))
+        'day': now - timedelta(days=1),
+        'week': now - timedelta(weeks=1),
+        'month': now - timedelta(days=30),
+    }.get(range_param, now - timedelta(days=1))
 
     #print(f"Time threshold: {time_threshold}")  # Debug print
     #print(f"Time threshold type: {type(time_threshold)}")  # Debug print
 
+    # Explicit ranges (?start=...&end=..., ISO 8601) can be cached by the browser once they are closed
+    end_time = None
     try:
-        db = connect_db()
-        cursor = db.cursor(dictionary=True)
-        time_threshold_str = time_threshold.strftime('%Y-%m-%d %H:%M:%S')
-        query = f"""
-            SELECT 
-                DATE_FORMAT(timestamp, '%Y-%m-%d %H:%i:%s') as timestamp,
-                cpu_percent, 
-                memory_percent
-            FROM system_logs
-            WHERE timestamp >= '{time_threshold_str}'
-            ORDER BY timestamp
-        """
-        cursor.execute(query)
-    
-        results = cursor.fetchall()
-        cursor.close()
-        db.close()
+        if request.args.get('start'):
+            time_threshold = datetime.fromisoformat(request.args['start'])
+        if request.args.get('end'):
+            end_time = datetime.fromisoformat(request.args['end'])
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 timestamps'}), 400
+
+    # Optional cap on the number of points, e.g. the chart width in pixels
+    max_points = request.args.get('max_points', type=int)
+
+    try:
+        # Serve the coarsest rollup that still fills the chart; raw rows only for short ranges
+        resolution = choose_resolution(((end_time or now) - time_threshold).total_seconds())
+        # Short or downsampled ranges the sample ring still holds are read straight from it
+        # (every sample, no SQL); anything older keeps using the rollups
+        ring = get_ring_store() if resolution == 'raw' or max_points else None
+        if ring is not None and ring.covers(time_threshold.timestamp()):
+            resolution = 'raw'
+            results = _ring_rows(ring, time_threshold, end_time, max_points)
+        else:
+            results = fetch_rollup_series(resolution, time_threshold, end_time) if resolution != 'raw' else []
+        results = downsample_rows(results, max_points)
+
+        if not results:
+            # No rollups yet (fresh install) - fall back to the raw samples
+            resolution = 'raw'
+            time_threshold_str = time_threshold.strftime('%Y-%m-%d %H:%M:%S')
+            end_clause = f"AND timestamp < '{end_time.strftime('%Y-%m-%d %H:%M:%S')}'" if end_time else ""
+            if max_points:
+                # Stream the rows into arrays and keep only the LTTB-selected points
+                with get_db_cursor() as cursor:
+                    cursor.execute(f"""
+                        SELECT {storage.epoch_sql('timestamp')}, cpu_percent, memory_percent
+                        FROM system_logs
+                        WHERE timestamp >= '{time_threshold_str}' {end_clause}
+                        ORDER BY timestamp
+                    """)
+                    series = read_series(cursor, 3)
+                keep = lttb_indices(series[0], series[1:], max_points)
+                results = [{
+                    'timestamp': datetime.fromtimestamp(series[0, i]).strftime('%Y-%m-%d %H:%M:%S'),
+                    'cpu_percent': float(series[1, i]),
+                    'memory_percent': float(series[2, i])
+                } for i in keep]
+            else:
+                # Windows logged since the window aggregates were added also carry min/max/p95
+                query = f"""
+                    SELECT 
+                        timestamp,
+                        cpu_percent, 
+                        memory_percent,
+                        cpu_min, cpu_max, cpu_p95,
+                        memory_min, memory_max, memory_p95,
+                        samples
+                    FROM system_logs
+                    WHERE timestamp >= '{time_threshold_str}' {end_clause}
+                    ORDER BY timestamp
+                """
+                with get_db_cursor(dictionary=True) as cursor:
+                    cursor.execute(query)
+                    results = cursor.fetchall()
+                for row in results:
+                    row['timestamp'] = row['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
         
         if not results:
             return jsonify([{
@@ -130,45 +285,53 @@ def historical_stats():
                 'memory_percent': 0
             }])
             
-        return jsonify(results)
+        response = _conditional_json(results)
+        response.headers['X-Resolution'] = resolution
+        if end_time is not None and range_is_final(end_time, resolution):
+            # A closed range never changes, so the browser can keep it outright
+            response.headers['Cache-Control'] = f'public, max-age={HISTORY_CACHE_MAX_AGE}, immutable'
+        return response
     except Exception as e:
         print(f"Detailed error: {str(e)}") 
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/resource-intensive-processes', methods=['GET'])
 def resource_intensive_processes():
+    # ?window=5m|1h|24h comes from the in-memory top-N lists; 7d|30d (or a window the
+    # engine hasn't been running long enough to cover) from an aggregate over process_logs
+    window = request.args.get('window', '24h')
+    sort = request.args.get('sort', 'cpu')
+    limit = max(1, min(request.args.get('limit', TOP_N, type=int), TOP_N))
+    if window not in TOP_WINDOWS and window not in TOP_QUERY_WINDOWS:
+        return jsonify({'error': f"window must be one of {', '.join(list(TOP_WINDOWS) + list(TOP_QUERY_WINDOWS))}"}), 400
+    if sort not in TOP_SORT_KEYS:
+        return jsonify({'error': f"sort must be one of {', '.join(TOP_SORT_KEYS)}"}), 400
     try:
-        db = connect_db()
-        cursor = db.cursor(dictionary=True)
-        # grab the top 10 CPU-hogging entries from your system_logs
-        cursor.execute("""
-            SELECT 
-              process_name,
-              pid,
-              cpu_percent AS cpu_usage,
-              memory_percent AS memory_usage
-            FROM system_logs
-            ORDER BY cpu_percent DESC
-            LIMIT 10
-        """)
-        rows = cursor.fetchall()
-        cursor.close()
-        db.close()
-        return jsonify(rows)
+        rows = _cached_top_processes(window, sort)
+        if rows is None:
+            seconds = TOP_QUERY_WINDOWS.get(window) or TOP_WINDOWS[window][0]
+            rows = query_top_processes(datetime.now() - timedelta(seconds=seconds), sort=sort, limit=limit)
+        return _conditional_json(rows[:limit])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _cached_top_processes(window, sort):
+    segment = attached_segment()
+    if segment is None:
+        return top_processes.top(window, sort)
+    # Headless API worker: the collector publishes its lists into the shared segment
+    entry = segment.events().get(TOP_PROCESSES_EVENT, [0, {}])[1].get(window)
+    return entry[sort] if entry and entry['covered'] else None
+
+
 
 @app.route('/api/idle-time', methods=['GET'])
 def get_idle_time_logs():
     try:
-        db = connect_db()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM idle_time_logs ORDER BY timestamp DESC LIMIT 10")
-        idle_times = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with get_db_cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT * FROM idle_time_logs ORDER BY timestamp DESC LIMIT 10")
+            idle_times = cursor.fetchall()
     
         for item in idle_times:
             for key, value in item.items():
@@ -182,12 +345,9 @@ def get_idle_time_logs():
 @app.route('/api/idle-dashboard', methods=['GET'])
 def get_latest_idle_time():
     try:
-        db = connect_db()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("SELECT idle_seconds FROM idle_time_logs ORDER BY timestamp DESC LIMIT 1")
-        result = cursor.fetchone()
-        cursor.close()
-        db.close()
+        with get_db_cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT idle_seconds FROM idle_time_logs ORDER BY timestamp DESC LIMIT 1")
+            result = cursor.fetchone()
 
         if result:
             idle_minutes = round(result['idle_seconds'] / 60, 1)  # convert to minutes
@@ -236,22 +396,29 @@ def restart_process_route():
 @app.route('/api/active-processes', methods=['GET'])
 def get_active_processes():
     try:
-        active_processes = get_visible_active_apps()
-        
-        # Convert any non-serializable values to strings
-        for proc in active_processes:
-            for key, value in proc.items():
-                if not isinstance(value, (str, int, float, bool, type(None))):
-                    proc[key] = str(value)
-        
-        return jsonify(active_processes)
+        return _process_list_response()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _alert_state():
+    segment = attached_segment()
+    if segment is None:
+        return rule_engine.state()
+    # Headless API worker: rules run in the collector, which mirrors its alert state here
+    return segment.events().get('alerts', [0, {'active': [], 'recent': []}])[1]
+
+
+@app.route('/api/alerts', methods=['GET'])
+def get_alerts():
+    # {'active': [alerts currently firing], 'recent': [latest fired/resolved]}
+    return jsonify(_alert_state())
+
+
 @app.route('/api/export-system-status', methods=['GET'])
 def export_system_status():
-    cpu = psutil.cpu_percent(interval=1)
-    memory = psutil.virtual_memory().percent
+    sample = _latest_sample()
+    cpu = sample['cpu_percent']
+    memory = sample['memory_percent']
     idle_time = get_idle_time()
 
     # Get thresholds from DB
@@ -272,6 +439,7 @@ def export_system_status():
             "cpu_exceeded": cpu > cpu_threshold,
             "memory_exceeded": memory > memory_threshold
         },
+        "active_alerts": _alert_state()['active'],
         "exported_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
 
@@ -289,6 +457,31 @@ def export_system_status():
     )
 
 
+@app.route('/api/export', methods=['GET'])
+def export_history():
+    # ?tables=system_logs,process_logs,idle_time_logs&start=...&end=... (ISO 8601)&format=ndjson|csv&gzip=1
+    # Streamed straight from the database in batches, so any range can be exported
+    tables = request.args.get('tables', ','.join(EXPORT_TABLES)).split(',')
+    if not tables or any(table not in EXPORT_TABLES for table in tables):
+        return jsonify({'error': f"tables must be a comma-separated subset of {', '.join(EXPORT_TABLES)}"}), 400
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.now()
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=1)
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 timestamps'}), 400
+    compress = request.args.get('gzip') in ('1', 'true')
+
+    filename = f"process_monitor_{'_'.join(tables)}_{start:%Y%m%d%H%M}-{end:%Y%m%d%H%M}.{fmt}"
+    mimetype = EXPORT_FORMATS[fmt]
+    if compress:
+        filename, mimetype = filename + '.gz', 'application/gzip'
+    return Response(stream_with_context(export_chunks(tables, start, end, fmt, compress)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/export-data', methods=['POST'])
 def export_data():
     data = request.json  # JSON from the frontend
@@ -306,22 +499,11 @@ def export_data():
 @app.route('/clear-all-data', methods=['POST'])
 def clear_all_data():
     try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='password',
-            database='process_db'
-        )
-        cursor = conn.cursor()
-
-        # Delete data from both tables
-        cursor.execute("DELETE FROM idle_time_logs")
-        cursor.execute("DELETE FROM system_logs")
-        cursor.execute("DELETE FROM process_logs")
-        conn.commit()
-
-        cursor.close()
-        conn.close()
+        with get_db_cursor() as cursor:
+            # Delete data from both tables
+            cursor.execute("DELETE FROM idle_time_logs")
+            cursor.execute("DELETE FROM system_logs")
+            cursor.execute("DELETE FROM process_logs")
 
         return jsonify({'success': True, 'message': 'All monitoring data deleted successfully.'})
     
@@ -337,16 +519,8 @@ def get_settings():
         # Fetch monitor settings from the database
         settings = get_monitor_settings()
 
-        # Fetch blacklisted processes from the database
-        db = connect_db()
-        cursor = db.cursor()
-        cursor.execute("SELECT process_name FROM blacklisted_processes")
-        rows = cursor.fetchall()
-        cursor.close()
-        db.close()
-
-        # Get the blacklist as a list
-        blacklist = [row[0] for row in rows]
+        # Blacklisted processes from the settings cache
+        blacklist = list(settings_cache.get().blacklist_names)
 
         # Combine settings and blacklist into one response
         response = {
@@ -366,7 +540,7 @@ def save_settings():
 
         # — General Settings —
         if any(key in payload for key in ('theme', 'refresh_interval', 'email_notify')):
-            enqueue_settings_update('general', {
+            update_id = enqueue_settings_update('general', {
                 'theme': payload.get('theme'),
                 'refresh_interval': payload.get('refresh_interval'),
                 'email_notify': payload.get('email_notify')
@@ -374,7 +548,7 @@ def save_settings():
 
         # — Process Settings —
         elif any(key in payload for key in ('cpu_threshold', 'memory_threshold', 'process_blacklist')):
-            enqueue_settings_update('process', {
+            update_id = enqueue_settings_update('process', {
                 'cpu_threshold': payload.get('cpu_threshold'),
                 'memory_threshold': payload.get('memory_threshold'),
                 'process_blacklist': payload.get('process_blacklist')
@@ -382,35 +556,88 @@ def save_settings():
 
         # — Data Management Settings —
         elif 'auto_cleanup_days' in payload:
-            enqueue_settings_update('data', {
+            update_id = enqueue_settings_update('data', {
                 'auto_cleanup_days': payload.get('auto_cleanup_days')
             })
 
         else:
             return jsonify({'error': 'No valid settings fields found'}), 400
 
-        return jsonify({'message': 'Settings update enqueued'}), 200
+        # Poll /api/settings/status/<update_id> to find out when it has been applied
+        return jsonify({'message': 'Settings update enqueued', 'update_id': update_id}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/settings/status/<update_id>', methods=['GET'])
+def settings_update_status(update_id):
+    # ?wait=N blocks up to N seconds (max 10) for a pending update
+    wait = min(request.args.get('wait', 0, type=float), 10)
+    status = get_settings_update_status(update_id, wait=wait)
+    if status is None:
+        return jsonify({'error': 'Unknown update id'}), 404
+    return jsonify(status), 200
+
+
 @app.route('/api/blacklist', methods=['GET'])
 def get_blacklist():
     try:
-        db = connect_db()
-        cursor = db.cursor()
-        cursor.execute("SELECT process_name FROM blacklisted_processes")
-        rows = cursor.fetchall()
-        cursor.close()
-        db.close()
-
-        blacklist = [row[0] for row in rows]
+        blacklist = list(settings_cache.get().blacklist_names)
         return jsonify({'blacklist': blacklist})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 
+@app.route('/api/db-pool-stats', methods=['GET'])
+def db_pool_stats():
+    # MySQL: checkout and wait-time counters for sizing PROCESS_MONITOR_DB_POOL_SIZE; SQLite: commit times
+    return jsonify(dict(storage.stats(), backend=storage.name))
+
+@app.route('/api/writer-stats', methods=['GET'])
+def writer_stats():
+    # Queue depth and flush latency of the background log writer
+    return jsonify(db_writer.stats())
+
+
+@app.route('/api/stream')
+def stream():
+    # One Server-Sent Events connection per page; all clients share the same published events
+    requested = request.args.get('topics', ','.join(STREAM_TOPICS)).split(',')
+    topics = [topic for topic in requested if topic in STREAM_TOPICS]
+    if not topics:
+        return jsonify({'error': f"topics must be a comma-separated subset of {', '.join(STREAM_TOPICS)}"}), 400
+    if 'system' in topics and attached_segment() is None:
+        start_sampler()
+    return Response(event_bus.subscribe(topics), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/stream-stats', methods=['GET'])
+def stream_stats():
+    # Connected clients per topic
+    return jsonify(event_bus.stats())
+
+
+@app.route('/api/enforcement-stats', methods=['GET'])
+def enforcement_stats():
+    # Spawn-to-kill latency and CPU time per blacklist enforcement cycle
+    return jsonify(blacklist_enforcer.stats())
+
+
+@app.route('/api/rule-stats', methods=['GET'])
+def rule_stats():
+    # Samples and process-table passes evaluated, and how long the last pass took
+    return jsonify(rule_engine.stats())
+
+
+@app.route('/api/retention-status', methods=['GET'])
+def retention_status():
+    # Rows removed and time spent per table by the last retention run
+    import retention
+    return jsonify(retention.last_retention_report)
+
+
 @app.route('/historical-trends')
 def historical_trends():
     return render_template('historical_trends.html')
@@ -424,5 +651,6 @@ def settings():
     return render_template('settings.html')
 
 if __name__ == '__main__':
-   
+    from migrations import run_migrations
+    run_migrations()
     app.run(host='0.0.0.0', port=5000, debug=False,use_reloader=False)
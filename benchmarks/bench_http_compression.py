@@ -0,0 +1,107 @@
+"""Benchmark response size and latency of the API with and without compression.
+
+Serves payloads shaped like each JSON route (same row layout and row counts the
+real routes return) from a bare Flask app with the same after_request hook as
+app.py, and times requests through the test client with Accept-Encoding
+identity, gzip and deflate, plus a conditional revalidation (If-None-Match).
+No database is needed.
+
+    python benchmarks/bench_http_compression.py
+"""
+import hashlib
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify, request
+
+from http_compression import compress_response
+
+ROUNDS = 20
+
+
+def history_rows(count, step, rollup=True):
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(count):
+        cpu = random.uniform(2, 60)
+        memory = random.uniform(40, 70)
+        row = {'timestamp': (start + timedelta(seconds=i * step)).strftime('%Y-%m-%d %H:%M:%S'),
+               'cpu_percent': cpu, 'memory_percent': memory}
+        if rollup:
+            row.update(cpu_min=cpu / 2, cpu_max=cpu * 1.5, cpu_p95=cpu * 1.4, memory_min=memory - 1,
+                       memory_max=memory + 1, memory_p95=memory + 0.8, samples=int(step))
+        rows.append(row)
+    return rows
+
+
+def process_rows(count):
+    names = ['chrome', 'code', 'python3', 'slack', 'firefox', 'bash', 'systemd', 'Xorg', 'pulseaudio']
+    return [{'pid': 1000 + i, 'name': random.choice(names), 'username': 'user',
+             'cpu_percent': round(random.uniform(0, 5), 1), 'memory_percent': round(random.uniform(0, 3), 1),
+             'create_time': 1767225600.0 + i} for i in range(count)]
+
+
+ROUTES = {
+    '/api/system-stats': {'cpu_usage': 12.5, 'memory_usage': 48.1, 'sampled_at': '2026-01-01 00:00:00'},
+    '/api/processes': [dict(row, id=i, timestamp='2026-01-01 00:00:00', process_name=row['name'],
+                            cpu_usage=row['cpu_percent'], memory_usage=row['memory_percent'])
+                       for i, row in enumerate(process_rows(10))],
+    '/api/list-processes (300)': process_rows(300),
+    '/api/historical-system-stats day (minute)': history_rows(1440, 60),
+    '/api/historical-system-stats week (hour)': history_rows(168, 3600),
+    '/api/historical-system-stats month (hour)': history_rows(720, 3600),
+    '/api/historical-system-stats max_points=800': history_rows(800, 108),
+    '/api/historical-system-stats day (raw)': history_rows(86400, 1, rollup=False),
+}
+
+
+def build_app():
+    app = Flask(__name__)
+    app.after_request(lambda response: compress_response(response, request))
+
+    def make_view(payload):
+        def view():
+            response = jsonify(payload)
+            response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+            return response.make_conditional(request)
+        return view
+
+    for index, payload in enumerate(ROUTES.values()):
+        app.add_url_rule(f'/r{index}', f'r{index}', make_view(payload))
+    return app
+
+
+def timed(client, path, headers):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        body = response.get_data()
+        timings.append(time.perf_counter() - start)
+    return response, len(body), sorted(timings)[len(timings) // 2] * 1000
+
+
+def main():
+    random.seed(1)
+    client = build_app().test_client()
+    print(f"{'route':<46} {'identity':>10} {'gzip':>10} {'deflate':>10} {'ms id':>7} {'ms gz':>7} "
+          f"{'ms 304':>7}")
+    for index, name in enumerate(ROUTES):
+        path = f'/r{index}'
+        _, plain_size, plain_ms = timed(client, path, {'Accept-Encoding': 'identity'})
+        gzipped, gzip_size, gzip_ms = timed(client, path, {'Accept-Encoding': 'gzip'})
+        _, deflate_size, _ = timed(client, path, {'Accept-Encoding': 'deflate'})
+        etag = gzipped.headers.get('ETag')
+        revalidated, _, revalidate_ms = timed(client, path, {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert revalidated.status_code == 304, revalidated.status_code
+        print(f"{name:<46} {plain_size:>10} {gzip_size:>10} {deflate_size:>10} {plain_ms:>7.2f} {gzip_ms:>7.2f} "
+              f"{revalidate_ms:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark the per-sample cost of high-frequency sampling.
+
+Times each stage a sample goes through on the sampler thread: the psutil
+reading (total + per-core CPU, memory), folding it into the system_logs window,
+the minute/hour/day rollups and the memory-mapped ring. Also reports the CPU
+the sampler would use at 1, 5 and 10 Hz. Nothing is written to a database.
+
+    python benchmarks/bench_sampling.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+
+from ring_store import RingStore
+from rollups import Bucket, RollupAggregator, WindowAggregator
+from sampler import MetricsSampler
+
+SAMPLES = 20000
+
+
+class NullWriter:
+    def submit(self, table, rows):
+        return True
+
+
+class OfflineRollups(RollupAggregator):
+    # Open hour/day buckets start empty instead of being read back from the database
+    def _load_bucket(self, resolution, start):
+        return Bucket(start)
+
+
+def per_sample_us(fn, samples):
+    start = time.thread_time()
+    for sample in samples:
+        fn(sample)
+    return (time.thread_time() - start) / len(samples) * 1e6
+
+
+def main():
+    sampler = MetricsSampler()
+    psutil.cpu_percent(percpu=True)
+    start = time.thread_time()
+    samples = [sampler._take_sample() for _ in range(2000)]
+    reading_us = (time.thread_time() - start) / 2000 * 1e6
+
+    # Spread the readings over consecutive 100 ms slots so windows and rollups close as they would at 10 Hz
+    base = time.time() - SAMPLES / 10
+    samples = [dict(samples[i % len(samples)], timestamp=base + i / 10) for i in range(SAMPLES)]
+
+    windows = []
+    stages = {
+        'psutil reading': reading_us,
+        'window aggregate (30 s)': per_sample_us(WindowAggregator(30, windows.append).add_sample, samples),
+        'rollups (minute/hour/day)': per_sample_us(OfflineRollups(writer=NullWriter()).add_sample, samples),
+    }
+    ring = RingStore(os.path.join(tempfile.mkdtemp(), 'bench.ring'), capacity=SAMPLES).open_for_writing()
+    stages['ring append'] = per_sample_us(ring.append, samples)
+    ring.close()
+
+    total = sum(stages.values())
+    print(f"{psutil.cpu_count()} cores, {len(windows)} windows closed")
+    for name, us in stages.items():
+        print(f"{name:<28} {us:>8.1f} us/sample")
+    print(f"{'total':<28} {total:>8.1f} us/sample")
+    for hz in (1, 5, 10):
+        print(f"{hz:>2} Hz: {total * hz / 1e4:.3f}% of one core")
+
+
+if __name__ == '__main__':
+    main()
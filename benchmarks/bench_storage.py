@@ -0,0 +1,51 @@
+"""Benchmark write latency of the SQLite storage backend.
+
+Writes system_logs rows the way the collectors do: one row per transaction (a
+single sample) and batches the size db_writer flushes, and reports the median
+and p99 time per transaction. Uses a throwaway database file.
+
+    python benchmarks/bench_storage.py [path]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROUNDS = 2000
+BATCH_SIZES = (1, 10, 100, 500)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['PROCESS_MONITOR_STORAGE'] = 'sqlite'
+    os.environ['PROCESS_MONITOR_SQLITE_PATH'] = path
+
+    from db_writer import TABLE_COLUMNS
+    from migrations import run_migrations
+    from storage import storage
+
+    run_migrations()
+    columns = TABLE_COLUMNS['system_logs']
+    now = datetime.datetime.now()
+    print(f"{'rows/txn':>8} {'median ms':>10} {'p99 ms':>8} {'rows/s':>10}")
+    for batch_size in BATCH_SIZES:
+        rows = [(12.5, 48.1, now, 300, 2.0, 97.5, 60.1, 48.0, 48.3, 48.2, 100.0)] * batch_size
+        rounds = max(ROUNDS // batch_size, 50)
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            with storage.cursor() as cursor:
+                storage.insert_rows(cursor, 'system_logs', columns, rows)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        median = timings[len(timings) // 2] * 1000
+        p99 = timings[int(len(timings) * 0.99)] * 1000
+        print(f"{batch_size:>8} {median:>10.3f} {p99:>8.3f} {batch_size / (sum(timings) / rounds):>10.0f}")
+    print(f"database: {path}")
+
+
+if __name__ == '__main__':
+    main()
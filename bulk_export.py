@@ -0,0 +1,67 @@
+import csv
+import datetime
+import io
+import json
+import zlib
+
+from config import COMPRESS_LEVEL, EXPORT_BATCH_SIZE
+from db_writer import TABLE_COLUMNS
+from process_dimensions import PROCESS_LOG_VIEW
+from storage import storage
+
+# Exportable table -> (table or view read, columns written)
+EXPORT_TABLES = {
+    'system_logs': ('system_logs', ('timestamp',) + tuple(column for column in TABLE_COLUMNS['system_logs']
+                                                          if column != 'timestamp')),
+    # Process rows with their names and users joined back from the dimension tables
+    'process_logs': (PROCESS_LOG_VIEW, ('timestamp', 'pid', 'process_name', 'username', 'cpu_usage',
+                                        'memory_usage')),
+    'idle_time_logs': ('idle_time_logs', ('timestamp', 'idle_seconds')),
+}
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _value(value):
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def _ndjson_chunk(table, columns, rows):
+    return "".join(json.dumps(dict(zip(columns, map(_value, row)), table=table)) + "\n" for row in rows)
+
+
+def _csv_chunk(rows):
+    out = io.StringIO()
+    csv.writer(out).writerows([_value(value) for value in row] for row in rows)
+    return out.getvalue()
+
+
+def _text_chunks(tables, start, end, fmt, batch_size):
+    for index, table in enumerate(tables):
+        source, columns = EXPORT_TABLES[table]
+        if fmt == 'csv':
+            # One block per table with its own header row, separated by a blank line
+            yield ("\r\n" if index else "") + _csv_chunk([columns])
+        query = (f"SELECT {', '.join(columns)} FROM {source} "
+                 f"WHERE timestamp >= %s AND timestamp < %s ORDER BY timestamp")
+        for rows in storage.stream_rows(query, (start, end), batch_size):
+            yield _ndjson_chunk(table, columns, rows) if fmt == 'ndjson' else _csv_chunk(rows)
+
+
+def export_chunks(tables, start, end, fmt='ndjson', compress=False, batch_size=EXPORT_BATCH_SIZE):
+    """Bytes chunks of every row of `tables` with start <= timestamp < end, in timestamp order per table.
+
+    Rows come from storage.stream_rows one batch at a time and each batch is encoded
+    (and gzipped, when `compress` is set) before the next is fetched, so memory use
+    doesn't grow with the size of the export.
+    """
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    for text in _text_chunks(tables, start, end, fmt, batch_size):
+        data = text.encode('utf-8')
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor is not None:
+        yield compressor.flush()
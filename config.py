@@ -0,0 +1,99 @@
+import os
+
+# Storage backend: 'mysql' (default) or 'sqlite' for an embedded database file, no server needed
+STORAGE_BACKEND = os.environ.get('PROCESS_MONITOR_STORAGE', 'mysql')
+SQLITE_PATH = os.environ.get('PROCESS_MONITOR_SQLITE_PATH',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'process_monitor.db'))
+# Seconds an SQLite writer waits for another process's write to finish
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('PROCESS_MONITOR_SQLITE_BUSY_TIMEOUT', 5))
+
+# Database connection settings (override with environment variables)
+DB_CONFIG = {
+    'host': os.environ.get('PROCESS_MONITOR_DB_HOST', 'localhost'),
+    'user': os.environ.get('PROCESS_MONITOR_DB_USER', 'root'),
+    'password': os.environ.get('PROCESS_MONITOR_DB_PASSWORD', 'password'),
+    'database': os.environ.get('PROCESS_MONITOR_DB_NAME', 'process_db'),
+}
+
+# Connection pool shared by the Flask app and the monitoring jobs
+DB_POOL_SIZE = int(os.environ.get('PROCESS_MONITOR_DB_POOL_SIZE', 5))
+# Seconds to wait for a free connection before giving up
+DB_POOL_TIMEOUT = float(os.environ.get('PROCESS_MONITOR_DB_POOL_TIMEOUT', 10))
+# Connections idle for longer than this are pinged before being handed out
+DB_HEALTH_CHECK_INTERVAL = float(os.environ.get('PROCESS_MONITOR_DB_HEALTH_CHECK_INTERVAL', 30))
+
+# Write-behind writer for system_logs / process_logs / idle_time_logs
+# Maximum queued batches; also the number of rows kept for retry while MySQL is down
+WRITER_QUEUE_SIZE = int(os.environ.get('PROCESS_MONITOR_WRITER_QUEUE_SIZE', 10000))
+# Flush when this many rows are pending ...
+WRITER_BATCH_SIZE = int(os.environ.get('PROCESS_MONITOR_WRITER_BATCH_SIZE', 500))
+# ... or when the oldest pending row is this many seconds old
+WRITER_FLUSH_INTERVAL = float(os.environ.get('PROCESS_MONITOR_WRITER_FLUSH_INTERVAL', 5))
+# How long a producer blocks on a full queue before the rows are dropped
+WRITER_PUT_TIMEOUT = float(os.environ.get('PROCESS_MONITOR_WRITER_PUT_TIMEOUT', 1))
+
+# Retention: rows deleted per batch and the pause between batches (seconds)
+RETENTION_BATCH_SIZE = int(os.environ.get('PROCESS_MONITOR_RETENTION_BATCH_SIZE', 5000))
+RETENTION_BATCH_PAUSE = float(os.environ.get('PROCESS_MONITOR_RETENTION_BATCH_PAUSE', 0.2))
+# Used when monitor_settings has no auto_cleanup_days
+DEFAULT_RETENTION_DAYS = 30
+
+# Blacklist enforcement: seconds between pid-set diffs
+ENFORCE_INTERVAL = float(os.environ.get('PROCESS_MONITOR_ENFORCE_INTERVAL', 1))
+# Use the Linux proc connector for exec events when permitted (needs CAP_NET_ADMIN)
+ENFORCE_USE_PROC_CONNECTOR = os.environ.get('PROCESS_MONITOR_ENFORCE_USE_PROC_CONNECTOR', '1') == '1'
+
+# HTTP responses: compress JSON/text bodies of at least this many bytes (gzip/deflate level below)
+COMPRESS_MIN_SIZE = int(os.environ.get('PROCESS_MONITOR_COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.environ.get('PROCESS_MONITOR_COMPRESS_LEVEL', 1))
+# Browser cache lifetime (seconds) for history requests whose start/end range is already closed
+HISTORY_CACHE_MAX_AGE = int(os.environ.get('PROCESS_MONITOR_HISTORY_CACHE_MAX_AGE', 86400))
+
+# Headless server (headless_server.py): API worker processes and the shared metrics segment size in bytes
+API_WORKERS = int(os.environ.get('PROCESS_MONITOR_API_WORKERS', min(4, os.cpu_count() or 1)))
+SHARED_SEGMENT_SIZE = int(os.environ.get('PROCESS_MONITOR_SHARED_SEGMENT_SIZE', 8 * 1024 * 1024))
+# How often each process re-reads monitor settings saved by another process (seconds)
+SETTINGS_POLL_INTERVAL = float(os.environ.get('PROCESS_MONITOR_SETTINGS_POLL_INTERVAL', 2))
+# How often the collector publishes the process list to the segment (seconds)
+PROCESS_PUBLISH_INTERVAL = float(os.environ.get('PROCESS_MONITOR_PROCESS_PUBLISH_INTERVAL', 2))
+
+# Memory-mapped ring of recent samples (ring_store.py): file path and number of samples kept
+RING_PATH = os.environ.get('PROCESS_MONITOR_RING_PATH',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics.ring'))
+RING_CAPACITY = int(os.environ.get('PROCESS_MONITOR_RING_CAPACITY', 86400))
+
+# System sampling rate in Hz (1-10). Above 1 Hz short CPU bursts are caught; storage stays at
+# one system_logs row per SYSTEM_LOG_WINDOW seconds holding the window's avg/min/max/p95
+SAMPLE_HZ = min(10.0, max(1.0, float(os.environ.get('PROCESS_MONITOR_SAMPLE_HZ', 1))))
+SYSTEM_LOG_WINDOW = int(os.environ.get('PROCESS_MONITOR_SYSTEM_LOG_WINDOW', 30))
+
+# Alert rules (rules.py). Thresholds come from the settings page; a system rule fires after the
+# value stays above it for RULE_SUSTAIN_SECONDS and clears RULE_HYSTERESIS points below it
+RULE_SUSTAIN_SECONDS = float(os.environ.get('PROCESS_MONITOR_RULE_SUSTAIN_SECONDS', 30))
+RULE_HYSTERESIS = float(os.environ.get('PROCESS_MONITOR_RULE_HYSTERESIS', 5))
+# CPU anomaly rule: z-score against an EWMA baseline with this half-life (seconds)
+ANOMALY_Z = float(os.environ.get('PROCESS_MONITOR_ANOMALY_Z', 4))
+ANOMALY_HALF_LIFE = float(os.environ.get('PROCESS_MONITOR_ANOMALY_HALF_LIFE', 300))
+# Per-process rules: how often the whole process table is checked and how long a process must stay over
+PROCESS_RULE_INTERVAL = float(os.environ.get('PROCESS_MONITOR_PROCESS_RULE_INTERVAL', 5))
+PROCESS_RULE_SUSTAIN_SECONDS = float(os.environ.get('PROCESS_MONITOR_PROCESS_RULE_SUSTAIN_SECONDS', 60))
+
+# Email alerts (alert_dispatch.py): recipient, how long the first alert waits so a burst goes out as
+# one digest (seconds), at most ALERT_RATE_LIMIT emails per ALERT_RATE_WINDOW seconds, and send
+# retries with exponential backoff starting at ALERT_RETRY_BACKOFF seconds
+ALERT_EMAIL_TO = os.environ.get('PROCESS_MONITOR_ALERT_EMAIL_TO', "reciever's email")
+ALERT_DIGEST_SECONDS = float(os.environ.get('PROCESS_MONITOR_ALERT_DIGEST_SECONDS', 60))
+ALERT_RATE_LIMIT = int(os.environ.get('PROCESS_MONITOR_ALERT_RATE_LIMIT', 6))
+ALERT_RATE_WINDOW = float(os.environ.get('PROCESS_MONITOR_ALERT_RATE_WINDOW', 3600))
+ALERT_RETRY_ATTEMPTS = int(os.environ.get('PROCESS_MONITOR_ALERT_RETRY_ATTEMPTS', 5))
+ALERT_RETRY_BACKOFF = float(os.environ.get('PROCESS_MONITOR_ALERT_RETRY_BACKOFF', 2))
+
+# Scheduled report (report_builder.py): hours covered, attachment format ('csv' or 'ndjson', gzipped)
+# and processes listed. The single-sample export/system_status.json is only written when enabled
+REPORT_HOURS = float(os.environ.get('PROCESS_MONITOR_REPORT_HOURS', 4))
+REPORT_FORMAT = os.environ.get('PROCESS_MONITOR_REPORT_FORMAT', 'csv')
+REPORT_TOP_N = int(os.environ.get('PROCESS_MONITOR_REPORT_TOP_N', 10))
+WRITE_STATUS_JSON = os.environ.get('PROCESS_MONITOR_WRITE_STATUS_JSON', '0') == '1'
+
+# Bulk export (bulk_export.py): rows fetched from the database and encoded per chunk
+EXPORT_BATCH_SIZE = int(os.environ.get('PROCESS_MONITOR_EXPORT_BATCH_SIZE', 2000))
@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+
+import mysql.connector
+from mysql.connector import errors
+
+from config import DB_CONFIG, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_HEALTH_CHECK_INTERVAL
+
+
+class ConnectionPool:
+    """Fixed-size pool of MySQL connections shared by app.py and main_script.py."""
+
+    def __init__(self, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 health_check_interval=DB_HEALTH_CHECK_INTERVAL, **db_config):
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.db_config = db_config or DB_CONFIG
+        # LIFO so the most recently used (and most likely alive) connection is reused first
+        self._idle = LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'reconnects': 0,
+            'discarded': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+
+    def _connect(self):
+        return mysql.connector.connect(**self.db_config)
+
+    def _is_healthy(self, conn, idle_since):
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except errors.Error:
+            return False
+
+    def _reserve_slot(self):
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return True
+            return False
+
+    def _release_slot(self):
+        with self._lock:
+            self._created -= 1
+
+    def get_connection(self):
+        start = time.monotonic()
+        waited = False
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except Empty:
+                if self._reserve_slot():
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        self._release_slot()
+                        raise
+                    break
+                waited = True
+                remaining = self.timeout - (time.monotonic() - start)
+                try:
+                    conn, idle_since = self._idle.get(timeout=max(0.0, remaining))
+                except Empty:
+                    with self._lock:
+                        self._stats['timeouts'] += 1
+                    raise errors.PoolError(f"No free database connection after {self.timeout}s (pool size {self.size})")
+
+            if self._is_healthy(conn, idle_since):
+                break
+            # Stale connection (server restart, wait_timeout, ...) - replace it
+            try:
+                conn.reconnect(attempts=1, delay=0)
+                with self._lock:
+                    self._stats['reconnects'] += 1
+                break
+            except errors.Error:
+                self._discard(conn)
+
+        wait_ms = (time.monotonic() - start) * 1000
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['total_wait_ms'] += wait_ms
+            self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+            if waited:
+                self._stats['waits'] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._release_slot()
+        with self._lock:
+            self._stats['discarded'] += 1
+
+    def return_connection(self, conn, broken=False):
+        if not broken:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except errors.Error:
+                broken = True
+        if broken:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        conn = self.get_connection()
+        broken = False
+        try:
+            yield conn
+        except (errors.InterfaceError, errors.OperationalError):
+            broken = True
+            raise
+        finally:
+            self.return_connection(conn, broken=broken)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['open_connections'] = self._created
+        stats['idle_connections'] = self._idle.qsize()
+        stats['in_use'] = stats['open_connections'] - stats['idle_connections']
+        stats['avg_wait_ms'] = stats['total_wait_ms'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+
+db_pool = ConnectionPool()
+
+
+@contextmanager
+def get_db_cursor(dictionary=False):
+    """Cursor on a pooled connection; commits on success, rolls back on error."""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except errors.Error:
+                pass
+            raise
+        finally:
+            cursor.close()
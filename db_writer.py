@@ -0,0 +1,198 @@
+import atexit
+import threading
+import time
+from queue import Queue, Empty, Full
+
+from config import WRITER_QUEUE_SIZE, WRITER_BATCH_SIZE, WRITER_FLUSH_INTERVAL, WRITER_PUT_TIMEOUT
+from storage import get_db_cursor, storage
+
+# Column order of the rows submitted for each table
+TABLE_COLUMNS = {
+    'system_logs': ('cpu_percent', 'memory_percent', 'timestamp', 'samples', 'cpu_min', 'cpu_max', 'cpu_p95',
+                    'memory_min', 'memory_max', 'memory_p95', 'core_max'),
+    # Process names and users live in the dimension tables (process_dimensions.py)
+    'process_logs': ('timestamp', 'process_id', 'cpu_usage', 'memory_usage'),
+    'idle_time_logs': ('timestamp', 'idle_seconds'),
+}
+
+# Tables whose rows replace an existing row with the same key (upserts)
+UPSERT_KEYS = {}
+
+_STOP = object()
+
+
+def register_table(table, columns, upsert_key=None):
+    """Lets other modules queue rows for their own tables through the shared writer."""
+    TABLE_COLUMNS[table] = tuple(columns)
+    if upsert_key:
+        UPSERT_KEYS[table] = upsert_key
+
+
+class BatchWriter:
+    """Write-behind writer: queues rows from the collectors and flushes them in one transaction per batch."""
+
+    def __init__(self, queue_size=WRITER_QUEUE_SIZE, batch_size=WRITER_BATCH_SIZE,
+                 flush_interval=WRITER_FLUSH_INTERVAL, put_timeout=WRITER_PUT_TIMEOUT):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        # Rows kept for retry while the database is unavailable
+        self.max_pending = queue_size
+        self._queue = Queue(maxsize=queue_size)
+        self._pending = {}
+        self._pending_rows = 0
+        self._oldest_pending = None
+        self._thread = None
+        self._stopping = False
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'rows_written': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'dropped_rows': 0,
+            'blocked_puts': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="DB_Writer_Thread", daemon=True)
+            self._thread.start()
+
+    def submit(self, table, rows):
+        """Queues rows (tuples in TABLE_COLUMNS order) for `table`. Returns False if they were dropped."""
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown table for batch writer: {table}")
+        if not rows:
+            return True
+        self.start()
+        item = (table, list(rows))
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except Full:
+            pass
+        # Backpressure: block the producer briefly, then shed load rather than stall sampling
+        with self._stats_lock:
+            self._stats['blocked_puts'] += 1
+        try:
+            self._queue.put(item, timeout=self.put_timeout)
+            return True
+        except Full:
+            with self._stats_lock:
+                self._stats['dropped_rows'] += len(item[1])
+            print(f"[Writer] Queue full, dropped {len(item[1])} {table} rows")
+            return False
+
+    def _add_pending(self, table, rows):
+        self._pending.setdefault(table, []).extend(rows)
+        self._pending_rows += len(rows)
+        if self._oldest_pending is None:
+            self._oldest_pending = time.monotonic()
+
+    def _run(self):
+        while True:
+            if self._oldest_pending is None:
+                timeout = None
+            else:
+                timeout = max(0.0, self._oldest_pending + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                item = None
+
+            if item is _STOP:
+                self._stopping = True
+            elif item is not None:
+                self._add_pending(*item)
+
+            due = (self._oldest_pending is not None
+                   and time.monotonic() - self._oldest_pending >= self.flush_interval)
+            if self._pending_rows >= self.batch_size or due or self._stopping:
+                self._flush()
+            if self._stopping:
+                return
+
+    def _flush(self):
+        # Drain whatever else is already queued so it goes out in the same batch
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except Empty:
+                break
+            if item is _STOP:
+                self._stopping = True
+            else:
+                self._add_pending(*item)
+        if not self._pending_rows:
+            return
+
+        start = time.perf_counter()
+        try:
+            with get_db_cursor() as cursor:
+                for table, rows in self._pending.items():
+                    storage.insert_rows(cursor, table, TABLE_COLUMNS[table], rows,
+                                        upsert_key=UPSERT_KEYS.get(table), batch_size=self.batch_size)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats['failed_flushes'] += 1
+            print(f"[Writer] Flush of {self._pending_rows} rows failed: {e}")
+            self._trim_pending()
+            # Retry on the next flush interval
+            self._oldest_pending = time.monotonic()
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._stats['rows_written'] += self._pending_rows
+            self._stats['flushes'] += 1
+            self._stats['last_flush_ms'] = elapsed_ms
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+            self._stats['total_flush_ms'] += elapsed_ms
+        self._pending = {}
+        self._pending_rows = 0
+        self._oldest_pending = None
+
+    def _trim_pending(self):
+        # Keep at most max_pending rows around for retry, dropping the oldest first
+        excess = self._pending_rows - self.max_pending
+        if excess <= 0:
+            return
+        dropped = 0
+        for rows in self._pending.values():
+            take = min(len(rows), excess - dropped)
+            del rows[:take]
+            dropped += take
+            if dropped >= excess:
+                break
+        self._pending_rows -= dropped
+        with self._stats_lock:
+            self._stats['dropped_rows'] += dropped
+
+    def stop(self, timeout=10):
+        """Flushes everything still queued and stops the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except Full:
+            print("[Writer] Queue full at shutdown, pending rows may be lost")
+            return
+        self._thread.join(timeout=timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['pending_rows'] = self._pending_rows
+        stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
+
+
+db_writer = BatchWriter()
+atexit.register(db_writer.stop)
@@ -0,0 +1,74 @@
+import numpy as np
+
+# Rows pulled from the cursor per fetchmany() call
+FETCH_CHUNK = 5000
+
+
+def lttb_indices(x, series, max_points):
+    """Largest-Triangle-Three-Buckets over one or more y-series sharing the x axis.
+
+    Returns the indices of the points to keep. With several series the triangle
+    areas are summed, so a spike in any of them keeps its point.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    ys = np.vstack([np.asarray(y, dtype=np.float64) for y in series])
+
+    # Bucket boundaries for the n - 2 inner points (first and last are always kept)
+    every = (n - 2) / (max_points - 2)
+    edges = (np.floor(np.arange(max_points - 1) * every) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average point of every bucket in one pass; the last bucket looks ahead to the final point
+    sums_x = np.add.reduceat(x[:n - 1], starts)
+    sums_y = np.add.reduceat(ys[:, :n - 1], starts, axis=1)
+    counts = ends - starts
+    next_avg_x = np.append(sums_x[1:] / counts[1:], x[-1])
+    next_avg_y = np.hstack([sums_y[:, 1:] / counts[1:], ys[:, -1:]])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(max_points - 2):
+        start, end = starts[i], ends[i]
+        bx = x[start:end]
+        by = ys[:, start:end]
+        # Twice the triangle area between the previous pick, each candidate and the next bucket's average
+        area = np.abs((x[a] - next_avg_x[i]) * (by - ys[:, a:a + 1])
+                      - (x[a] - bx) * (next_avg_y[:, i:i + 1] - ys[:, a:a + 1])).sum(axis=0)
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def read_series(cursor, columns, chunk_size=FETCH_CHUNK):
+    """Streams a non-dictionary cursor into float arrays, one array per column."""
+    capacity = chunk_size
+    data = np.empty((columns, capacity), dtype=np.float64)
+    size = 0
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        if size + len(rows) > capacity:
+            capacity = max(capacity * 2, size + len(rows))
+            grown = np.empty((columns, capacity), dtype=np.float64)
+            grown[:, :size] = data[:, :size]
+            data = grown
+        data[:, size:size + len(rows)] = np.asarray(rows, dtype=np.float64).T
+        size += len(rows)
+    return data[:, :size]
+
+
+def downsample_rows(rows, max_points, keys=('cpu_percent', 'memory_percent')):
+    """LTTB on a list of row dicts (already ordered by time), keeping whole rows."""
+    if not max_points or len(rows) <= max_points:
+        return rows
+    x = np.arange(len(rows), dtype=np.float64)
+    series = [[float(row[key] or 0) for row in rows] for key in keys]
+    return [rows[i] for i in lttb_indices(x, series, max_points)]
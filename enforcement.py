@@ -0,0 +1,296 @@
+import getpass
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import psutil
+
+from config import ENFORCE_INTERVAL, ENFORCE_USE_PROC_CONNECTOR
+from settings_cache import settings_cache
+
+# Linux proc connector (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_EVENT_EXEC = 0x00000002
+NLMSG_DONE = 3
+
+_NLMSG_HEADER = struct.Struct('=IHHII')    # len, type, flags, seq, pid
+_CN_MSG_HEADER = struct.Struct('=IIIIHH')  # idx, val, seq, ack, len, flags
+_PROC_EVENT_HEADER = struct.Struct('=IIQ')  # what, cpu, timestamp_ns
+_EXEC_EVENT = struct.Struct('=II')         # process_pid, process_tgid
+
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+# Number of recent kills / cycles kept for the stats endpoint
+STATS_KEEP = 200
+
+
+class ProcConnector:
+    """Exec notifications from the kernel over NETLINK_CONNECTOR (Linux, needs CAP_NET_ADMIN)."""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            self.sock.bind((0, CN_IDX_PROC))
+            payload = struct.pack('=I', PROC_CN_MCAST_LISTEN)
+            cn_msg = _CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+            header = _NLMSG_HEADER.pack(_NLMSG_HEADER.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+            self.sock.send(header + cn_msg)
+        except OSError:
+            self.sock.close()
+            raise
+
+    def exec_pids(self, timeout):
+        """Pids that called exec() since the last read; waits up to `timeout` seconds for the first one."""
+        pids = []
+        self.sock.settimeout(timeout)
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (socket.timeout, BlockingIOError):
+                return pids
+            offset = 0
+            while offset + _NLMSG_HEADER.size <= len(data):
+                length = _NLMSG_HEADER.unpack_from(data, offset)[0]
+                event = offset + _NLMSG_HEADER.size + _CN_MSG_HEADER.size
+                if event + _PROC_EVENT_HEADER.size + _EXEC_EVENT.size <= len(data):
+                    what = _PROC_EVENT_HEADER.unpack_from(data, event)[0]
+                    if what == PROC_EVENT_EXEC:
+                        pid, tgid = _EXEC_EVENT.unpack_from(data, event + _PROC_EVENT_HEADER.size)
+                        if pid == tgid:  # Ignore threads
+                            pids.append(pid)
+                if not length:
+                    break
+                offset += (length + 3) & ~3
+            # Drain whatever else is already queued without waiting again
+            self.sock.settimeout(0)
+
+    def close(self):
+        self.sock.close()
+
+
+def spawn_age(pid, create_time):
+    """Seconds since `pid` started.
+
+    On Linux this uses the start tick from /proc against CLOCK_BOOTTIME, because
+    psutil's create_time() is built on a boot time rounded to whole seconds.
+    """
+    if hasattr(time, 'CLOCK_BOOTTIME'):
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as f:
+                stat = f.read()
+            # Fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(stat[stat.rindex(b')') + 2:].split()[19])
+            return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / _CLOCK_TICKS
+        except (OSError, ValueError, IndexError):
+            pass
+    return time.time() - create_time
+
+
+class BlacklistEnforcer:
+    """Kills blacklisted processes owned by the current user as soon as they appear.
+
+    Only processes that are new since the previous cycle are looked at: the pid set
+    is diffed against the last one, or exec events come straight from the Linux proc
+    connector when it is available. A blacklist change triggers one re-check of the
+    names already known.
+    """
+
+    def __init__(self, interval=ENFORCE_INTERVAL, use_proc_connector=ENFORCE_USE_PROC_CONNECTOR):
+        self.interval = interval
+        self.use_proc_connector = use_proc_connector
+        self.mode = 'pid-diff'
+        self.current_user = getpass.getuser()
+        # pid -> (create_time, lower-cased name)
+        self._known = {}
+        # pids first seen last cycle; looked at once more in case they exec'd in between
+        self._fresh = set()
+        self._recheck = True
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._kills = deque(maxlen=STATS_KEEP)
+        self._cycles = deque(maxlen=STATS_KEEP)
+        self.total_cycles = 0
+        self.total_kills = 0
+        settings_cache.add_listener(self._on_settings_change)
+
+    def _on_settings_change(self, snapshot):
+        self._recheck = True
+
+    def _owned_by_current_user(self, proc):
+        try:
+            username = proc.username()
+        except (psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+        return bool(username) and self.current_user in username
+
+    def _kill(self, pid, create_time, name):
+        """Terminates one process by pid; returns True if it is gone."""
+        try:
+            proc = psutil.Process(pid)
+            if proc.create_time() != create_time or not self._owned_by_current_user(proc):
+                return False
+            age = spawn_age(pid, create_time)
+            proc.terminate()
+            latency_ms = age * 1000
+            gone, alive = psutil.wait_procs([proc], timeout=0.5)
+            for survivor in alive:
+                survivor.kill()
+        except psutil.NoSuchProcess:
+            return True
+        except psutil.AccessDenied:
+            print(f"Permission Denied to Kill {name} | PID: {pid}❌")
+            return False
+        except Exception as e:
+            print(f"Error terminating {name} | PID: {pid}: {e}")
+            return False
+
+        self._kills.append({'pid': pid, 'name': name, 'spawn_to_kill_ms': round(latency_ms, 1),
+                            'killed_at': time.time()})
+        self.total_kills += 1
+        self._known.pop(pid, None)
+        print(f"Killed {name} (PID:{pid}✅) {latency_ms:.0f} ms after spawn")
+        return True
+
+    def _inspect(self, pid):
+        # Reads name and create_time of one pid and records them
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                entry = (proc.create_time(), proc.name().lower())
+        except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+            self._known.pop(pid, None)
+            return None
+        self._known[pid] = entry
+        return entry
+
+    def _enforce(self, pids, blacklist):
+        for pid in pids:
+            entry = self._inspect(pid)
+            if entry and entry[1] in blacklist:
+                self._kill(pid, entry[0], entry[1])
+
+    def cycle(self, exec_pids=None):
+        """One enforcement pass. `exec_pids` are pids reported by the proc connector, if any."""
+        start_cpu = time.thread_time()
+        start = time.perf_counter()
+        with self._lock:
+            blacklist = settings_cache.get().blacklist
+            checked = 0
+
+            if exec_pids is None:
+                current = set(psutil.pids())
+                for pid in set(self._known) - current:
+                    del self._known[pid]
+                new = current - set(self._known)
+                candidates = new | (self._fresh & current)
+                self._fresh = new
+            else:
+                candidates = set(exec_pids)
+
+            if blacklist:
+                self._enforce(candidates, blacklist)
+            else:
+                for pid in candidates:
+                    self._inspect(pid)
+            checked += len(candidates)
+
+            if self._recheck:
+                # Blacklist changed (or first run): match every process already known
+                self._recheck = False
+                if blacklist:
+                    for pid, (create_time, name) in list(self._known.items()):
+                        if name in blacklist:
+                            self._kill(pid, create_time, name)
+                    checked += len(self._known)
+
+        self.total_cycles += 1
+        self._cycles.append({
+            'checked': checked,
+            'cpu_ms': (time.thread_time() - start_cpu) * 1000,
+            'wall_ms': (time.perf_counter() - start) * 1000,
+        })
+
+    def full_check(self):
+        """Matches every running process against the blacklist once."""
+        with self._lock:
+            self._known.clear()
+            self._fresh = set()
+        self.cycle()
+
+    def _safe_cycle(self, exec_pids=None):
+        # A failed pass (e.g. the settings database restarting) must not end the thread; wait and
+        # let the next pass re-match every known process
+        try:
+            self.cycle(exec_pids=exec_pids)
+        except Exception as e:
+            print(f"[Error in blacklist enforcement] {e}")
+            self._recheck = True
+            self._stop.wait(self.interval)
+
+    def run(self):
+        """Blocks running enforcement cycles until stop() is called."""
+        connector = None
+        if self.use_proc_connector and hasattr(socket, 'AF_NETLINK'):
+            try:
+                connector = ProcConnector()
+                self.mode = 'proc-connector'
+            except OSError as e:
+                print(f"[Enforcement] Proc connector unavailable ({e}), falling back to pid diffing")
+
+        self._safe_cycle()  # Populate the known pids
+        next_full = time.monotonic() + self.interval
+        try:
+            while not self._stop.is_set():
+                if connector is None:
+                    self._stop.wait(self.interval)
+                    self._safe_cycle()
+                    continue
+
+                try:
+                    pids = connector.exec_pids(timeout=self.interval)
+                except OSError as e:
+                    print(f"[Enforcement] Proc connector failed ({e}), falling back to pid diffing")
+                    connector.close()
+                    connector = None
+                    self.mode = 'pid-diff'
+                    continue
+                if pids:
+                    self._safe_cycle(exec_pids=pids)
+                if self._recheck or time.monotonic() >= next_full:
+                    # Periodic pid diff catches anything the connector dropped
+                    self._safe_cycle()
+                    next_full = time.monotonic() + self.interval * 10
+        finally:
+            if connector is not None:
+                connector.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        cycles = list(self._cycles)
+        kills = list(self._kills)
+        latencies = [kill['spawn_to_kill_ms'] for kill in kills]
+        return {
+            'mode': self.mode,
+            'interval': self.interval,
+            'tracked_processes': len(self._known),
+            'total_cycles': self.total_cycles,
+            'total_kills': self.total_kills,
+            'avg_cycle_cpu_ms': round(sum(c['cpu_ms'] for c in cycles) / len(cycles), 3) if cycles else None,
+            'max_cycle_cpu_ms': round(max(c['cpu_ms'] for c in cycles), 3) if cycles else None,
+            'avg_cycle_wall_ms': round(sum(c['wall_ms'] for c in cycles) / len(cycles), 3) if cycles else None,
+            'avg_checked_per_cycle': round(sum(c['checked'] for c in cycles) / len(cycles), 1) if cycles else None,
+            'avg_spawn_to_kill_ms': round(sum(latencies) / len(latencies), 1) if latencies else None,
+            'max_spawn_to_kill_ms': max(latencies) if latencies else None,
+            'recent_kills': kills[-20:],
+        }
+
+
+blacklist_enforcer = BlacklistEnforcer()
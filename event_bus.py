@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from collections import Counter
+
+# Topics a page can subscribe to on /api/stream
+STREAM_TOPICS = ('system', 'processes', 'idle', 'history', 'alerts')
+# Seconds between keep-alive comments on an idle stream
+KEEPALIVE_INTERVAL = 15
+# Client reconnect delay sent to EventSource, in milliseconds
+RECONNECT_MS = 5000
+
+
+class EventBus:
+    """Fans published events out to every Server-Sent Events client.
+
+    Each event is serialised once, whatever the number of clients. Only the newest
+    event per topic is kept, so a slow client skips stale readings instead of
+    queueing them. Topics with a producer are only computed while someone is
+    subscribed to them.
+    """
+
+    def __init__(self, keepalive=KEEPALIVE_INTERVAL):
+        self.keepalive = keepalive
+        self._cond = threading.Condition()
+        # topic -> (sequence number, encoded SSE message)
+        self._events = {}
+        self._seq = 0
+        self._subscribers = Counter()
+        # topic -> [function, interval, next run]
+        self._producers = {}
+        self._producer_thread = None
+        # Called with (topic, data) after every publish, e.g. to mirror events to other processes
+        self._taps = []
+
+    def publish(self, topic, data):
+        payload = json.dumps(data, default=str)
+        with self._cond:
+            self._seq += 1
+            message = f"id: {self._seq}\nevent: {topic}\ndata: {payload}\n\n".encode()
+            self._events[topic] = (self._seq, message)
+            self._cond.notify_all()
+        for tap in self._taps:
+            try:
+                tap(topic, data)
+            except Exception as e:
+                print(f"[Error in event tap for {topic}] {e}")
+
+    def add_tap(self, callback):
+        self._taps.append(callback)
+
+    def add_producer(self, topic, function, interval):
+        """Publishes `function()` on `topic` every `interval` seconds while the topic has subscribers."""
+        with self._cond:
+            self._producers[topic] = [function, interval, 0.0]
+
+    def has_subscribers(self, topic):
+        return self._subscribers[topic] > 0
+
+    def _run_producers(self):
+        while True:
+            now = time.monotonic()
+            with self._cond:
+                due = [(topic, producer) for topic, producer in self._producers.items()
+                       if self._subscribers[topic] and producer[2] <= now]
+                for _, producer in due:
+                    producer[2] = now + producer[1]
+            for topic, (function, _, _) in due:
+                try:
+                    data = function()
+                    if data is not None:  # None means nothing new to send
+                        self.publish(topic, data)
+                except Exception as e:
+                    print(f"[Error producing {topic} events] {e}")
+            time.sleep(0.5)
+
+    def _start_producers(self):
+        with self._cond:
+            if self._producer_thread is None:
+                self._producer_thread = threading.Thread(target=self._run_producers,
+                                                         name="Event_Producer_Thread", daemon=True)
+                self._producer_thread.start()
+
+    def subscribe(self, topics):
+        """Generator of SSE messages for `topics`, starting with the latest event of each."""
+        self._start_producers()
+        with self._cond:
+            self._subscribers.update(topics)
+            for topic in topics:
+                if topic in self._producers:
+                    self._producers[topic][2] = 0.0  # New subscriber gets fresh data straight away
+        seen = dict.fromkeys(topics, 0)
+
+        def pending():
+            return [(topic, self._events[topic]) for topic in topics
+                    if topic in self._events and self._events[topic][0] > seen[topic]]
+
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n".encode()
+            while True:
+                with self._cond:
+                    self._cond.wait_for(pending, timeout=self.keepalive)
+                    ready = pending()
+                if not ready:
+                    yield b": keepalive\n\n"
+                    continue
+                for topic, (seq, message) in ready:
+                    seen[topic] = seq
+                    yield message
+        finally:
+            with self._cond:
+                self._subscribers.subtract(topics)
+
+    def stats(self):
+        with self._cond:
+            return {'subscribers': {topic: count for topic, count in self._subscribers.items() if count},
+                    'events_published': self._seq}
+
+
+event_bus = EventBus()
@@ -18,9 +18,9 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def init_gmail_service(client_file, api_name='gmail', api_version='v1', scopes=['https://mail.google.com/']):
+def init_gmail_service(client_file, api_name='gmail', api_version='v1', scopes=['https://mail.google.com/'], static_discovery=False):
     client_file = resource_path(client_file)
-    return create_service(client_file,api_name,api_version,scopes)
+    return create_service(client_file,api_name,api_version,scopes,static_discovery=static_discovery)
 def _extract_body(payload):
     body = '<Text body not available>'
     if 'parts' in payload:
@@ -100,7 +100,7 @@ def get_email_message_details(service,msg_id):
         
     }
 
-def send_email(service,to,subject,body,body_type='plain',attachment_paths=None):
+def send_email(service,to,subject,body,body_type='plain',attachment_paths=None,attachments=None):
     message=MIMEMultipart()
     message['to']=to
     message['subject']=subject
@@ -126,6 +126,15 @@ def send_email(service,to,subject,body,body_type='plain',attachment_paths=None):
                 message.attach(part)
             else:
                 raise FileNotFoundError(f"File not found - {attachment_path}")
+    # In-memory attachments: (filename, bytes) pairs
+    for filename, data in attachments or ():
+        part = MIMEBase("application","octet-stream")
+        part.set_payload(data)
+        encoders.encode_base64(part)
+        part.add_header(
+            "Content-Disposition",
+            f"attachment; filename={filename}")
+        message.attach(part)
     raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
     sent_message = service.users().messages().send(
     userId='me',
@@ -0,0 +1,147 @@
+"""Headless server: collectors in one process, the API in several worker processes.
+
+The collector process samples CPU/memory, scans processes, enforces the blacklist
+and writes to MySQL. It publishes the latest sample, process list and events into
+a shared memory segment (shared_metrics.py). API workers serve Flask from the
+segment without sampling anything themselves, so requests scale across cores and
+never compete with the collectors for the GIL.
+
+    python headless_server.py --host 0.0.0.0 --port 5000 --workers 4
+
+More than one worker needs the fork start method (Linux/macOS); elsewhere a single
+API worker runs in the main process.
+"""
+import argparse
+import multiprocessing
+import socket
+import threading
+import time
+
+from config import API_WORKERS, PROCESS_PUBLISH_INTERVAL
+from shared_metrics import SharedMetricsSegment
+
+# Events that happen in the collector but are streamed by the API workers
+_MIRRORED_TOPICS = ('idle', 'history', 'alerts')
+
+
+def run_collector(segment, ready):
+    import schedule
+
+    from alert_dispatch import start_alert_dispatch
+    from event_bus import event_bus
+    from main_script import start_monitoring, track_idle_time, monitor_system, send_email_to_user
+    from migrations import run_migrations
+    from platform_backend import visible_active_apps
+    from ring_store import start_ring_store
+    from rules import start_rules
+    from rollups import start_rollups
+    from sampler import start_sampler
+    from settings_cache import settings_cache
+    from snapshot_store import process_store
+    from top_processes import TOP_PROCESSES_EVENT, top_processes
+
+    try:
+        run_migrations()
+    except Exception as e:
+        print(f"[Error] Database migrations failed: {e}")
+    ready.set()
+
+    sampler = start_sampler()
+    sampler.add_listener(segment.publish_sample)
+    start_rollups(sampler)
+    start_ring_store(sampler)
+    start_alert_dispatch(start_rules(sampler))
+    event_bus.add_tap(lambda topic, data: segment.publish_event(topic, data) if topic in _MIRRORED_TOPICS else None)
+    # Process snapshots are logged here, so the workers read the top-N lists from the segment
+    top_processes.add_listener(lambda top: segment.publish_event(TOP_PROCESSES_EVENT, top))
+    # Settings are saved by the API workers
+    settings_cache.start_polling()
+    schedule.every(4).hours.do(send_email_to_user)
+
+    for target, name in ((start_monitoring, "System_Monitor_Thread"),
+                         (track_idle_time, "Idle_time_Thread"),
+                         (monitor_system, "Blacklist_Enforcer_Thread")):
+        threading.Thread(target=target, name=name, daemon=True).start()
+
+    print(f"[INFO] Collector running (pid {multiprocessing.current_process().pid})")
+    published = None
+    while True:
+        try:
+            process_store.update(visible_active_apps())
+            version, body = process_store.full_json()
+            if version != published:
+                segment.publish_processes(version, body)
+                published = version
+        except Exception as e:
+            print(f"[Error Publishing Processes] {e}")
+        time.sleep(PROCESS_PUBLISH_INTERVAL)
+
+
+def run_api_worker(segment, sock=None, host='127.0.0.1', port=5000):
+    import shared_metrics
+    shared_metrics.attach(segment)
+
+    from werkzeug.serving import make_server
+
+    from app import app, start_shared_segment_relay
+    from main_script import handle_settings_updates
+    from settings_cache import settings_cache
+
+    settings_cache.start_polling()
+    threading.Thread(target=handle_settings_updates, name="Settings_Update_Thread", daemon=True).start()
+    start_shared_segment_relay(segment)
+
+    # Forked workers share one listening socket and let the kernel spread the connections
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno() if sock else None)
+    print(f"[INFO] API worker {multiprocessing.current_process().pid} serving on http://{host}:{port}")
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the process monitor without the desktop window.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=API_WORKERS, help="API worker processes")
+    args = parser.parse_args()
+
+    can_fork = 'fork' in multiprocessing.get_all_start_methods()
+    if args.workers > 1 and not can_fork:
+        print("[INFO] fork is not available on this platform, running a single API worker")
+        args.workers = 1
+    context = multiprocessing.get_context('fork' if can_fork else 'spawn')
+
+    segment = SharedMetricsSegment.create()
+    processes = []
+    try:
+        ready = context.Event()
+        collector = context.Process(target=run_collector, args=(segment, ready), name="collector")
+        collector.start()
+        processes.append(collector)
+        ready.wait(timeout=120)  # Migrations first, so workers never see a half-built schema
+
+        if args.workers == 1:
+            run_api_worker(segment, host=args.host, port=args.port)
+            return
+
+        sock = socket.create_server((args.host, args.port), backlog=128)
+        for index in range(args.workers):
+            worker = context.Process(target=run_api_worker, args=(segment, sock, args.host, args.port),
+                                     name=f"api-worker-{index}")
+            worker.start()
+            processes.append(worker)
+        sock.close()  # The workers hold their own copies
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+        segment.close(unlink=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import gzip
+import zlib
+
+from config import COMPRESS_MIN_SIZE, COMPRESS_LEVEL
+
+# Content types worth compressing
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'application/javascript', 'text/')
+
+
+def compress_body(data, encoding, level=COMPRESS_LEVEL):
+    if encoding == 'gzip':
+        # mtime=0 keeps the output byte-identical for identical input, so ETags stay stable
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return zlib.compress(data, level)
+
+
+def compress_response(response, request):
+    """after_request hook: gzip/deflate text responses above COMPRESS_MIN_SIZE when the client accepts it.
+
+    Streamed responses (Server-Sent Events, send_file) are left alone. A compressed
+    body is a different representation, so its ETag gets the encoding appended and
+    conditional requests are re-checked against that.
+    """
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    if not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(('gzip', 'deflate'))
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    response.set_data(compress_body(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -7,6 +7,12 @@ import time
 import schedule
 from app import app  # Your Flask app
 from main_script import start_monitoring, track_idle_time, monitor_system, handle_settings_updates,send_email_to_user
+from sampler import start_sampler
+from rollups import start_rollups
+from ring_store import start_ring_store
+from rules import start_rules
+from alert_dispatch import start_alert_dispatch
+from migrations import run_migrations
 
 # Start Flask server
 def start_flask():
@@ -27,6 +33,12 @@ def settings_monitor():
 
 # Start all background jobs
 def run_data_collector():
+    sampler = start_sampler()  # Single CPU/memory sampler shared by the API and all jobs
+    start_rollups(sampler)  # Minute/hour/day rollups maintained from the same samples
+    start_ring_store(sampler)  # Every sample, memory-mapped, for recent history
+    rule_engine = start_rules(sampler)  # Threshold/anomaly alerts evaluated on each sample and process scan
+    start_alert_dispatch(rule_engine)  # Alerts and status reports emailed from one queue, digested and rate limited
+
     monitoring_thread = threading.Thread(target=start_monitoring, name="System_Monitor_Thread", daemon=True)
     monitoring_thread.start()
 
@@ -57,6 +69,12 @@ def create_window():
     webview.start()  # Must run on main thread
 
 if __name__ == '__main__':
+    # Bring the schema up to date once, before anything reads or writes
+    try:
+        run_migrations()
+    except Exception as e:
+        print(f"[Error] Database migrations failed: {e}")
+
     # Start Flask in background
     flask_thread = threading.Thread(target=start_flask, daemon=True)
     flask_thread.start()
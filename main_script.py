@@ -1,40 +1,35 @@
 import psutil
-import win32gui
-import win32process
-import mysql.connector
 import time 
 import datetime
 import os
 import json
 import getpass
-import ctypes
 import threading 
+import atexit
 import schedule
-from contextlib import contextmanager
-from Google_API import create_service
-from gmail_api import init_gmail_service,send_email
+from alert_dispatch import alert_dispatcher
+from report_builder import build_report, report_attachment, report_text
+from sampler import start_sampler
+from rollups import WindowAggregator
+from config import SYSTEM_LOG_WINDOW, WRITE_STATUS_JSON
+from storage import get_db_cursor
+from db_writer import db_writer, TABLE_COLUMNS
+from migrations import ensure_partitions
+from retention import run_retention
+from settings_cache import settings_cache
+from process_snapshot import process_engine
+from process_dimensions import process_dimensions
+from top_processes import top_processes
+from platform_backend import platform_backend, visible_active_apps
+from enforcement import blacklist_enforcer
+from event_bus import event_bus
 import logging
-from queue import Queue
+import uuid
+from collections import OrderedDict
+from queue import Queue, Empty
 logging.basicConfig(filename='monitor.log', level=logging.INFO, format='%(asctime)s - %(message)s')
 
 last_cleanup_time=None
-def connect_db():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="password",
-        database="process_db"
-    )
-@contextmanager
-def get_db_cursor(dictionary=False):
-    conn = connect_db()
-    try:
-        cursor = conn.cursor(dictionary=dictionary)
-        yield cursor
-        conn.commit()
-    finally:
-        cursor.close()
-        conn.close()
 
 def display_usage(cpu_usage,mem_usage,bars=50):
     
@@ -48,226 +43,137 @@ def display_usage(cpu_usage,mem_usage,bars=50):
     print(f"\r CPU Usage: | |{cpu_bar}| {cpu_usage:.2f}%" ,end=" ")
     print(f" Memory Usage: | |{mem_bar}| {mem_usage:.2f}%" ,end="\r")
 
-def log_system_stats(cpu_usage, mem_usage):
+def log_system_stats(window):
     try:
-        timestamp = datetime.datetime.now()
-        with get_db_cursor() as cursor:
-
-
-            query = "INSERT INTO system_logs (cpu_percent, memory_percent, timestamp) VALUES (%s, %s, %s)"
-            cursor.execute(query, (cpu_usage, mem_usage, timestamp))
+        # Queued for the background writer so a slow MySQL doesn't stall sampling
+        db_writer.submit('system_logs', [tuple(window[column] for column in TABLE_COLUMNS['system_logs'])])
 
-            print(f" [Logged] CPU: {cpu_usage:.2f}%, Memory: {mem_usage:.2f}%")
+        print(f" [Logged] CPU: {window['cpu_percent']:.2f}% (max {window['cpu_max']:.1f}%), "
+              f"Memory: {window['memory_percent']:.2f}%")
     except Exception as e:
         print(f"[Error Logging System Stats] {e}")
         
-def monitor_and_log_system_usage():
-    cpu_usage = psutil.cpu_percent(interval=1)
-    mem_usage = psutil.virtual_memory().percent
+def monitor_and_log_system_usage(window):
+    # Called once per SYSTEM_LOG_WINDOW with the aggregate of every sample taken in it
+    cpu_usage = window['cpu_percent']
+    mem_usage = window['memory_percent']
 
     display_usage(cpu_usage, mem_usage)       
-    log_system_stats(cpu_usage, mem_usage) 
-    generate_system_status_json(cpu_usage,mem_usage)
+    log_system_stats(window) 
+    if WRITE_STATUS_JSON:
+        generate_system_status_json(cpu_usage,mem_usage)
     
 
 
 def generate_system_status_json(cpu,memory):
-    with get_db_cursor() as cursor:
-
-        cursor.execute("SELECT cpu_threshold, memory_threshold FROM monitor_settings WHERE id = 1")
-        row = cursor.fetchone()
-        cpu_thresh, mem_thresh = row if row else (80, 75)
-
-        # Get current stats
-        cpu_percent = cpu
-        memory_percent = memory
-
-        # Prepare data
-        export_data = {
-            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "cpu_status": f"High CPU: {cpu:.1f}% (limit {cpu_thresh}%)" if cpu > cpu_thresh else f"Normal CPU: {cpu:.1f}%",
-            "memory_status": f"High Memory: {memory:.1f}% (limit {mem_thresh}%)" if memory > mem_thresh else f"Normal Memory: {memory:.1f}%",
-            "cpu_percent": cpu_percent,
-            "memory_percent": memory_percent
-        }
-
-        # Save JSON
-        os.makedirs("export", exist_ok=True)
-        file_path = os.path.join("export", "system_status.json")
-        with open(file_path, "w") as f:
-            json.dump(export_data, f, indent=4)
+    # Thresholds come from the in-process settings cache, no DB round trip
+    settings = settings_cache.get().settings
+    cpu_thresh, mem_thresh = settings['cpu_threshold'], settings['memory_threshold']
+
+    # Get current stats
+    cpu_percent = cpu
+    memory_percent = memory
+
+    # Prepare data
+    export_data = {
+        "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "cpu_status": f"High CPU: {cpu:.1f}% (limit {cpu_thresh}%)" if cpu > cpu_thresh else f"Normal CPU: {cpu:.1f}%",
+        "memory_status": f"High Memory: {memory:.1f}% (limit {mem_thresh}%)" if memory > mem_thresh else f"Normal Memory: {memory:.1f}%",
+        "cpu_percent": cpu_percent,
+        "memory_percent": memory_percent
+    }
+
+    # Save JSON
+    os.makedirs("export", exist_ok=True)
+    file_path = os.path.join("export", "system_status.json")
+    with open(file_path, "w") as f:
+        json.dump(export_data, f, indent=4)
 
-        
     return file_path
 
 
 
 def get_visible_active_apps():
-    visible_apps = []
-    current_user = getpass.getuser()
-
-    def callback(hwnd, process_pids):
-        if win32gui.IsWindowVisible(hwnd): # Check if window is visible
-            placement = win32gui.GetWindowPlacement(hwnd) 
-            if placement[1] == 2:  # Check if window is minimized
-                return
-            _, found_pid = win32process.GetWindowThreadProcessId(hwnd)
-            if found_pid in process_pids:
-                process_pids[found_pid] = True # Mark process as having an active visible window
-    # Get all running processes
-    process_pids = {proc.info['pid']: False for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent','username'])}
-   
-    # Enumerate through all windows and mark visible, non-minimized ones
-    win32gui.EnumWindows(callback, process_pids)
-    # Get the PID of the foreground window (the one in focus)
-    foreground_hwnd = win32gui.GetForegroundWindow()
-    _, foreground_pid = win32process.GetWindowThreadProcessId(foreground_hwnd)
-
-    # Filter out only those with an active, visible window that are not minimized or in the background
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent','username']):
-        if process_pids.get(proc.info['pid'], False):
-            if proc.info['pid'] != foreground_pid:
-                visible_apps.append(proc.info)
-
-    return visible_apps
+    # Window enumeration and the process scan are platform specific (see platform_backend.py)
+    return visible_active_apps()
 
 def log_processes_to_db():
     global last_cleanup_time
     print("Logging processes to the database...")
     try:
-    
-        with get_db_cursor() as cursor:
-    
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS process_logs(
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                timestamp DATETIME,
-                pid INT,
-                process_name VARCHAR(225),
-                cpu_usage FLOAT,
-                memory_usage FLOAT,
-                username VARCHAR(225))"""
-            )
-
-            # Display Running Active GUI Applications
-            running_apps = get_visible_active_apps()
+        # Display Running Active GUI Applications
+        running_apps = get_visible_active_apps()
 
 
 
-            if running_apps:
-                insert_query="""INSERT INTO process_logs(timestamp,pid,process_name,cpu_usage,memory_usage,username)VALUES(NOW(),%s,%s,%s,%s,%s)"""
-                process_data=[(app['pid'],app['name'],app['cpu_percent'],app['memory_percent'],app['username'])for app in running_apps]
-                if process_data:
-                    cursor.executemany(insert_query,process_data)
-                    
-                    print(f"Inserted {len(process_data)} rows.\n")
-                else:
-                    print("No running applications to log.")
+        if running_apps:
+            # Busiest processes over the last 5 minutes / hour / day, kept in memory for the API
+            top_processes.add_snapshot(running_apps)
+            timestamp = datetime.datetime.now()
+            # Rows only carry the process id; names and users are interned once (cached ids, no lookup)
+            process_ids = process_dimensions.process_ids(running_apps)
+            process_data=[(timestamp,process_id,app['cpu_percent'],app['memory_percent'])
+                          for app, process_id in zip(running_apps, process_ids) if process_id is not None]
+            if process_data:
+                db_writer.submit('process_logs', process_data)
                 
+                print(f"Queued {len(process_data)} rows.\n")
+            else:
+                print("No running applications to log.")
+            
 
-                print(f"\n{'PID':<10} {'Name':<30} {'CPU (%)':<10} {'Memory (%)':<10} {'Username' : <30}")
-                print("=" * 65)
-                if running_apps:
-                    for app in running_apps:
-                        print(f"{app['pid']:<10} {app['name']:<30} {app['cpu_percent']:<10.2f} {app['memory_percent']:<10.2f} {app['username']:<30}")
-                else:
-                    print("No visible applications are currently running.")
+            print(f"\n{'PID':<10} {'Name':<30} {'CPU (%)':<10} {'Memory (%)':<10} {'Username' : <30}")
+            print("=" * 65)
+            if running_apps:
+                for app in running_apps:
+                    print(f"{app['pid']:<10} {app['name']:<30} {app['cpu_percent']:<10.2f} {app['memory_percent']:<10.2f} {app['username']:<30}")
+            else:
+                print("No visible applications are currently running.")
     except Exception as e:
             print(f"Error in logging processes to database. {e}")
 
-def clean_old_process_logs():
-    """Deletes process logs older than 7 days."""
+def maintain_partitions():
+    """Creates the next days' partitions for the log tables."""
     try:
-        with get_db_cursor() as cursor:
-
-        # Delete logs older than 7 days
-            delete_query = "DELETE FROM process_logs WHERE timestamp < NOW() - INTERVAL 7 DAY"
-            cursor.execute(delete_query)
-            print("\n Old process logs deleted (cleanup every 7 days).")
-
+        ensure_partitions()
     except Exception as e:
-        print(f"Error in cleaning up old logs: {e}")
+        print(f"Error creating log partitions: {e}")
 
 
         
 def send_email_to_user():
-    settings_path = os.path.join(os.path.expanduser("~"), "Downloads", "process_monitor_export.json")
-
-    if not os.path.exists(settings_path):
-        print("Settings file not found. Skipping email.")
-        return
-
-    with open(settings_path, 'r') as f:
-        settings = json.load(f)
-
-    # Check if enableNotifications is true (can be a boolean or string based on how it's saved)
-    is_enabled = settings.get("settings", {}).get("enableNotifications", False)
-    if not is_enabled or str(is_enabled).lower() != "true":
+    # Sent from the dispatcher thread; switched on by email notifications on the settings page
+    if not alert_dispatcher.enabled():
         print("Email notifications disabled. Skipping email.")
         return
+    print("\nQueueing status email..\n")
+    try:
+        # The whole period, summarised by the database and gzipped in memory; nothing is written to disk
+        report = build_report()
+        alert_dispatcher.send(
+            "System Status Report",
+            report_text(report),
+            attachments=[report_attachment(report)]
+        )
+    except Exception as e:
+        print(f"Error in sending email: {e}")
+
 
-    else:
-        print("\nSending Email..\n")
-        try:
-        
-            client_file = "client_secret.json"
-            service = init_gmail_service(client_file)
-            to_address = "reciever's email"
-            email_subject = "System Status Report"
-            email_body="Please find the attached system status report in JSON format."
-            cpu_usage = psutil.cpu_percent(interval=1)
-            mem_usage = psutil.virtual_memory().percent
-            json_file_path = generate_system_status_json(cpu_usage,mem_usage)
-
-            response_email_sent=send_email(
-                service,
-                to_address,
-                email_subject,
-                email_body,
-                body_type='plain',
-                attachment_paths=[json_file_path]
-            )
-            print(response_email_sent)
-        except Exception as e:
-            print(f"Error in sending email: {e}")
-
-
-def create_table():
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS idle_time_logs (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                timestamp DATETIME NOT NULL,
-                idle_seconds INT NOT NULL
-            )
-        """)
 # Insert idle time into database
 def log_idle_time(idle_seconds):
-    with get_db_cursor() as cursor:
-        query = "INSERT INTO idle_time_logs (timestamp, idle_seconds) VALUES (%s, %s)"
-        values = (datetime.datetime.now(), idle_seconds)
-        cursor.execute(query, values)
-
-# Idle Time Tracking Class
-class LASTINPUTINFO(ctypes.Structure):
-    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+    now = datetime.datetime.now()
+    db_writer.submit('idle_time_logs', [(now, idle_seconds)])
+    # Pushed to open dashboards instead of them polling idle_time_logs
+    event_bus.publish('idle', {'latest_idle_min': round(idle_seconds / 60, 1), 'idle_seconds': idle_seconds,
+                               'timestamp': now.strftime('%Y-%m-%d %H:%M:%S')})
 
 def get_idle_time():
     """Returns the idle time in seconds."""
-    lii = LASTINPUTINFO()
-    lii.cbSize = ctypes.sizeof(LASTINPUTINFO)
-
-    if ctypes.windll.user32.GetLastInputInfo(ctypes.byref(lii)):
-        millis_since_last_input = ctypes.windll.kernel32.GetTickCount() - lii.dwTime
-       # print(f"Millis since last input: {millis_since_last_input}")
-        return millis_since_last_input / 1000  # Convert to seconds
-    else:
-        return 0
+    return platform_backend.idle_seconds()
 
 # Function to track idle time in a separate thread
 def track_idle_time():
     idle_threshold = 300  # 5 minutes
-    create_table()  # Ensure table exists
 
     was_idle = False
     idle_start_time = None  # Store the time when idle started
@@ -312,7 +218,7 @@ def kill_process(name):
             if process_name.lower() == name.lower() and current_user in process_user:
                 try:
                     
-                    proc= psutil.Process(process_pid)
+                    proc= process_engine.get_process(process_pid)
                     print(f"[DEBUG] Checking process: {app}")
                     proc.terminate()
                     time.sleep(0.5)
@@ -345,7 +251,7 @@ def restart_process(name):
             if process_name.lower() == name.lower() and current_user in process_user:
                 process_found=True
                 try:
-                    proc= psutil.Process(process_pid)
+                    proc= process_engine.get_process(process_pid)
                     #xe_path = process.info['exe']  # Get executable path
                     
                     #f not exe_path:  
@@ -367,130 +273,146 @@ def restart_process(name):
     print(f"No process found with name: {name} owned by {current_user}")
 
 settings_queue = Queue()
+
+# update_id -> status of the most recent settings saves, so the UI can tell when they're applied
+_settings_update_status = OrderedDict()
+_settings_status_lock = threading.Lock()
+_SETTINGS_STATUS_KEEP = 200
+
+
+def _blacklist_lines(raw):
+    #: support both list and string
+    if isinstance(raw, list):
+        return [line.strip() for line in raw if line and line.strip()]
+    elif isinstance(raw, str):
+        return [line.strip() for line in raw.splitlines() if line.strip()]
+    return []
+
+
+def _apply_settings(cursor, setting_type, data):
+    if setting_type == "general":
+        cursor.execute("""
+            UPDATE monitor_settings SET theme=%s, refresh_interval=%s, email_notify=%s WHERE id=1
+        """, (data['theme'], data['refresh_interval'], data['email_notify']))
+
+    elif setting_type == "process":
+        cursor.execute("""
+            UPDATE monitor_settings SET cpu_threshold=%s, memory_threshold=%s WHERE id=1
+        """, (data['cpu_threshold'], data['memory_threshold']))
+        # Rewrite the whole blacklist in one statement
+        cursor.execute("DELETE FROM blacklisted_processes")
+        lines = _blacklist_lines(data.get('process_blacklist') or '')
+        if lines:
+            cursor.executemany(
+                "INSERT INTO blacklisted_processes (process_name) VALUES (%s)",
+                [(proc_name,) for proc_name in lines])
+
+    elif setting_type == "data":
+        cursor.execute("""
+            UPDATE monitor_settings SET auto_cleanup_days=%s WHERE id=1
+        """, (data['auto_cleanup_days'],))
+
+
+def _set_update_status(update_ids, status, error=None):
+    with _settings_status_lock:
+        for update_id in update_ids:
+            entry = _settings_update_status.get(update_id)
+            if entry is None:
+                continue
+            entry['status'] = status
+            entry['error'] = error
+            entry['finished_at'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            entry['event'].set()
+
+
 def handle_settings_updates():
+    """Blocks until updates arrive, then applies everything pending in one transaction."""
     while True:
-        if not settings_queue.empty():
-            print("[⚡DEBUG] processing settings update…")
-            update = settings_queue.get()
-            setting_type = update.get("type")
-            data = update.get("data")
-            
+        batch = [settings_queue.get()]
+        while True:
+            try:
+                batch.append(settings_queue.get_nowait())
+            except Empty:
+                break
+
+        # Coalesce: only the last update per section is written (the blacklist is part of "process")
+        latest = {}
+        for update in batch:
+            if update.get("type") in ("general", "process", "data"):
+                latest[update["type"]] = update.get("data")
+        update_ids = [update.get("id") for update in batch]
+        print(f"[Settings] Applying {len(batch)} update(s) as {len(latest)} section write(s)")
+
+        try:
             with get_db_cursor() as cursor:
-            
-                if setting_type == "general":
-                    cursor.execute("""
-                        UPDATE monitor_settings SET theme=%s, refresh_interval=%s, email_notify=%s WHERE id=1
-                    """, (data['theme'], data['refresh_interval'], data['email_notify']))
-
-                elif setting_type == "process":
-                    cursor.execute("""
-                        UPDATE monitor_settings SET cpu_threshold=%s, memory_threshold=%s WHERE id=1
-                    """, (data['cpu_threshold'], data['memory_threshold']))
-                    try:
-                        cursor.execute("DELETE FROM blacklisted_processes")
-                        raw = data.get('process_blacklist') or ''
+                for setting_type, data in latest.items():
+                    _apply_settings(cursor, setting_type, data)
+        except Exception as err:
+            print(f"Error applying settings: {err}")
+            _set_update_status(update_ids, 'failed', str(err))
+            continue
 
-    #: support both list and string
-                        if isinstance(raw, list):
-                            lines = [line.strip() for line in raw if line.strip()]
-                        elif isinstance(raw, str):
-                            lines = [line.strip() for line in raw.splitlines() if line.strip()]
-                        else:
-                            lines = []
-
-                        for proc_name in lines:
-                            cursor.execute(
-                            "INSERT INTO blacklisted_processes (process_name) VALUES (%s)",
-                            (proc_name,)
-                                )
-                    except mysql.connector.Error as err:
-                            print(f"Error: {err}")
-
-                elif setting_type == "data":
-                    cursor.execute("""
-                        UPDATE monitor_settings SET auto_cleanup_days=%s WHERE id=1
-                    """, (data['auto_cleanup_days'],))
+        # Committed - let every reader pick up the new values
+        settings_cache.bump()
+        _set_update_status(update_ids, 'applied')
 
 def enqueue_settings_update(section_type, data_dict):
     """
     section_type: 'general', 'process', or 'data'
     data_dict: only the fields for that section
+    Returns an update id for get_settings_update_status().
     """
+    update_id = uuid.uuid4().hex
+    with _settings_status_lock:
+        _settings_update_status[update_id] = {
+            'id': update_id,
+            'section': section_type,
+            'status': 'pending',
+            'error': None,
+            'finished_at': None,
+            'event': threading.Event(),
+        }
+        while len(_settings_update_status) > _SETTINGS_STATUS_KEEP:
+            _settings_update_status.popitem(last=False)
     settings_queue.put({
+        'id': update_id,
         'type': section_type,
         'data': data_dict
     })
+    return update_id
+
+def get_settings_update_status(update_id, wait=0):
+    """Status of an enqueued update ('pending', 'applied' or 'failed'); optionally waits up to `wait` seconds."""
+    with _settings_status_lock:
+        entry = _settings_update_status.get(update_id)
+    if entry is None:
+        return None
+    if wait and entry['status'] == 'pending':
+        entry['event'].wait(wait)
+    return {key: value for key, value in entry.items() if key != 'event'}
 
 def fetch_blacklist():
     """Return a set of lower-cased process names to kill."""
-
-    with get_db_cursor() as cursor:
-        cursor.execute("SELECT process_name FROM blacklisted_processes")
-        rows = cursor.fetchall()
-
-    return {row[0].lower() for row in rows}
+    # Precomputed frozenset from the settings cache
+    return settings_cache.get().blacklist
 
 
 def enforce_blacklist():
-    """Kill any visible app whose name is in the blacklist."""
-    blacklist = fetch_blacklist()
-    if not blacklist:
-        return
+    """Kill every running process whose name is in the blacklist."""
+    blacklist_enforcer.full_check()
 
-    for app in get_visible_active_apps(blacklist):
-        name = app['name'].lower()
-        if name in blacklist:
-            # Reuse your existing kill_process() logic
-            kill_process(app['name'])
-           
 
 def monitor_system():
-    while True:
-        enforce_blacklist()
-
-        try:
-            with get_db_cursor() as cursor:
-                cursor.execute(
-                    "SELECT cpu_threshold, memory_threshold, refresh_interval "
-                    "FROM monitor_settings WHERE id = 1"
-                )
-                row = cursor.fetchone()
-        except Exception as e:
-            print(f"❌ DB error: {e}. Retrying in 5s…")
-            time.sleep(5)
-            continue
-
-        if row:
-            cpu_thresh, mem_thresh, refresh_interval = row
-        else:
-            cpu_thresh, mem_thresh, refresh_interval = 80, 75, 30
-            print("⚠️ No settings found—using defaults (80%, 75%, 30s)")
-
-        time.sleep(refresh_interval/ 1000.0)
+    # Event-driven: only newly spawned processes are matched against the blacklist
+    blacklist_enforcer.run()
 
 def get_monitor_settings():
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("""
-                SELECT cpu_threshold, memory_threshold, refresh_interval, theme, email_notify, id, username, auto_cleanup_days 
-                FROM monitor_settings 
-                WHERE id=1
-            """)
-            result = cursor.fetchone()
-
-            if result:
-                return {
-                    'cpu_threshold': result[0],
-                    'memory_threshold': result[1],
-                    'refresh_interval': result[2],
-                    'theme': result[3],
-                    'email_notify': bool(result[4]),
-                    'id': result[5],
-                    'username': result[6],
-                    'auto_cleanup_days': result[7]
-                }
-            else:
-                return {'error': 'Settings not found'}
+        snapshot = settings_cache.get()
+        if snapshot.found:
+            return dict(snapshot.settings)
+        else:
+            return {'error': 'Settings not found'}
 
     except Exception as e:
         return {'error': str(e)}
@@ -499,10 +421,17 @@ def get_monitor_settings():
 
 
 
+system_window = WindowAggregator(SYSTEM_LOG_WINDOW, monitor_and_log_system_usage)
+# Registered after db_writer's handler, so it runs first and the writer flushes the last window
+atexit.register(system_window.close)
+
+
 def start_monitoring():
     schedule.every(15).seconds.do(log_processes_to_db)  
-    schedule.every(1).days.do(clean_old_process_logs)  # Adjust this as needed
-    schedule.every(30).seconds.do(monitor_and_log_system_usage)
+    schedule.every(1).days.do(run_retention)  # Honors auto_cleanup_days from the settings page
+    schedule.every(6).hours.do(maintain_partitions)
+    # Every sample is folded into the current window; one system_logs row per window
+    start_sampler().add_listener(system_window.add_sample)
     
     logging.info("Monitoring started...")
 
@@ -513,7 +442,9 @@ def start_monitoring():
 
 
 if __name__ == "__main__":
+    alert_dispatcher.start()
     send_email_to_user()
+    alert_dispatcher.join()
     schedule.run_pending()
     time.sleep(1)
 
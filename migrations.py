@@ -0,0 +1,395 @@
+import datetime
+
+from storage import get_db_cursor, storage
+
+# Log tables partitioned by day; retention drops whole partitions
+PARTITIONED_TABLES = ('system_logs', 'process_logs', 'idle_time_logs')
+# Daily partitions created ahead of time so inserts never land in p_future
+PARTITION_DAYS_AHEAD = 3
+
+# MySQL errors that just mean "already done": table/column/key exists, key doesn't exist
+_ALREADY_APPLIED = {1050, 1060, 1061, 1091}
+
+
+def _initial_tables():
+    return [
+        """CREATE TABLE IF NOT EXISTS system_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            cpu_percent FLOAT,
+            memory_percent FLOAT,
+            timestamp DATETIME)""",
+        """CREATE TABLE IF NOT EXISTS process_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timestamp DATETIME,
+            pid INT,
+            process_name VARCHAR(225),
+            cpu_usage FLOAT,
+            memory_usage FLOAT,
+            username VARCHAR(225))""",
+        """CREATE TABLE IF NOT EXISTS idle_time_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timestamp DATETIME NOT NULL,
+            idle_seconds INT NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS monitor_settings (
+            id INT PRIMARY KEY,
+            cpu_threshold INT DEFAULT 80,
+            memory_threshold INT DEFAULT 75,
+            refresh_interval INT DEFAULT 2000,
+            theme VARCHAR(20) DEFAULT 'light',
+            email_notify BOOLEAN DEFAULT FALSE,
+            username VARCHAR(225),
+            auto_cleanup_days INT DEFAULT 30)""",
+        "INSERT IGNORE INTO monitor_settings (id) VALUES (1)",
+        """CREATE TABLE IF NOT EXISTS blacklisted_processes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            process_name VARCHAR(225) NOT NULL)""",
+    ]
+
+
+def _rollup_tables():
+    from rollups import ROLLUP_TABLES
+    return [f"""CREATE TABLE IF NOT EXISTS {table} (
+                bucket_start DATETIME NOT NULL PRIMARY KEY,
+                samples INT NOT NULL,
+                cpu_avg FLOAT, cpu_min FLOAT, cpu_max FLOAT, cpu_p95 FLOAT,
+                memory_avg FLOAT, memory_min FLOAT, memory_max FLOAT, memory_p95 FLOAT)"""
+            for table, _ in ROLLUP_TABLES.values()]
+
+
+def _timestamp_indexes():
+    return [f"CREATE INDEX idx_{table}_timestamp ON {table} (timestamp)" for table in PARTITIONED_TABLES]
+
+
+def _day_partitions():
+    # The partition key has to be part of every unique key, so the primary key becomes (id, timestamp).
+    # Existing rows go into p_start; daily partitions are added by ensure_partitions().
+    today = datetime.date.today().isoformat()
+    statements = []
+    for table in PARTITIONED_TABLES:
+        statements += [
+            f"DELETE FROM {table} WHERE timestamp IS NULL",
+            f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)",
+            f"""ALTER TABLE {table} PARTITION BY RANGE (TO_DAYS(timestamp)) (
+                PARTITION p_start VALUES LESS THAN (TO_DAYS('{today}')),
+                PARTITION p_future VALUES LESS THAN MAXVALUE)""",
+        ]
+    return statements
+
+
+# Aggregates of all the samples in each system_logs window (see rollups.WindowAggregator)
+_SYSTEM_WINDOW_COLUMNS = (('samples', 'INT'), ('cpu_min', 'FLOAT'), ('cpu_max', 'FLOAT'), ('cpu_p95', 'FLOAT'),
+                          ('memory_min', 'FLOAT'), ('memory_max', 'FLOAT'), ('memory_p95', 'FLOAT'),
+                          ('core_max', 'FLOAT'))
+
+
+def _system_window_columns():
+    return ["ALTER TABLE system_logs " + ", ".join(
+        f"ADD COLUMN {name} {sql_type}" for name, sql_type in _SYSTEM_WINDOW_COLUMNS)]
+
+
+def _process_backfill(ignore, text, same):
+    """Moves process_logs_v1 rows into the dimension tables and the compact process_logs.
+
+    `ignore` is the dialect's INSERT-ignoring keyword, `text(column)` makes string
+    comparisons exact, `same(a, b)` is a NULL-safe equality. Old rows have no
+    create_time, so each (pid, name, user) gets its first sighting instead.
+    """
+    name, username = text('l.process_name'), text('l.username')
+    return [
+        f"INSERT {ignore} INTO process_names (name) "
+        f"SELECT DISTINCT {name} FROM process_logs_v1 l WHERE l.process_name IS NOT NULL",
+        f"INSERT {ignore} INTO process_users (username) "
+        f"SELECT DISTINCT {username} FROM process_logs_v1 l WHERE l.username IS NOT NULL",
+        f"""INSERT {ignore} INTO processes (pid, create_time, name_id, user_id)
+            SELECT l.pid, ROUND({storage.epoch_sql('MIN(l.timestamp)')}, 3), n.id, u.id
+            FROM process_logs_v1 l
+            JOIN process_names n ON n.name = {name}
+            LEFT JOIN process_users u ON u.username = {username}
+            WHERE l.pid IS NOT NULL AND l.timestamp IS NOT NULL
+            GROUP BY l.pid, n.id, u.id""",
+        f"""INSERT INTO process_logs (timestamp, process_id, cpu_usage, memory_usage)
+            SELECT l.timestamp, p.id, l.cpu_usage, l.memory_usage
+            FROM process_logs_v1 l
+            JOIN process_names n ON n.name = {name}
+            LEFT JOIN process_users u ON u.username = {username}
+            JOIN processes p ON p.pid = l.pid AND p.name_id = n.id AND {same('p.user_id', 'u.id')}
+            WHERE l.timestamp IS NOT NULL""",
+        "DROP TABLE process_logs_v1",
+    ]
+
+
+_PROCESS_LOG_VIEW_SELECT = """
+    SELECT l.id, l.timestamp, p.pid, n.name AS process_name, l.cpu_usage, l.memory_usage, u.username,
+           l.process_id, p.create_time
+    FROM process_logs l
+    JOIN processes p ON p.id = l.process_id
+    JOIN process_names n ON n.id = p.name_id
+    LEFT JOIN process_users u ON u.id = p.user_id"""
+
+
+def _process_dimensions():
+    # Names are compared case- and space-exactly (utf8mb4_bin), like the in-memory id cache does
+    today = datetime.date.today().isoformat()
+    return [
+        """CREATE TABLE IF NOT EXISTS process_names (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(225) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+            UNIQUE KEY uq_process_names_name (name))""",
+        """CREATE TABLE IF NOT EXISTS process_users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(225) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+            UNIQUE KEY uq_process_users_username (username))""",
+        """CREATE TABLE IF NOT EXISTS processes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            pid INT NOT NULL,
+            create_time DOUBLE NOT NULL,
+            name_id INT NOT NULL,
+            user_id INT,
+            UNIQUE KEY uq_processes_instance (pid, create_time),
+            KEY idx_processes_name (name_id))""",
+        "RENAME TABLE process_logs TO process_logs_v1",
+        f"""CREATE TABLE IF NOT EXISTS process_logs (
+            id INT AUTO_INCREMENT,
+            timestamp DATETIME NOT NULL,
+            process_id INT NOT NULL,
+            cpu_usage FLOAT,
+            memory_usage FLOAT,
+            PRIMARY KEY (id, timestamp),
+            KEY idx_process_logs_timestamp (timestamp),
+            KEY idx_process_logs_process (process_id, timestamp))
+          PARTITION BY RANGE (TO_DAYS(timestamp)) (
+            PARTITION p_start VALUES LESS THAN (TO_DAYS('{today}')),
+            PARTITION p_future VALUES LESS THAN MAXVALUE)""",
+    ] + _process_backfill('IGNORE', lambda column: f"CONVERT({column} USING utf8mb4) COLLATE utf8mb4_bin",
+                          lambda a, b: f"{a} <=> {b}") + [
+        f"CREATE OR REPLACE VIEW process_log_view AS {_PROCESS_LOG_VIEW_SELECT}",
+    ]
+
+
+# (version, description, function returning the SQL statements), applied in order
+MIGRATIONS = [
+    (1, 'Create base tables', _initial_tables),
+    (2, 'Create rollup tables', _rollup_tables),
+    (3, 'Index log tables on timestamp', _timestamp_indexes),
+    (4, 'Partition log tables by day', _day_partitions),
+    (5, 'Store window min/max/p95 in system_logs', _system_window_columns),
+    (6, 'Intern process names and users into dimension tables', _process_dimensions),
+]
+
+
+# The embedded SQLite schema; no partitions, retention deletes in batches instead
+
+def _sqlite_initial_tables():
+    return [
+        """CREATE TABLE IF NOT EXISTS system_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cpu_percent REAL,
+            memory_percent REAL,
+            timestamp DATETIME)""",
+        """CREATE TABLE IF NOT EXISTS process_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME,
+            pid INTEGER,
+            process_name TEXT,
+            cpu_usage REAL,
+            memory_usage REAL,
+            username TEXT)""",
+        """CREATE TABLE IF NOT EXISTS idle_time_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME NOT NULL,
+            idle_seconds INTEGER NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS monitor_settings (
+            id INTEGER PRIMARY KEY,
+            cpu_threshold INTEGER DEFAULT 80,
+            memory_threshold INTEGER DEFAULT 75,
+            refresh_interval INTEGER DEFAULT 2000,
+            theme TEXT DEFAULT 'light',
+            email_notify BOOLEAN DEFAULT 0,
+            username TEXT,
+            auto_cleanup_days INTEGER DEFAULT 30)""",
+        "INSERT OR IGNORE INTO monitor_settings (id) VALUES (1)",
+        """CREATE TABLE IF NOT EXISTS blacklisted_processes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            process_name TEXT NOT NULL)""",
+    ]
+
+
+def _sqlite_timestamp_indexes():
+    return [f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table} (timestamp)"
+            for table in PARTITIONED_TABLES]
+
+
+def _sqlite_system_window_columns():
+    # SQLite adds one column per ALTER TABLE
+    return [f"ALTER TABLE system_logs ADD COLUMN {name} {sql_type}" for name, sql_type in _SYSTEM_WINDOW_COLUMNS]
+
+
+def _sqlite_process_dimensions():
+    return [
+        """CREATE TABLE IF NOT EXISTS process_names (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE)""",
+        """CREATE TABLE IF NOT EXISTS process_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE)""",
+        """CREATE TABLE IF NOT EXISTS processes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pid INTEGER NOT NULL,
+            create_time REAL NOT NULL,
+            name_id INTEGER NOT NULL,
+            user_id INTEGER,
+            UNIQUE (pid, create_time))""",
+        "CREATE INDEX IF NOT EXISTS idx_processes_name ON processes (name_id)",
+        "ALTER TABLE process_logs RENAME TO process_logs_v1",
+        """CREATE TABLE process_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME NOT NULL,
+            process_id INTEGER NOT NULL,
+            cpu_usage REAL,
+            memory_usage REAL)""",
+    ] + _process_backfill('OR IGNORE', lambda column: column, lambda a, b: f"{a} IS {b}") + [
+        # The old timestamp index went with process_logs_v1
+        "CREATE INDEX IF NOT EXISTS idx_process_logs_timestamp ON process_logs (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_process_logs_process ON process_logs (process_id, timestamp)",
+        f"CREATE VIEW IF NOT EXISTS process_log_view AS {_PROCESS_LOG_VIEW_SELECT}",
+    ]
+
+
+SQLITE_MIGRATIONS = [
+    (1, 'Create base tables', _sqlite_initial_tables),
+    (2, 'Create rollup tables', _rollup_tables),
+    (3, 'Index log tables on timestamp', _sqlite_timestamp_indexes),
+    (4, 'Store window min/max/p95 in system_logs', _sqlite_system_window_columns),
+    (5, 'Intern process names and users into dimension tables', _sqlite_process_dimensions),
+]
+
+
+def _execute(cursor, statement):
+    from mysql.connector import errors
+    try:
+        cursor.execute(statement)
+    except errors.Error as e:
+        if e.errno not in _ALREADY_APPLIED:
+            raise
+
+
+def _run_sqlite_migrations():
+    applied_now = []
+    with get_db_cursor() as cursor:
+        # Takes the write lock up front so concurrent starters apply each version once
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at DATETIME NOT NULL)""")
+        cursor.execute("SELECT version FROM schema_migrations")
+        done = {row[0] for row in cursor.fetchall()}
+        for version, description, statements in SQLITE_MIGRATIONS:
+            if version in done:
+                continue
+            print(f"[Migrations] Applying {version}: {description}")
+            for statement in statements():
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)",
+                (version, description, datetime.datetime.now()))
+            applied_now.append(version)
+    return applied_now
+
+
+def run_migrations():
+    """Applies pending schema migrations once at startup. Returns the versions applied."""
+    if storage.name == 'sqlite':
+        return _run_sqlite_migrations()
+
+    applied_now = []
+    with get_db_cursor() as cursor:
+        # Serialise concurrent starters (e.g. several API workers)
+        cursor.execute("SELECT GET_LOCK('process_monitor_migrations', 60)")
+        locked = cursor.fetchone()[0]
+        if locked != 1:
+            # 0 is a timeout, NULL an error; migrating without the lock could race another starter
+            raise RuntimeError(f"Could not take the migrations lock (GET_LOCK returned {locked}); "
+                               f"another process may still be migrating")
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_at DATETIME NOT NULL)""")
+            cursor.execute("SELECT version FROM schema_migrations")
+            done = {row[0] for row in cursor.fetchall()}
+
+            for version, description, statements in MIGRATIONS:
+                if version in done:
+                    continue
+                print(f"[Migrations] Applying {version}: {description}")
+                for statement in statements():
+                    _execute(cursor, statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)",
+                    (version, description, datetime.datetime.now()))
+                applied_now.append(version)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('process_monitor_migrations')")
+            cursor.fetchone()
+
+    ensure_partitions()
+    return applied_now
+
+
+def _partitions(cursor, table):
+    """Returns [(name, upper bound in TO_DAYS or None for MAXVALUE)] for a partitioned table."""
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION""", (table,))
+    return [(name, None if bound == 'MAXVALUE' else int(bound)) for name, bound in cursor.fetchall()]
+
+
+def _to_days(day):
+    # MySQL TO_DAYS() counts from year 0; date.toordinal() counts from year 1
+    return day.toordinal() + 365
+
+
+def ensure_partitions(days_ahead=PARTITION_DAYS_AHEAD):
+    """Splits p_future so every day up to `days_ahead` days from now has its own partition."""
+    if storage.name != 'mysql':
+        return
+    today = datetime.date.today()
+    with get_db_cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            partitions = _partitions(cursor, table)
+            if not partitions:
+                continue  # Table isn't partitioned
+            highest = max((bound for _, bound in partitions if bound is not None), default=0)
+            new_days = [today + datetime.timedelta(days=offset) for offset in range(days_ahead + 1)
+                        if _to_days(today + datetime.timedelta(days=offset + 1)) > highest]
+            if not new_days:
+                continue
+            definitions = [
+                f"PARTITION p{day:%Y%m%d} VALUES LESS THAN (TO_DAYS('{day + datetime.timedelta(days=1)}'))"
+                for day in new_days
+            ]
+            definitions.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+            cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION p_future INTO ({', '.join(definitions)})")
+
+
+def drop_partitions_before(table, cutoff):
+    """Drops every partition that only holds rows older than `cutoff` (a datetime). Returns their names."""
+    cutoff_days = _to_days(cutoff.date())
+    with get_db_cursor() as cursor:
+        expired = [name for name, bound in _partitions(cursor, table)
+                   if bound is not None and bound <= cutoff_days]
+        if expired:
+            cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}")
+    return expired
+
+
+def is_partitioned(table):
+    if storage.name != 'mysql':
+        return False
+    with get_db_cursor() as cursor:
+        return bool(_partitions(cursor, table))
@@ -0,0 +1,255 @@
+import ctypes
+import getpass
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from process_snapshot import process_engine
+
+
+class PsutilBackend:
+    """Generic backend: psutil process scans, no window or idle information."""
+
+    name = 'psutil'
+
+    def scan_processes(self, max_age=1.0):
+        return process_engine.snapshot(max_age)
+
+    def visible_windows(self):
+        """Returns (set of pids with a visible window, foreground pid), or None if unknown."""
+        return None
+
+    def idle_seconds(self):
+        return 0
+
+
+# Idle Time Tracking Class
+class LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+
+class WindowsBackend(PsutilBackend):
+    name = 'windows'
+
+    def __init__(self):
+        import win32gui
+        import win32process
+        self._win32gui = win32gui
+        self._win32process = win32process
+
+    def visible_windows(self):
+        win32gui = self._win32gui
+        win32process = self._win32process
+        visible_pids = set()
+
+        def callback(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd): # Check if window is visible
+                placement = win32gui.GetWindowPlacement(hwnd)
+                if placement[1] == 2:  # Check if window is minimized
+                    return
+                _, found_pid = win32process.GetWindowThreadProcessId(hwnd)
+                visible_pids.add(found_pid) # Mark process as having an active visible window
+
+        # Enumerate through all windows and mark visible, non-minimized ones
+        win32gui.EnumWindows(callback, None)
+        # Get the PID of the foreground window (the one in focus)
+        foreground_hwnd = win32gui.GetForegroundWindow()
+        _, foreground_pid = win32process.GetWindowThreadProcessId(foreground_hwnd)
+        return visible_pids, foreground_pid
+
+    def idle_seconds(self):
+        lii = LASTINPUTINFO()
+        lii.cbSize = ctypes.sizeof(LASTINPUTINFO)
+
+        if ctypes.windll.user32.GetLastInputInfo(ctypes.byref(lii)):
+            millis_since_last_input = ctypes.windll.kernel32.GetTickCount() - lii.dwTime
+            return millis_since_last_input / 1000  # Convert to seconds
+        else:
+            return 0
+
+
+class ProcReader:
+    """Bulk /proc reader: one pass over stat, statm and status, no psutil object per process."""
+
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.boot_time = self._read_boot_time()
+        self._usernames = {}
+        # (pid, starttime) -> (cpu ticks, wall clock) from the previous scan
+        self._prev_cpu = {}
+
+    def _read_file(self, path):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            return os.read(fd, 4096)
+        finally:
+            os.close(fd)
+
+    def _read_boot_time(self):
+        with open(os.path.join(self.proc_root, 'stat'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime'):
+                    return float(line.split()[1])
+        return 0.0
+
+    def _read_mem_total(self):
+        with open(os.path.join(self.proc_root, 'meminfo'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'MemTotal:'):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def _username(self, uid):
+        name = self._usernames.get(uid)
+        if name is None:
+            import pwd
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self._usernames[uid] = name
+        return name
+
+    def _full_name(self, pid_dir, comm):
+        # comm is truncated to 15 characters; recover the full name from cmdline like psutil does
+        try:
+            cmdline = self._read_file(pid_dir + '/cmdline').split(b'\0')
+        except OSError:
+            return comm
+        exe = os.path.basename(cmdline[0].decode(errors='replace')) if cmdline and cmdline[0] else ''
+        return exe if exe.startswith(comm) else comm
+
+    def scan(self):
+        now = time.monotonic()
+        mem_total = self._read_mem_total()
+        clock_ticks = self.clock_ticks
+        prev_cpu = self._prev_cpu
+        cpu_state = {}
+        snapshot = []
+
+        for entry in os.listdir(self.proc_root):
+            if not entry.isdigit():
+                continue
+            pid_dir = self.proc_root + '/' + entry
+            try:
+                stat = self._read_file(pid_dir + '/stat')
+                statm = self._read_file(pid_dir + '/statm')
+                status = self._read_file(pid_dir + '/status')
+            except OSError:
+                continue  # Process exited mid-scan
+
+            # comm may contain spaces and parentheses, so split on the last ')'
+            lpar = stat.find(b'(')
+            rpar = stat.rfind(b')')
+            comm = stat[lpar + 1:rpar].decode(errors='replace')
+            fields = stat[rpar + 2:].split()
+            ticks = int(fields[11]) + int(fields[12])  # utime + stime
+            starttime = int(fields[19])
+
+            uid_at = status.find(b'\nUid:')
+            uid = int(status[uid_at + 5:].split(None, 1)[0]) if uid_at != -1 else None
+
+            pid = int(entry)
+            key = (pid, starttime)
+            prev = prev_cpu.get(key)
+            if prev and now > prev[1]:
+                cpu = (ticks - prev[0]) / clock_ticks / (now - prev[1]) * 100
+            else:
+                cpu = 0.0
+            cpu_state[key] = (ticks, now)
+
+            rss = int(statm.split()[1]) * self.page_size
+            snapshot.append({
+                'pid': pid,
+                'name': self._full_name(pid_dir, comm) if len(comm) >= 15 else comm,
+                'username': self._username(uid) if uid is not None else None,
+                'cpu_percent': cpu,
+                'memory_percent': rss / mem_total * 100 if mem_total else 0.0,
+                'create_time': self.boot_time + starttime / clock_ticks,
+            })
+
+        # Dead pids drop out because only this scan's keys are kept
+        self._prev_cpu = cpu_state
+        return snapshot
+
+
+class LinuxBackend(PsutilBackend):
+    name = 'linux'
+
+    def __init__(self, proc_root='/proc'):
+        self.reader = ProcReader(proc_root)
+        self._last_snapshot = []
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+        # Window information is only available under X11 with wmctrl installed
+        self._wmctrl = shutil.which('wmctrl') if os.environ.get('DISPLAY') else None
+        self._xdotool = shutil.which('xdotool') if os.environ.get('DISPLAY') else None
+        self._xprintidle = shutil.which('xprintidle') if os.environ.get('DISPLAY') else None
+
+    def scan_processes(self, max_age=1.0):
+        with self._lock:
+            if self._last_snapshot and time.monotonic() - self._last_scan < max_age:
+                return self._last_snapshot
+            self._last_snapshot = self.reader.scan()
+            self._last_scan = time.monotonic()
+            return self._last_snapshot
+
+    def _run(self, *args):
+        try:
+            return subprocess.run(args, capture_output=True, text=True, timeout=2).stdout
+        except (OSError, subprocess.SubprocessError):
+            return ''
+
+    def visible_windows(self):
+        if not self._wmctrl:
+            return None
+        visible_pids = set()
+        # wmctrl -lp: <window id> <desktop> <pid> <host> <title>
+        for line in self._run(self._wmctrl, '-lp').splitlines():
+            parts = line.split(None, 3)
+            if len(parts) >= 3 and parts[2].isdigit() and parts[1] != '-1':
+                visible_pids.add(int(parts[2]))
+        foreground_pid = None
+        if self._xdotool:
+            out = self._run(self._xdotool, 'getactivewindow', 'getwindowpid').strip()
+            foreground_pid = int(out) if out.isdigit() else None
+        return visible_pids, foreground_pid
+
+    def idle_seconds(self):
+        if not self._xprintidle:
+            return 0
+        out = self._run(self._xprintidle).strip()
+        return int(out) / 1000 if out.isdigit() else 0
+
+
+def _create_backend():
+    if sys.platform.startswith('win'):
+        return WindowsBackend()
+    if sys.platform.startswith('linux') and os.path.isdir('/proc'):
+        return LinuxBackend()
+    return PsutilBackend()
+
+
+platform_backend = _create_backend()
+
+
+def visible_active_apps():
+    """Processes with a visible, non-minimized window that aren't in the foreground.
+
+    Without window information (e.g. a headless Linux host) this degrades to all
+    processes owned by the current user.
+    """
+    processes = platform_backend.scan_processes()
+    windows = platform_backend.visible_windows()
+    if windows is None:
+        current_user = getpass.getuser()
+        return [dict(proc) for proc in processes if proc['username'] == current_user]
+
+    visible_pids, foreground_pid = windows
+    return [dict(proc) for proc in processes
+            if proc['pid'] in visible_pids and proc['pid'] != foreground_pid]
@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+
+from storage import get_db_cursor, storage
+
+# Process instances whose ids are kept in memory; the least recently logged are dropped first
+PROCESS_CACHE_SIZE = 20000
+
+# process_logs joined back to names and users, with the columns process_logs used to have
+# (created by migrations.py)
+PROCESS_LOG_VIEW = 'process_log_view'
+
+
+def _instance_key(pid, create_time):
+    # Rounded so the key survives the trip through a DOUBLE column unchanged
+    return pid, round(create_time or 0.0, 3)
+
+
+class ProcessDimensions:
+    """Interns process names, users and process instances as small integer ids.
+
+    A process instance is keyed by (pid, create_time), so a reused pid is a new
+    instance. process_logs rows only carry the instance id; each name and user is
+    stored once. Ids are cached in memory, so logging a process that was already
+    seen needs no database lookup.
+    """
+
+    def __init__(self, cache_size=PROCESS_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._names = {}
+        self._users = {}
+        # (pid, create_time) -> processes.id, least recently used first
+        self._instances = OrderedDict()
+
+    @staticmethod
+    def _intern(cursor, cache, table, column, values):
+        missing = sorted(value for value in values if value not in cache)
+        if not missing:
+            return
+        cursor.executemany(storage.insert_ignore_sql(table, (column,)), [(value,) for value in missing])
+        cursor.execute(f"SELECT id, {column} FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(missing))})",
+                       missing)
+        for row_id, value in cursor.fetchall():
+            cache[value] = row_id
+
+    def _create_instances(self, missing):
+        with get_db_cursor() as cursor:
+            self._intern(cursor, self._names, 'process_names', 'name',
+                         {proc['name'] for proc in missing.values()})
+            self._intern(cursor, self._users, 'process_users', 'username',
+                         {proc['username'] for proc in missing.values() if proc.get('username')})
+            cursor.executemany(
+                storage.insert_ignore_sql('processes', ('pid', 'create_time', 'name_id', 'user_id')),
+                [(pid, create_time, self._names[proc['name']], self._users.get(proc.get('username')))
+                 for (pid, create_time), proc in missing.items()])
+            pids = sorted({pid for pid, _ in missing})
+            cursor.execute(f"SELECT id, pid, create_time FROM processes WHERE pid IN ({', '.join(['%s'] * len(pids))})",
+                           pids)
+            for row_id, pid, create_time in cursor.fetchall():
+                key = _instance_key(pid, create_time)
+                if key in missing:
+                    self._instances[key] = row_id
+
+    def process_ids(self, processes):
+        """processes.id for each process dict (pid, create_time, name, username), in order."""
+        with self._lock:
+            keys = [_instance_key(proc['pid'], proc.get('create_time')) for proc in processes]
+            missing = {key: proc for key, proc in zip(keys, processes) if key not in self._instances}
+            if missing:
+                self._create_instances(missing)
+
+            ids = []
+            for key in keys:
+                ids.append(self._instances.get(key))
+                if key in self._instances:
+                    self._instances.move_to_end(key)
+            while len(self._instances) > self.cache_size:
+                self._instances.popitem(last=False)
+            return ids
+
+    def stats(self):
+        with self._lock:
+            return {'names': len(self._names), 'users': len(self._users), 'cached_processes': len(self._instances)}
+
+
+process_dimensions = ProcessDimensions()
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import psutil
+
+
+class ProcessSnapshotEngine:
+    """Keeps psutil.Process objects alive between scans so CPU deltas are real.
+
+    Processes are keyed by (pid, create_time). Each scan reads every attribute
+    in a single oneshot() pass and evicts pids that have gone away.
+    """
+
+    def __init__(self):
+        # pid -> {'key': (pid, create_time), 'proc': Process, 'username': str}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._last_snapshot = []
+        self._last_scan = 0.0
+        self.last_scan_ms = 0.0
+
+    def _track(self, pid):
+        proc = psutil.Process(pid)
+        try:
+            username = proc.username()
+        except (psutil.AccessDenied, psutil.ZombieProcess):
+            username = None
+        # Prime cpu_percent so the next scan returns a real delta
+        proc.cpu_percent(interval=None)
+        entry = {'key': (pid, proc.create_time()), 'proc': proc, 'username': username}
+        self._entries[pid] = entry
+        return entry
+
+    @staticmethod
+    def _read(entry):
+        """(name, cpu %, rss) in one oneshot() pass, or None if the pid now belongs to another process."""
+        proc = entry['proc']
+        # is_running() compares the cached create_time with a fresh read, so it is False
+        # for a reused pid (and for one that has exited)
+        if not proc.is_running():
+            return None
+        with proc.oneshot():
+            return proc.name(), proc.cpu_percent(interval=None), proc.memory_info().rss
+
+    def scan(self):
+        """Reads all processes once and returns a list of dicts (pid, name, username, cpu/memory %)."""
+        start = time.perf_counter()
+        with self._lock:
+            total_memory = psutil.virtual_memory().total
+            current_pids = set(psutil.pids())
+
+            # Evict processes that have exited since the last scan
+            for pid in list(self._entries):
+                if pid not in current_pids:
+                    del self._entries[pid]
+
+            snapshot = []
+            for pid in current_pids:
+                try:
+                    entry = self._entries.get(pid) or self._track(pid)
+                    reading = self._read(entry)
+                    if reading is None:
+                        # The pid was reused by a new process since the last scan
+                        entry = self._track(pid)
+                        reading = self._read(entry)
+                    name, cpu, rss = reading
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    self._entries.pop(pid, None)
+                    continue
+                except psutil.AccessDenied:
+                    continue
+                snapshot.append({
+                    'pid': pid,
+                    'name': name,
+                    'username': entry['username'],
+                    'cpu_percent': cpu,
+                    'memory_percent': rss / total_memory * 100 if total_memory else 0.0,
+                    'create_time': entry['key'][1],
+                })
+
+            self._last_snapshot = snapshot
+            self._last_scan = time.monotonic()
+            self.last_scan_ms = (time.perf_counter() - start) * 1000
+            return snapshot
+
+    def snapshot(self, max_age=1.0):
+        """Returns the last scan if it is younger than `max_age` seconds, otherwise rescans."""
+        with self._lock:
+            if self._last_snapshot and time.monotonic() - self._last_scan < max_age:
+                return self._last_snapshot
+        return self.scan()
+
+    def get_process(self, pid):
+        """Cached psutil.Process for `pid`, or a fresh one if it isn't tracked yet."""
+        with self._lock:
+            entry = self._entries.get(pid)
+        return entry['proc'] if entry else psutil.Process(pid)
+
+
+process_engine = ProcessSnapshotEngine()
@@ -0,0 +1,147 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+
+from config import REPORT_HOURS, REPORT_FORMAT, REPORT_TOP_N, SYSTEM_LOG_WINDOW
+from settings_cache import settings_cache
+from storage import get_db_cursor, storage
+from top_processes import query_top_processes
+
+REPORT_FORMATS = ('csv', 'ndjson')
+
+HOUR_COLUMNS = ('hour', 'windows', 'cpu_avg', 'cpu_p95', 'cpu_max', 'memory_avg', 'memory_p95', 'memory_max',
+                'cpu_above_seconds', 'memory_above_seconds')
+PROCESS_COLUMNS = ('sort', 'process_name', 'pid', 'cpu_usage', 'memory_usage', 'peak_cpu_usage',
+                   'peak_memory_usage', 'samples')
+IDLE_COLUMNS = ('idle_periods', 'idle_seconds', 'longest_idle_seconds')
+
+
+def _round(value):
+    return None if value is None else round(float(value), 2)
+
+
+def hourly_summary(start, end, cpu_threshold, memory_threshold):
+    """One row per hour of system_logs in [start, end), in a single grouped query.
+
+    Averages and peaks come from the stored windows; p95 comes from the hourly
+    rollup, which saw every sample. Time above a threshold counts the windows whose
+    average was over it, SYSTEM_LOG_WINDOW seconds each.
+    """
+    hour = storage.hour_sql('s.timestamp')
+    with get_db_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {hour} AS hour_start, COUNT(*),
+                   AVG(s.cpu_percent), MAX(h.cpu_p95), MAX(COALESCE(s.cpu_max, s.cpu_percent)),
+                   AVG(s.memory_percent), MAX(h.memory_p95), MAX(COALESCE(s.memory_max, s.memory_percent)),
+                   SUM(CASE WHEN s.cpu_percent > %s THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN s.memory_percent > %s THEN 1 ELSE 0 END)
+            FROM system_logs s
+            LEFT JOIN system_rollup_hour h ON h.bucket_start = {hour}
+            WHERE s.timestamp >= %s AND s.timestamp < %s
+            GROUP BY hour_start
+            ORDER BY hour_start""", (cpu_threshold, memory_threshold, start, end))
+        rows = cursor.fetchall()
+    return [{
+        'hour': str(hour_start)[:19],
+        'windows': windows,
+        'cpu_avg': _round(cpu_avg), 'cpu_p95': _round(cpu_p95), 'cpu_max': _round(cpu_max),
+        'memory_avg': _round(memory_avg), 'memory_p95': _round(memory_p95), 'memory_max': _round(memory_max),
+        'cpu_above_seconds': int(cpu_above or 0) * SYSTEM_LOG_WINDOW,
+        'memory_above_seconds': int(memory_above or 0) * SYSTEM_LOG_WINDOW,
+    } for hour_start, windows, cpu_avg, cpu_p95, cpu_max, memory_avg, memory_p95, memory_max, cpu_above, memory_above
+        in rows]
+
+
+def idle_summary(start, end):
+    with get_db_cursor() as cursor:
+        cursor.execute("""
+            SELECT COUNT(*), SUM(idle_seconds), MAX(idle_seconds)
+            FROM idle_time_logs
+            WHERE timestamp >= %s AND timestamp < %s""", (start, end))
+        periods, total, longest = cursor.fetchone()
+    return {'idle_periods': periods or 0, 'idle_seconds': int(total or 0), 'longest_idle_seconds': int(longest or 0)}
+
+
+def build_report(hours=REPORT_HOURS, top_n=REPORT_TOP_N, end=None):
+    """Summary of the `hours` before `end`: {'summary': {...}, 'hours': [...], 'processes': [...], 'idle': {...}}
+
+    Four aggregate queries over the same [start, end): the hourly rows, the top
+    processes by CPU and by memory, and the idle totals.
+    """
+    end = end or datetime.datetime.now()
+    start = end - datetime.timedelta(hours=hours)
+    settings = settings_cache.get().settings
+    cpu_threshold, memory_threshold = settings['cpu_threshold'], settings['memory_threshold']
+
+    hourly = hourly_summary(start, end, cpu_threshold, memory_threshold)
+    processes = [dict(row, sort=sort) for sort in ('cpu', 'memory')
+                 for row in query_top_processes(start, end, sort, top_n)]
+    cpu_peaks = [row['cpu_max'] for row in hourly if row['cpu_max'] is not None]
+    memory_peaks = [row['memory_max'] for row in hourly if row['memory_max'] is not None]
+    summary = {
+        'start': start.strftime('%Y-%m-%d %H:%M:%S'),
+        'end': end.strftime('%Y-%m-%d %H:%M:%S'),
+        'cpu_threshold': cpu_threshold,
+        'memory_threshold': memory_threshold,
+        'cpu_max': max(cpu_peaks, default=None),
+        'memory_max': max(memory_peaks, default=None),
+        'cpu_above_seconds': sum(row['cpu_above_seconds'] for row in hourly),
+        'memory_above_seconds': sum(row['memory_above_seconds'] for row in hourly),
+    }
+    return {'summary': summary, 'hours': hourly, 'processes': processes, 'idle': idle_summary(start, end)}
+
+
+def _write_ndjson(report, out):
+    # One JSON object per line, tagged with the section it belongs to
+    out.write(json.dumps(dict(report['summary'], record='summary')) + "\n")
+    for row in report['hours']:
+        out.write(json.dumps(dict(row, record='hour')) + "\n")
+    for row in report['processes']:
+        out.write(json.dumps(dict(row, record='process')) + "\n")
+    out.write(json.dumps(dict(report['idle'], record='idle')) + "\n")
+
+
+def _write_csv(report, out):
+    # One block per section, each with its own header row, separated by a blank line
+    writer = csv.writer(out)
+    sections = ((tuple(report['summary']), [report['summary']]),
+                (HOUR_COLUMNS, report['hours']),
+                (PROCESS_COLUMNS, report['processes']),
+                (IDLE_COLUMNS, [report['idle']]))
+    for index, (columns, rows) in enumerate(sections):
+        if index:
+            writer.writerow(())
+        writer.writerow(columns)
+        writer.writerows([row.get(column) for column in columns] for row in rows)
+
+
+def report_attachment(report, fmt=REPORT_FORMAT):
+    """(filename, gzip bytes) for `report`, encoded straight into an in-memory gzip stream."""
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format {fmt!r}; use 'csv' or 'ndjson'")
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as compressed:
+        with io.TextIOWrapper(compressed, encoding='utf-8', newline='') as out:
+            (_write_csv if fmt == 'csv' else _write_ndjson)(report, out)
+    stamp = report['summary']['end'].replace(' ', '_').replace(':', '')
+    return f"system_report_{stamp}.{fmt}.gz", buffer.getvalue()
+
+
+def report_text(report):
+    """Plain-text email body with the headline numbers of `report`."""
+    summary, idle = report['summary'], report['idle']
+    lines = [
+        f"System report {summary['start']} to {summary['end']}",
+        f"Peak CPU: {summary['cpu_max']}%, above {summary['cpu_threshold']}% for "
+        f"{summary['cpu_above_seconds'] // 60} min",
+        f"Peak memory: {summary['memory_max']}%, above {summary['memory_threshold']}% for "
+        f"{summary['memory_above_seconds'] // 60} min",
+        f"Idle: {idle['idle_seconds'] // 60} min over {idle['idle_periods']} periods",
+    ]
+    top_cpu = [row for row in report['processes'] if row['sort'] == 'cpu'][:3]
+    if top_cpu:
+        lines.append("Top CPU: " + ", ".join(f"{row['process_name']} ({row['cpu_usage']}%)" for row in top_cpu))
+    lines.append("Hourly details are in the attached report.")
+    return "\n".join(lines)
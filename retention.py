@@ -0,0 +1,92 @@
+import datetime
+import logging
+import time
+
+from config import RETENTION_BATCH_SIZE, RETENTION_BATCH_PAUSE, DEFAULT_RETENTION_DAYS
+from storage import get_db_cursor, storage
+from migrations import PARTITIONED_TABLES, drop_partitions_before, is_partitioned
+from settings_cache import settings_cache
+
+# Table -> timestamp column. The log tables are deleted in id ranges, the rollups in key order
+RETENTION_TABLES = {
+    'system_logs': 'timestamp',
+    'process_logs': 'timestamp',
+    'idle_time_logs': 'timestamp',
+    'system_rollup_minute': 'bucket_start',
+}
+
+last_retention_report = {}
+
+
+def _delete_id_ranges(table, column, cutoff, batch_size, pause):
+    with get_db_cursor() as cursor:
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table} WHERE {column} < %s", (cutoff,))
+        low, high = cursor.fetchone()
+    if low is None:
+        return 0
+
+    deleted = 0
+    for start in range(low, high + 1, batch_size):
+        # Each batch is its own short transaction so inserts are never locked out for long
+        with get_db_cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE id >= %s AND id < %s AND {column} < %s",
+                           (start, start + batch_size, cutoff))
+            deleted += cursor.rowcount
+        time.sleep(pause)
+    return deleted
+
+
+def _delete_key_ordered(table, column, cutoff, batch_size, pause):
+    # Tables keyed on their timestamp (rollups): walk the primary key in order
+    deleted = 0
+    while True:
+        with get_db_cursor() as cursor:
+            cursor.execute(storage.delete_oldest_sql(table, column), (cutoff, batch_size))
+            batch = cursor.rowcount
+        deleted += batch
+        if batch < batch_size:
+            return deleted
+        time.sleep(pause)
+
+
+def get_retention_days():
+    days = settings_cache.get().settings.get('auto_cleanup_days')
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        return DEFAULT_RETENTION_DAYS
+    return days if days > 0 else DEFAULT_RETENTION_DAYS
+
+
+def run_retention(batch_size=RETENTION_BATCH_SIZE, pause=RETENTION_BATCH_PAUSE):
+    """Removes rows older than auto_cleanup_days from every log table. Returns a per-table report."""
+    global last_retention_report
+    days = get_retention_days()
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=days)
+    report = {'retention_days': days, 'cutoff': cutoff.strftime('%Y-%m-%d %H:%M:%S'), 'tables': {}}
+
+    for table, column in RETENTION_TABLES.items():
+        start = time.perf_counter()
+        result = {'rows_deleted': 0, 'partitions_dropped': []}
+        try:
+            if table in PARTITIONED_TABLES and is_partitioned(table):
+                # Whole days older than the cutoff go with a near-free DROP PARTITION
+                result['partitions_dropped'] = drop_partitions_before(table, cutoff)
+            if table in PARTITIONED_TABLES:
+                result['rows_deleted'] = _delete_id_ranges(table, column, cutoff, batch_size, pause)
+            else:
+                result['rows_deleted'] = _delete_key_ordered(table, column, cutoff, batch_size, pause)
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"[Retention] {table}: {e}")
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        report['tables'][table] = result
+
+        message = (f"[Retention] {table}: {result['rows_deleted']} rows deleted, "
+                   f"{len(result['partitions_dropped'])} partitions dropped in {result['seconds']}s")
+        print(message)
+        logging.info(message)
+
+    report['finished_at'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    last_retention_report = report
+    return report
@@ -0,0 +1,258 @@
+import atexit
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+import psutil
+
+from config import RING_PATH, RING_CAPACITY
+
+# Header: magic, capacity (slots), per-core columns, samples ever written
+_MAGIC = b'PMRING01'
+_HEADER = struct.Struct('<8sQQQ')
+_HEADER_SIZE = 64
+# Offset of the "written" counter, updated after each slot is filled
+_WRITTEN_OFFSET = 24
+
+
+def _layout(capacity, cores):
+    """Byte offset of each column and the total file size. Each column is one contiguous array."""
+    offsets = {}
+    position = _HEADER_SIZE
+    for name, dtype, width in (('timestamp', np.float64, 1), ('cpu_percent', np.float32, 1),
+                               ('memory_percent', np.float32, 1), ('per_cpu', np.float32, cores)):
+        offsets[name] = position
+        position += capacity * width * np.dtype(dtype).itemsize
+    return offsets, position
+
+
+class RingStore:
+    """Fixed-size columnar ring of samples in a memory-mapped file.
+
+    Columns are packed arrays (float64 timestamps, float32 CPU %, memory % and one
+    float32 array per core), so readers get NumPy views straight onto the file
+    without copying or parsing. The oldest slot is overwritten once the ring is
+    full. The file is reopened as is after a restart, so recent history survives.
+
+    One process writes; readers in other processes open the same file read-only.
+    The writer fills a slot before bumping the written counter. Once the ring is
+    full, the slot after the newest one may be half overwritten at any moment, so
+    readers never look at it, and they drop any slot that was overwritten while
+    they were looking it up.
+    """
+
+    def __init__(self, path=RING_PATH, capacity=RING_CAPACITY, cores=None):
+        self.path = path
+        self.capacity = capacity
+        self.cores = cores or psutil.cpu_count() or 1
+        self.writable = False
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._inode = None
+
+    # Opening
+
+    def _create(self):
+        _, size = _layout(self.capacity, self.cores)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        temp_path = os.path.join(directory, f".{os.path.basename(self.path)}.{os.getpid()}.tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.capacity, self.cores, 0))
+            f.truncate(size)
+        # Readers never see a half-created file
+        os.replace(temp_path, self.path)
+
+    def _header_matches(self):
+        try:
+            with open(self.path, 'rb') as f:
+                magic, capacity, cores, _ = _HEADER.unpack(f.read(_HEADER.size))
+        except (OSError, struct.error):
+            return False
+        return (magic == _MAGIC and capacity == self.capacity and cores == self.cores
+                and os.path.getsize(self.path) == _layout(capacity, cores)[1])
+
+    def _map_file(self, writable):
+        self._file = open(self.path, 'r+b' if writable else 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        offsets, _ = _layout(self.capacity, self.cores)
+        self.timestamp = np.ndarray((self.capacity,), np.float64, self._map, offsets['timestamp'])
+        self.cpu_percent = np.ndarray((self.capacity,), np.float32, self._map, offsets['cpu_percent'])
+        self.memory_percent = np.ndarray((self.capacity,), np.float32, self._map, offsets['memory_percent'])
+        self.per_cpu = np.ndarray((self.cores, self.capacity), np.float32, self._map, offsets['per_cpu'])
+        self._written = np.ndarray((1,), np.uint64, self._map, _WRITTEN_OFFSET)
+        self.writable = writable
+
+    def open_for_writing(self):
+        """Opens the ring file (creating or resetting it if the layout changed) for appending."""
+        with self._lock:
+            if self.writable:
+                return self
+            self._close()
+            if not self._header_matches():
+                if os.path.exists(self.path):
+                    print(f"[Ring Store] {self.path} has a different layout, starting a new ring")
+                self._create()
+            self._map_file(writable=True)
+            return self
+
+    def open_for_reading(self):
+        """Maps the ring file read-only. Returns False if no collector has created it yet."""
+        with self._lock:
+            if self.writable:
+                return True
+            try:
+                inode = os.stat(self.path).st_ino
+            except OSError:
+                return False
+            # The collector replaced the file (e.g. after a layout change)
+            if self._map is not None and inode == self._inode:
+                return True
+            self._close()
+            try:
+                with open(self.path, 'rb') as f:
+                    magic, self.capacity, self.cores, _ = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return False
+                self._map_file(writable=False)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"[Error Opening Ring Store] {e}")
+                self._close()
+                return False
+            return True
+
+    # Writing
+
+    def append(self, sample):
+        """Sampler listener: stores one sample in the next slot."""
+        written = int(self._written[0])
+        slot = written % self.capacity
+        self.timestamp[slot] = sample['timestamp']
+        self.cpu_percent[slot] = sample['cpu_percent']
+        self.memory_percent[slot] = sample['memory_percent']
+        per_cpu = sample.get('per_cpu') or ()
+        count = min(len(per_cpu), self.cores)
+        self.per_cpu[:count, slot] = per_cpu[:count]
+        self.per_cpu[count:, slot] = np.nan
+        self._written[0] = written + 1
+
+    # Reading
+
+    def written(self):
+        return int(self._written[0]) if self._map is not None else 0
+
+    def _first_valid(self, written):
+        # Logical index of the oldest readable sample; once full, slot `written % capacity`
+        # is the one the writer fills next, so it never counts
+        return max(0, written - self.capacity + 1)
+
+    def __len__(self):
+        written = self.written()
+        return written - self._first_valid(written)
+
+    def oldest_timestamp(self):
+        written = self.written()
+        if not written:
+            return None
+        return float(self.timestamp[self._first_valid(written) % self.capacity])
+
+    def _runs(self, written):
+        """Physical (start, stop) slot runs in time order, with the logical index of each start."""
+        if written < self.capacity:
+            return [(0, written, 0)]
+        head = written % self.capacity
+        oldest = self._first_valid(written)
+        runs = []
+        if head + 1 < self.capacity:
+            runs.append((head + 1, self.capacity, oldest))
+        if head:
+            runs.append((0, head, oldest + self.capacity - head - 1))
+        return runs
+
+    def segments(self, start=None, end=None):
+        """Views of the samples with start <= timestamp < end, as one dict of columns per contiguous run.
+
+        There are at most two runs (before and after the wrap point). The arrays are
+        views onto the file, not copies; copy them if they are kept for longer than
+        the ring takes to wrap.
+        """
+        written = self.written()
+        found = []
+        for run_start, run_stop, logical in self._runs(written):
+            times = self.timestamp[run_start:run_stop]
+            lo = 0 if start is None else int(np.searchsorted(times, start, 'left'))
+            hi = len(times) if end is None else int(np.searchsorted(times, end, 'left'))
+            if lo < hi:
+                found.append((run_start + lo, run_start + hi, logical + lo))
+
+        # Slots the writer reused meanwhile hold newer samples than the range asked for
+        first_valid = self._first_valid(self.written())
+        result = []
+        for lo, hi, logical in found:
+            lo += max(0, first_valid - logical)
+            if lo < hi:
+                result.append({
+                    'timestamp': self.timestamp[lo:hi],
+                    'cpu_percent': self.cpu_percent[lo:hi],
+                    'memory_percent': self.memory_percent[lo:hi],
+                    'per_cpu': self.per_cpu[:, lo:hi],
+                })
+        return result
+
+    def series(self, start=None, end=None):
+        """Columns of the samples in [start, end); views when the range doesn't cross the wrap point."""
+        runs = self.segments(start, end)
+        if len(runs) == 1:
+            return runs[0]
+        if not runs:
+            return {'timestamp': np.empty(0), 'cpu_percent': np.empty(0, np.float32),
+                    'memory_percent': np.empty(0, np.float32), 'per_cpu': np.empty((self.cores, 0), np.float32)}
+        return {key: np.concatenate([run[key] for run in runs], axis=-1) for key in runs[0]}
+
+    def covers(self, start):
+        """True if the ring still holds samples from `start` (Unix seconds) on."""
+        oldest = self.oldest_timestamp()
+        return oldest is not None and oldest <= start
+
+    # Closing
+
+    def flush(self):
+        if self._map is not None and self.writable:
+            self._map.flush()
+
+    def _close(self):
+        if self._map is not None:
+            # Views onto the map have to go before it can be closed
+            self.timestamp = self.cpu_percent = self.memory_percent = self.per_cpu = self._written = None
+            if self.writable:
+                self._map.flush()
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # A reader still holds a view; the mapping goes away with it
+            self._file.close()
+        self._map = self._file = self._inode = None
+        self.writable = False
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+ring_store = RingStore()
+atexit.register(ring_store.flush)
+
+
+def start_ring_store(sampler):
+    """Appends every sample to the ring file; call in the process that runs the sampler."""
+    ring_store.open_for_writing()
+    sampler.add_listener(ring_store.append)
+    return ring_store
+
+
+def get_ring_store():
+    """The ring this process writes, or a read-only view of the collector's; None if there is none yet."""
+    return ring_store if ring_store.open_for_reading() else None
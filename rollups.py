@@ -0,0 +1,273 @@
+import atexit
+import datetime
+import threading
+
+from storage import get_db_cursor
+from config import WRITER_FLUSH_INTERVAL
+from db_writer import db_writer, register_table
+from event_bus import event_bus
+
+# Resolution name -> rollup table, bucket length in seconds
+ROLLUP_TABLES = {
+    'minute': ('system_rollup_minute', 60),
+    'hour': ('system_rollup_hour', 3600),
+    'day': ('system_rollup_day', 86400),
+}
+
+ROLLUP_COLUMNS = ('bucket_start', 'samples',
+                  'cpu_avg', 'cpu_min', 'cpu_max', 'cpu_p95',
+                  'memory_avg', 'memory_min', 'memory_max', 'memory_p95')
+
+for _table, _ in ROLLUP_TABLES.values():
+    register_table(_table, ROLLUP_COLUMNS, upsert_key='bucket_start')
+
+
+def bucket_start(dt, resolution):
+    if resolution == 'minute':
+        return dt.replace(second=0, microsecond=0)
+    if resolution == 'hour':
+        return dt.replace(minute=0, second=0, microsecond=0)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class PercentHistogram:
+    """Fixed-size histogram over 0-100% in 0.1% steps; gives streaming percentiles in O(1) memory."""
+
+    BINS = 1001
+
+    def __init__(self):
+        self.counts = [0] * self.BINS
+        self.total = 0
+
+    def add(self, value):
+        index = min(self.BINS - 1, max(0, int(round(value * 10))))
+        self.counts[index] += 1
+        self.total += 1
+
+    def percentile(self, pct):
+        if not self.total:
+            return None
+        rank = pct / 100.0 * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return index / 10.0
+        return 100.0
+
+
+class MetricStats:
+    """Running count/sum/min/max/p95 for one metric in one bucket."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.histogram = PercentHistogram()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.histogram.add(value)
+
+    def seed(self, count, avg, minimum, maximum):
+        # Carry over a bucket that was partly written before a restart (p95 restarts from here)
+        self.count = count
+        self.total = avg * count
+        self.min = minimum
+        self.max = maximum
+
+    def row(self):
+        avg = self.total / self.count if self.count else None
+        return avg, self.min, self.max, self.histogram.percentile(95)
+
+
+class Bucket:
+    def __init__(self, start):
+        self.start = start
+        self.samples = 0
+        self.cpu = MetricStats()
+        self.memory = MetricStats()
+
+    def add(self, cpu, memory):
+        self.samples += 1
+        self.cpu.add(cpu)
+        self.memory.add(memory)
+
+    def row(self):
+        return (self.start, self.samples) + self.cpu.row() + self.memory.row()
+
+
+class WindowAggregator:
+    """Folds every sample into fixed windows of `seconds` and calls `on_close(window)` as each one ends.
+
+    At high sample rates this keeps one stored row per window without losing the
+    bursts inside it: the window dict has avg/min/max/p95 for CPU and memory plus
+    the highest single-core reading (`core_max`).
+    """
+
+    def __init__(self, seconds, on_close):
+        self.seconds = seconds
+        self.on_close = on_close
+        self._bucket = None
+        self._core_max = None
+        self._lock = threading.Lock()
+
+    def add_sample(self, sample):
+        start = sample['timestamp'] - sample['timestamp'] % self.seconds
+        closed = None
+        with self._lock:
+            if self._bucket is not None and self._bucket.start != start:
+                closed = self._take()
+            if self._bucket is None:
+                self._bucket = Bucket(start)
+            self._bucket.add(sample['cpu_percent'], sample['memory_percent'])
+            per_cpu = sample.get('per_cpu')
+            if per_cpu:
+                peak = max(per_cpu)
+                self._core_max = peak if self._core_max is None else max(self._core_max, peak)
+        # Outside the lock, so a slow callback never holds up the next sample
+        if closed:
+            self.on_close(closed)
+
+    def _take(self):
+        bucket, core_max = self._bucket, self._core_max
+        self._bucket = self._core_max = None
+        cpu_avg, cpu_min, cpu_max, cpu_p95 = bucket.cpu.row()
+        memory_avg, memory_min, memory_max, memory_p95 = bucket.memory.row()
+        return {
+            'timestamp': datetime.datetime.fromtimestamp(bucket.start),
+            'samples': bucket.samples,
+            'cpu_percent': cpu_avg, 'cpu_min': cpu_min, 'cpu_max': cpu_max, 'cpu_p95': cpu_p95,
+            'memory_percent': memory_avg, 'memory_min': memory_min, 'memory_max': memory_max,
+            'memory_p95': memory_p95,
+            'core_max': core_max,
+        }
+
+    def close(self):
+        """Hands over the partly filled current window, e.g. at shutdown."""
+        with self._lock:
+            closed = self._take() if self._bucket is not None else None
+        if closed:
+            self.on_close(closed)
+
+
+class RollupAggregator:
+    """Maintains minute/hour/day rollups incrementally from the sampler's readings.
+
+    Minute rows are written when the minute closes. The open hour and day rows are
+    re-written (upserted) at every minute boundary, so they are never more than a
+    minute behind and survive restarts.
+    """
+
+    def __init__(self, writer=db_writer):
+        self.writer = writer
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _load_bucket(self, resolution, start):
+        bucket = Bucket(start)
+        if resolution == 'minute':
+            return bucket
+        table = ROLLUP_TABLES[resolution][0]
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(
+                    f"SELECT samples, cpu_avg, cpu_min, cpu_max, memory_avg, memory_min, memory_max "
+                    f"FROM {table} WHERE bucket_start = %s", (start,))
+                row = cursor.fetchone()
+        except Exception as e:
+            print(f"[Rollups] Could not load {table} bucket {start}: {e}")
+            row = None
+        if row:
+            samples, cpu_avg, cpu_min, cpu_max, mem_avg, mem_min, mem_max = row
+            bucket.samples = samples
+            bucket.cpu.seed(samples, cpu_avg, cpu_min, cpu_max)
+            bucket.memory.seed(samples, mem_avg, mem_min, mem_max)
+        return bucket
+
+    def add_sample(self, sample):
+        now = datetime.datetime.fromtimestamp(sample['timestamp'])
+        with self._lock:
+            minute = self._buckets.get('minute')
+            minute_closed = minute is not None and bucket_start(now, 'minute') != minute.start
+            if minute_closed:
+                self.flush()
+
+            for resolution in ROLLUP_TABLES:
+                start = bucket_start(now, resolution)
+                bucket = self._buckets.get(resolution)
+                if bucket is None or bucket.start != start:
+                    bucket = self._load_bucket(resolution, start)
+                    self._buckets[resolution] = bucket
+                bucket.add(sample['cpu_percent'], sample['memory_percent'])
+
+    def flush(self):
+        """Writes the current state of every open bucket."""
+        for resolution, bucket in self._buckets.items():
+            if bucket.samples:
+                self.writer.submit(ROLLUP_TABLES[resolution][0], [bucket.row()])
+        minute = self._buckets.get('minute')
+        if minute is not None and minute.samples:
+            # Lets the historical trends page refresh once per new minute instead of on a timer
+            event_bus.publish('history', {'resolution': 'minute',
+                                          'bucket_start': minute.start.strftime('%Y-%m-%d %H:%M:%S')})
+
+    def close(self):
+        with self._lock:
+            self.flush()
+
+
+rollup_aggregator = RollupAggregator()
+# Registered after db_writer's handler, so it runs first and the writer flushes these rows
+atexit.register(rollup_aggregator.close)
+
+
+def start_rollups(sampler):
+    # Tables are created by migrations.py
+    sampler.add_listener(rollup_aggregator.add_sample)
+
+
+# Minimum number of points a chart should get before falling back to a finer resolution
+MIN_CHART_POINTS = 100
+
+
+def choose_resolution(range_seconds):
+    """Coarsest rollup that still gives at least MIN_CHART_POINTS points for the range."""
+    for resolution in ('day', 'hour', 'minute'):
+        if range_seconds / ROLLUP_TABLES[resolution][1] >= MIN_CHART_POINTS:
+            return resolution
+    return 'raw'
+
+
+def range_is_final(end, resolution, now=None):
+    """True when every bucket before `end` is closed and written, so the series can no longer change."""
+    now = now or datetime.datetime.now()
+    settled = now - datetime.timedelta(seconds=WRITER_FLUSH_INTERVAL * 2)
+    return end <= bucket_start(settled, 'minute' if resolution == 'raw' else resolution)
+
+
+def fetch_rollup_series(resolution, since, until=None):
+    table = ROLLUP_TABLES[resolution][0]
+    until_clause = "AND bucket_start < %s" if until else ""
+    params = (since, until) if until else (since,)
+    with get_db_cursor(dictionary=True) as cursor:
+        cursor.execute(f"""
+            SELECT
+                bucket_start AS timestamp,
+                cpu_avg AS cpu_percent,
+                memory_avg AS memory_percent,
+                cpu_min, cpu_max, cpu_p95,
+                memory_min, memory_max, memory_p95,
+                samples
+            FROM {table}
+            WHERE bucket_start >= %s {until_clause}
+            ORDER BY bucket_start
+        """, params)
+        rows = cursor.fetchall()
+    for row in rows:
+        row['timestamp'] = row['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
+    return rows
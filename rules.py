@@ -0,0 +1,341 @@
+import datetime
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from config import (RULE_SUSTAIN_SECONDS, RULE_HYSTERESIS, ANOMALY_Z, ANOMALY_HALF_LIFE, PROCESS_RULE_INTERVAL,
+                    PROCESS_RULE_SUSTAIN_SECONDS)
+from event_bus import event_bus
+from platform_backend import platform_backend
+from settings_cache import settings_cache
+
+# Fired/resolved alerts kept for /api/alerts
+RECENT_ALERTS = 100
+# Smallest standard deviation the anomaly rule divides by, in percentage points, so a
+# perfectly flat baseline doesn't turn a 1% wiggle into a huge z-score
+ANOMALY_MIN_STD = 2.0
+
+
+def setting(name):
+    """Threshold that follows the settings page (read from the settings cache on every check)."""
+    return lambda: settings_cache.get().settings[name]
+
+
+def _constant(value):
+    return value if callable(value) else (lambda: value)
+
+
+def _time_str(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _alert(rule, state, value, threshold, since, timestamp, message, **extra):
+    alert = {
+        'key': rule.name,
+        'rule': rule.name,
+        'severity': rule.severity,
+        'state': state,
+        'metric': rule.metric,
+        'value': round(float(value), 2),
+        'threshold': round(float(threshold), 2),
+        'since': _time_str(since),
+        'timestamp': _time_str(timestamp),
+        'message': message,
+    }
+    alert.update(extra)
+    return alert
+
+
+class ThresholdRule:
+    """Fires when `metric` stays above `threshold` for `sustain` seconds.
+
+    It clears only once the value drops `hysteresis` points below the threshold, so
+    a reading hovering around the limit doesn't fire and clear over and over.
+    """
+
+    def __init__(self, name, metric, threshold, sustain=RULE_SUSTAIN_SECONDS, hysteresis=RULE_HYSTERESIS,
+                 severity='warning'):
+        self.name = name
+        self.metric = metric
+        self.threshold = _constant(threshold)
+        self.sustain = sustain
+        self.hysteresis = hysteresis
+        self.severity = severity
+        self.firing = False
+        self._above_since = None
+
+    def evaluate(self, sample):
+        value, now, limit = sample[self.metric], sample['timestamp'], self.threshold()
+        if not self.firing:
+            if value <= limit:
+                self._above_since = None
+                return None
+            if self._above_since is None:
+                self._above_since = now
+            if now - self._above_since >= self.sustain:
+                self.firing = True
+                return _alert(self, 'firing', value, limit, self._above_since, now,
+                              f"{self.metric} above {limit:g}% for {now - self._above_since:.0f}s ({value:.1f}%)")
+        elif value < limit - self.hysteresis:
+            self.firing = False
+            since, self._above_since = self._above_since, None
+            return _alert(self, 'resolved', value, limit, since, now, f"{self.metric} back to {value:.1f}%")
+        return None
+
+
+class AnomalyRule:
+    """Fires when `metric` jumps `z` standard deviations above its recent baseline.
+
+    The baseline is an exponentially weighted mean and variance whose half-life is
+    in seconds, so it behaves the same at any sample rate. Each reading is scored
+    against the baseline before being folded in. Nothing fires during the first
+    half-life, and an alert clears once the z-score falls below half of `z`.
+    """
+
+    def __init__(self, name, metric, z=ANOMALY_Z, half_life=ANOMALY_HALF_LIFE, severity='info'):
+        self.name = name
+        self.metric = metric
+        self.z = z
+        self.half_life = half_life
+        self.severity = severity
+        self.firing = False
+        self._mean = None
+        self._var = 0.0
+        self._started = None
+        self._last = None
+        self._since = None
+
+    def evaluate(self, sample):
+        value, now = sample[self.metric], sample['timestamp']
+        if self._mean is None:
+            self._mean, self._started, self._last = value, now, now
+            return None
+
+        std = max(math.sqrt(self._var), ANOMALY_MIN_STD)
+        score = (value - self._mean) / std
+        baseline = self._mean
+        alpha = 1.0 - 2.0 ** (-max(now - self._last, 0.0) / self.half_life)
+        diff = value - self._mean
+        self._mean += alpha * diff
+        self._var = (1.0 - alpha) * (self._var + alpha * diff * diff)
+        self._last = now
+
+        if now - self._started < self.half_life:
+            return None
+        if not self.firing and score >= self.z:
+            self.firing, self._since = True, now
+            return _alert(self, 'firing', value, baseline, now, now,
+                          f"{self.metric} {value:.1f}% is {score:.1f} standard deviations above its "
+                          f"recent average of {baseline:.1f}%", z_score=round(score, 2))
+        if self.firing and score < self.z / 2:
+            self.firing = False
+            return _alert(self, 'resolved', value, baseline, self._since, now,
+                          f"{self.metric} back near its average ({value:.1f}%)", z_score=round(score, 2))
+        return None
+
+
+class ProcessRule:
+    """Sustained threshold with hysteresis for every process at once.
+
+    State lives in arrays sorted by pid, and each pass is a handful of NumPy
+    operations over the whole process table, so the per-process cost doesn't
+    depend on how many processes there are. A process is matched across passes
+    by (pid, create_time), so a reused pid starts from scratch.
+    """
+
+    def __init__(self, name, metric, threshold, sustain=PROCESS_RULE_SUSTAIN_SECONDS, hysteresis=RULE_HYSTERESIS,
+                 severity='warning'):
+        self.name = name
+        self.metric = metric
+        self.threshold = _constant(threshold)
+        self.sustain = sustain
+        self.hysteresis = hysteresis
+        self.severity = severity
+        self._pids = np.empty(0, np.int64)
+        self._create_times = np.empty(0, np.float64)
+        self._above_since = np.empty(0, np.float64)
+        self._firing = np.empty(0, bool)
+        self._names = []
+
+    def evaluate(self, table, now):
+        """`table` is ProcessTable columns sorted by pid. Returns the alerts that changed state."""
+        pids, create_times, values = table['pid'], table['create_time'], table[self.metric]
+        limit = self.threshold()
+
+        # Carry over the state of processes seen in the previous pass
+        index = np.minimum(np.searchsorted(self._pids, pids), max(len(self._pids) - 1, 0))
+        if len(self._pids):
+            matched = (self._pids[index] == pids) & (self._create_times[index] == create_times)
+        else:
+            matched = np.zeros(len(pids), bool)
+        above_since = np.where(matched, self._above_since[index] if len(self._pids) else np.nan, np.nan)
+        firing = matched & (self._firing[index] if len(self._pids) else False)
+
+        above = values > limit
+        above_since = np.where(above, np.where(np.isnan(above_since), now, above_since), np.nan)
+        started = ~firing & above & (now - above_since >= self.sustain)
+        resolved = firing & (values < limit - self.hysteresis)
+        # Processes that exited while their alert was firing
+        still_running = np.zeros(len(self._pids), bool)
+        still_running[index[matched]] = True
+        exited = np.flatnonzero(self._firing & ~still_running)
+
+        alerts = []
+        for i in np.flatnonzero(started):
+            alerts.append(self._process_alert('firing', table, i, limit, above_since[i], now,
+                                              f"{table['name'][i]} (pid {pids[i]}) {self.metric} above {limit:g}% "
+                                              f"for {now - above_since[i]:.0f}s ({values[i]:.1f}%)"))
+        for i in np.flatnonzero(resolved):
+            alerts.append(self._process_alert('resolved', table, i, limit, now, now,
+                                              f"{table['name'][i]} (pid {pids[i]}) {self.metric} back to "
+                                              f"{values[i]:.1f}%"))
+        for i in exited:
+            alerts.append(dict(_alert(self, 'resolved', 0.0, limit, now, now,
+                                      f"{self._names[i]} (pid {self._pids[i]}) exited"),
+                               key=f"{self.name}:{self._pids[i]}", pid=int(self._pids[i]),
+                               process_name=self._names[i]))
+
+        self._pids, self._create_times = pids, create_times
+        self._above_since = np.where(resolved, np.nan, above_since)
+        self._firing = (firing | started) & ~resolved
+        self._names = table['name']
+        return alerts
+
+    def _process_alert(self, state, table, i, limit, since, now, message):
+        return dict(_alert(self, state, table[self.metric][i], limit, since, now, message),
+                    key=f"{self.name}:{table['pid'][i]}", pid=int(table['pid'][i]), process_name=table['name'][i])
+
+
+def process_table(processes):
+    """Process dicts as columns sorted by pid: one conversion shared by every process rule."""
+    count = len(processes)
+    pids = np.fromiter((proc['pid'] for proc in processes), np.int64, count)
+    order = np.argsort(pids, kind='stable')
+    table = {
+        'pid': pids[order],
+        'create_time': np.fromiter((proc.get('create_time') or 0.0 for proc in processes), np.float64, count)[order],
+        'cpu_percent': np.fromiter((proc.get('cpu_percent') or 0.0 for proc in processes), np.float64, count)[order],
+        'memory_percent': np.fromiter((proc.get('memory_percent') or 0.0 for proc in processes), np.float64,
+                                      count)[order],
+    }
+    table['name'] = [processes[i]['name'] for i in order]
+    return table
+
+
+def default_rules():
+    """(system rules, process rules) built from the settings page thresholds."""
+    system_rules = [
+        ThresholdRule('cpu_high', 'cpu_percent', setting('cpu_threshold')),
+        ThresholdRule('memory_high', 'memory_percent', setting('memory_threshold')),
+        AnomalyRule('cpu_anomaly', 'cpu_percent'),
+    ]
+    process_rules = [
+        ProcessRule('process_cpu_high', 'cpu_percent', setting('cpu_threshold')),
+        ProcessRule('process_memory_high', 'memory_percent', setting('memory_threshold')),
+    ]
+    return system_rules, process_rules
+
+
+class RuleEngine:
+    """Evaluates alert rules as the data arrives: system rules on every sample, process rules on every scan.
+
+    Alerts that change state are recorded, published on the 'alerts' stream topic
+    together with the currently active ones, and handed to listeners (e.g. the
+    notification dispatcher).
+    """
+
+    def __init__(self, system_rules=None, process_rules=None):
+        defaults = default_rules()
+        self.system_rules = defaults[0] if system_rules is None else system_rules
+        self.process_rules = defaults[1] if process_rules is None else process_rules
+        self._lock = threading.Lock()
+        self._active = {}
+        self._recent = deque(maxlen=RECENT_ALERTS)
+        self._listeners = []
+        self._thread = None
+        self._stats = {'samples': 0, 'process_passes': 0, 'alerts': 0, 'last_process_pass_ms': 0.0,
+                       'last_process_count': 0}
+
+    def add_listener(self, callback):
+        """Calls `callback(alerts)` with every batch of alerts that changed state."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def evaluate_sample(self, sample):
+        """Sampler listener."""
+        alerts = [alert for alert in (rule.evaluate(sample) for rule in self.system_rules) if alert]
+        with self._lock:
+            self._stats['samples'] += 1
+        if alerts:
+            self._emit(alerts)
+
+    def evaluate_processes(self, processes, timestamp=None):
+        start = time.perf_counter()
+        now = timestamp or time.time()
+        table = process_table(processes)
+        alerts = []
+        for rule in self.process_rules:
+            alerts += rule.evaluate(table, now)
+        with self._lock:
+            self._stats['process_passes'] += 1
+            self._stats['last_process_pass_ms'] = (time.perf_counter() - start) * 1000
+            self._stats['last_process_count'] = len(processes)
+        if alerts:
+            self._emit(alerts)
+
+    def _emit(self, alerts):
+        with self._lock:
+            for alert in alerts:
+                if alert['state'] == 'firing':
+                    self._active[alert['key']] = alert
+                else:
+                    self._active.pop(alert['key'], None)
+                self._recent.append(alert)
+                self._stats['alerts'] += 1
+            state = self._state()
+        for alert in alerts:
+            print(f"[Alert] {alert['state']}: {alert['message']}")
+        # Published with the full active set, so a client that skipped an event is still in sync
+        event_bus.publish('alerts', dict(state, changes=alerts))
+        for callback in self._listeners:
+            try:
+                callback(alerts)
+            except Exception as e:
+                print(f"[Error in alert listener {getattr(callback, '__name__', callback)}] {e}")
+
+    def _state(self):
+        return {'active': list(self._active.values()), 'recent': list(self._recent)[-20:]}
+
+    def state(self):
+        """{'active': [alerts currently firing], 'recent': [last 20 state changes]}"""
+        with self._lock:
+            return self._state()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, active=len(self._active))
+
+    def run_process_rules(self, interval=PROCESS_RULE_INTERVAL):
+        """Checks the whole process table every `interval` seconds (blocking)."""
+        while True:
+            try:
+                self.evaluate_processes(platform_backend.scan_processes(max_age=interval / 2))
+            except Exception as e:
+                print(f"[Error Evaluating Process Rules] {e}")
+            time.sleep(interval)
+
+
+rule_engine = RuleEngine()
+
+
+def start_rules(sampler):
+    """System rules on every sample, process rules on their own thread."""
+    sampler.add_listener(rule_engine.evaluate_sample)
+    if rule_engine._thread is None:
+        rule_engine._thread = threading.Thread(target=rule_engine.run_process_rules, name="Process_Rules_Thread",
+                                               daemon=True)
+        rule_engine._thread.start()
+    return rule_engine
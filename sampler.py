@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import deque
+
+import psutil
+
+from config import SAMPLE_HZ
+
+# How often the sampler takes a CPU/memory reading, in seconds
+SAMPLE_INTERVAL = 1.0 / SAMPLE_HZ
+# Number of samples kept in memory (1 hour)
+RING_SIZE = int(3600 * SAMPLE_HZ)
+
+
+class MetricsSampler:
+    """Takes CPU/memory readings on a fixed cadence into an in-memory ring buffer."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL, size=RING_SIZE):
+        self.interval = interval
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Calls `callback(sample)` on the sampler thread for every new sample."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def _notify(self, sample):
+        for callback in self._listeners:
+            try:
+                callback(sample)
+            except Exception as e:
+                print(f"[Error in sampler listener {getattr(callback, '__name__', callback)}] {e}")
+
+    def _take_sample(self, cpu_interval=None):
+        # With interval=None psutil returns the usage since the previous call,
+        # so a fixed cadence gives back-to-back, non-overlapping readings.
+        sample = {
+            'timestamp': time.time(),
+            'cpu_percent': psutil.cpu_percent(interval=cpu_interval),
+            'memory_percent': psutil.virtual_memory().percent,
+            'per_cpu': psutil.cpu_percent(interval=None, percpu=True),
+        }
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def _run(self):
+        next_tick = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, next_tick - time.monotonic())):
+            try:
+                sample = self._take_sample()
+            except Exception as e:
+                print(f"[Error Sampling System Stats] {e}")
+            else:
+                self._notify(sample)
+            next_tick += self.interval
+            # Don't try to catch up after a long stall (e.g. system sleep)
+            if next_tick < time.monotonic():
+                next_tick = time.monotonic() + self.interval
+
+    def start(self):
+        with self._start_lock:
+            if self.is_running():
+                return
+            # One short blocking reading so readers have real data straight away
+            psutil.cpu_percent(interval=None, percpu=True)
+            self._take_sample(cpu_interval=0.1)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="Metrics_Sampler_Thread", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def latest(self):
+        with self._lock:
+            return dict(self._samples[-1]) if self._samples else None
+
+    def window(self, seconds):
+        """Returns the samples taken in the last `seconds`, oldest first."""
+        cutoff = time.time() - seconds
+        with self._lock:
+            return [dict(s) for s in self._samples if s['timestamp'] >= cutoff]
+
+
+metrics_sampler = MetricsSampler()
+
+
+def start_sampler():
+    metrics_sampler.start()
+    return metrics_sampler
+
+
+def get_latest_sample():
+    """Latest CPU/memory reading; never blocks on psutil."""
+    start_sampler()
+    return metrics_sampler.latest()
+
+
+def get_window_average(seconds):
+    """Average CPU/memory over the last `seconds`, falling back to the latest sample."""
+    start_sampler()
+    samples = metrics_sampler.window(seconds)
+    if not samples:
+        return metrics_sampler.latest()
+    return {
+        'timestamp': samples[-1]['timestamp'],
+        'cpu_percent': sum(s['cpu_percent'] for s in samples) / len(samples),
+        'memory_percent': sum(s['memory_percent'] for s in samples) / len(samples),
+    }
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from config import SETTINGS_POLL_INTERVAL
+from storage import get_db_cursor
+
+DEFAULT_SETTINGS = {
+    'cpu_threshold': 80,
+    'memory_threshold': 75,
+    'refresh_interval': 2000,
+    'theme': 'light',
+    'email_notify': False,
+    'id': 1,
+    'username': None,
+    'auto_cleanup_days': 30,
+}
+
+# Immutable view handed to readers: settings is a read-only mapping,
+# blacklist the lower-cased names for matching, blacklist_names as stored
+SettingsSnapshot = namedtuple('SettingsSnapshot', 'version settings blacklist blacklist_names found')
+
+
+class SettingsCache:
+    """In-process copy of monitor_settings and the blacklist, invalidated by a version counter.
+
+    handle_settings_updates() calls bump() after every commit; readers compare
+    versions and never touch the database while their snapshot is current.
+    """
+
+    def __init__(self):
+        self._version = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def _load(self, version):
+        with get_db_cursor() as cursor:
+            cursor.execute("""
+                SELECT cpu_threshold, memory_threshold, refresh_interval, theme, email_notify, id, username, auto_cleanup_days
+                FROM monitor_settings
+                WHERE id=1
+            """)
+            row = cursor.fetchone()
+            cursor.execute("SELECT process_name FROM blacklisted_processes")
+            names = tuple(r[0] for r in cursor.fetchall())
+
+        settings = dict(DEFAULT_SETTINGS)
+        if row:
+            settings.update(zip(('cpu_threshold', 'memory_threshold', 'refresh_interval', 'theme',
+                                 'email_notify', 'id', 'username', 'auto_cleanup_days'), row))
+            settings['email_notify'] = bool(settings['email_notify'])
+        return SettingsSnapshot(
+            version=version,
+            settings=MappingProxyType(settings),
+            blacklist=frozenset(name.lower() for name in names),
+            blacklist_names=names,
+            found=row is not None,
+        )
+
+    def get(self):
+        """Current snapshot; only hits the database after a bump()."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != self._version:
+                self._snapshot = self._load(self._version)
+            return self._snapshot
+
+    def bump(self):
+        """Invalidates the cache after a settings commit and reloads it for everyone."""
+        with self._lock:
+            self._version += 1
+        try:
+            snapshot = self.get()
+        except Exception as e:
+            print(f"[Settings] Reload after update failed, will retry on next read: {e}")
+            return
+        for callback in list(self._listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[Settings] Listener failed: {e}")
+
+    def refresh(self):
+        """Reloads from the database and bumps only if something changed, e.g. a save in another process."""
+        current = self.get()
+        fresh = self._load(current.version)
+        if dict(fresh.settings) != dict(current.settings) or fresh.blacklist_names != current.blacklist_names:
+            self.bump()
+
+    def start_polling(self, interval=SETTINGS_POLL_INTERVAL):
+        """Picks up saves made by other processes (headless mode) every `interval` seconds."""
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"[Settings] Poll failed: {e}")
+
+        threading.Thread(target=poll, name="Settings_Poll_Thread", daemon=True).start()
+
+    def add_listener(self, callback):
+        """Calls `callback(snapshot)` after every settings change."""
+        self._listeners.append(callback)
+
+    @property
+    def version(self):
+        return self._version
+
+
+settings_cache = SettingsCache()
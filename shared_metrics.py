@@ -0,0 +1,167 @@
+import json
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+from config import SHARED_SEGMENT_SIZE
+
+# Header: seq, sample timestamp, cpu %, memory %, process list version, process JSON length,
+# events JSON length, events version
+_HEADER = struct.Struct('<QdddQIIQ')
+_HEADER_SIZE = 64
+# Latest idle/history events, as JSON {topic: [sequence, data]}
+_EVENTS_OFFSET = _HEADER_SIZE
+_EVENTS_CAPACITY = 64 * 1024
+# Process list, JSON-encoded exactly as /api/list-processes returns it
+_PROCESS_OFFSET = _EVENTS_OFFSET + _EVENTS_CAPACITY
+
+# Readers give up on a consistent copy after this many torn reads and use the last good one
+_READ_RETRIES = 100
+
+
+class SharedMetricsSegment:
+    """Latest system sample, process list and events in one shared memory block.
+
+    One collector process writes; any number of API workers read. Writes are
+    guarded by a seqlock: the writer makes the sequence number odd, updates the
+    data, then makes it even again. A reader copies what it needs and retries if
+    the sequence was odd or changed meanwhile, so readers never block the writer.
+    """
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.buf = shm.buf
+        self.process_capacity = shm.size - _PROCESS_OFFSET
+        # Re-entrant so publish_event can hold it across building the events body and _write()
+        self._write_lock = threading.RLock()
+        # Reader-side cache of the last consistent copy
+        self._process_version = None
+        self._process_json = b'[]'
+        self._events = {}
+        self._events_version = None
+        # Writer-side copy of the events block
+        self._published_events = {}
+
+    @classmethod
+    def create(cls, size=SHARED_SEGMENT_SIZE):
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        shm.buf[:_HEADER_SIZE] = bytes(_HEADER_SIZE)
+        return cls(shm)
+
+    def __getstate__(self):
+        # Spawned workers re-attach by name; forked ones inherit the mapping as is
+        return self.shm.name
+
+    def __setstate__(self, name):
+        self.__init__(shared_memory.SharedMemory(name=name))
+
+    # Writer side (collector process)
+
+    def _write(self, fill):
+        with self._write_lock:
+            seq = _HEADER.unpack_from(self.buf, 0)[0]
+            struct.pack_into('<Q', self.buf, 0, seq + 1)
+            try:
+                fill(_HEADER.unpack_from(self.buf, 0))
+            finally:
+                struct.pack_into('<Q', self.buf, 0, seq + 2)
+
+    def publish_sample(self, sample):
+        def fill(header):
+            _HEADER.pack_into(self.buf, 0, header[0], sample['timestamp'], sample['cpu_percent'],
+                              sample['memory_percent'], *header[4:])
+        self._write(fill)
+
+    def publish_processes(self, version, body):
+        if isinstance(body, str):
+            body = body.encode()
+        if len(body) > self.process_capacity:
+            print(f"[Shared Metrics] Process list of {len(body)} bytes exceeds the segment, skipped")
+            return
+
+        def fill(header):
+            self.buf[_PROCESS_OFFSET:_PROCESS_OFFSET + len(body)] = body
+            _HEADER.pack_into(self.buf, 0, *header[:4], version, len(body), *header[6:])
+        self._write(fill)
+
+    def publish_event(self, topic, data):
+        # Called from several collector threads; one lock around the update, the encoding and the
+        # write keeps a slower publisher from overwriting a newer events block with an older one
+        with self._write_lock:
+            self._published_events[topic] = [self._published_events.get(topic, [0])[0] + 1, data]
+            body = json.dumps(self._published_events, default=str).encode()
+            if len(body) > _EVENTS_CAPACITY:
+                print(f"[Shared Metrics] Events of {len(body)} bytes exceed the segment, skipped")
+                return
+
+            def fill(header):
+                self.buf[_EVENTS_OFFSET:_EVENTS_OFFSET + len(body)] = body
+                _HEADER.pack_into(self.buf, 0, *header[:6], len(body), header[7] + 1)
+            self._write(fill)
+
+    # Reader side (API workers)
+
+    def _read(self, copy):
+        for _ in range(_READ_RETRIES):
+            header = _HEADER.unpack_from(self.buf, 0)
+            if header[0] & 1:
+                time.sleep(0)  # Writer is mid-update
+                continue
+            result = copy(header)
+            if _HEADER.unpack_from(self.buf, 0)[0] == header[0]:
+                return result
+        return None
+
+    def latest_sample(self):
+        """{'timestamp', 'cpu_percent', 'memory_percent'}, or None before the first sample."""
+        header = self._read(lambda header: header)
+        if header is None or not header[1]:
+            return None
+        return {'timestamp': header[1], 'cpu_percent': header[2], 'memory_percent': header[3]}
+
+    def processes(self):
+        """(version, JSON bytes) of the latest process list; only copied when the version changed."""
+        def copy(header):
+            version, length = header[4], header[5]
+            if version == self._process_version:
+                return version, None
+            return version, bytes(self.buf[_PROCESS_OFFSET:_PROCESS_OFFSET + length]) or b'[]'
+
+        result = self._read(copy)
+        if result is not None and result[1] is not None:
+            self._process_version, self._process_json = result
+        return self._process_version, self._process_json
+
+    def events(self):
+        """{topic: [sequence, data]} of the latest events the collector published."""
+        def copy(header):
+            length, version = header[6], header[7]
+            if version == self._events_version:
+                return version, None
+            return version, bytes(self.buf[_EVENTS_OFFSET:_EVENTS_OFFSET + length])
+
+        result = self._read(copy)
+        if result is not None and result[1] is not None:
+            self._events_version = result[0]
+            self._events = json.loads(result[1]) if result[1] else {}
+        return self._events
+
+    def close(self, unlink=False):
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+# Segment this API worker reads from; None when the collectors run in-process
+_attached = None
+
+
+def attach(segment):
+    global _attached
+    _attached = segment
+
+
+def attached_segment():
+    return _attached
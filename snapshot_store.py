@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from collections import deque
+
+# Number of versions whose changes are kept for ?since= requests
+HISTORY_SIZE = 120
+# CPU/memory are compared at the precision the dashboard shows, so noise isn't a change
+ROUND_DIGITS = 1
+
+
+class ProcessSnapshotStore:
+    """Versioned copy of the process list that can answer "what changed since version N".
+
+    Every scan that differs from the previous one gets a new version and its changes
+    are kept for the last HISTORY_SIZE versions. Versions start from the current time
+    in milliseconds, so cursors left over from a previous run fall back to a full list.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self._lock = threading.Lock()
+        # pid -> process row
+        self._processes = {}
+        self.version = int(time.time() * 1000)
+        # (base version, version, {pid: row} added or changed, [pids] removed), oldest first
+        self._history = deque(maxlen=history_size)
+        self._full_json = None
+
+    @staticmethod
+    def _normalise(proc):
+        row = dict(proc)
+        for key in ('cpu_percent', 'memory_percent'):
+            if isinstance(row.get(key), float):
+                row[key] = round(row[key], ROUND_DIGITS)
+        return row
+
+    def update(self, processes, version=None, encoded=None):
+        """Records a new scan. Returns the current version (unchanged if nothing changed).
+
+        API workers in headless mode pass the collector's `version` (and its already
+        encoded JSON), so every worker hands out the same cursors.
+        """
+        if version is not None and version == self.version:
+            return self.version
+        current = {}
+        for proc in processes:
+            row = self._normalise(proc)
+            current[row['pid']] = row
+
+        with self._lock:
+            changed = {pid: row for pid, row in current.items() if self._processes.get(pid) != row}
+            removed = [pid for pid in self._processes if pid not in current]
+            if changed or removed or version is not None:
+                base = self.version
+                self.version = self.version + 1 if version is None else version
+                # A worker's first copy isn't a change from anything the client can hold
+                if version is None or self._history or self._processes:
+                    self._history.append((base, self.version, changed, removed))
+                self._processes = current
+                self._full_json = encoded
+            return self.version
+
+    def full_json(self):
+        """(version, JSON-encoded process list); encoded once per version."""
+        with self._lock:
+            if self._full_json is None:
+                self._full_json = json.dumps(list(self._processes.values()), default=str)
+            return self.version, self._full_json
+
+    def delta(self, since):
+        """Changes after version `since`, or the full list if that version is no longer known.
+
+        Only versions recorded here are answered with a delta. A worker that adopts the
+        collector's version records one entry spanning every collector version it
+        skipped; a cursor from inside that span can't be replayed (a process started
+        and gone within it would never be reported removed), so it gets the full list.
+        """
+        with self._lock:
+            known = since == self.version or any(since in (base, version) for base, version, _, _ in self._history)
+            if not known:
+                return {'version': self.version, 'full': True, 'processes': list(self._processes.values())}
+
+            changed, removed = {}, set()
+            for _, version, version_changed, version_removed in self._history:
+                if version <= since:
+                    continue
+                for pid, row in version_changed.items():
+                    changed[pid] = row
+                    removed.discard(pid)
+                for pid in version_removed:
+                    changed.pop(pid, None)
+                    removed.add(pid)
+            return {'version': self.version, 'base': since, 'full': False,
+                    'changed': list(changed.values()), 'removed': sorted(removed)}
+
+
+process_store = ProcessSnapshotStore()
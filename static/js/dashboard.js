@@ -50,13 +50,8 @@ async function fetchIdleTime() {
     }
 }
 
-// Auto-refresh system stats every 10 seconds
-setInterval(fetchSystemStats, 10000);
-
-// Call on page load
+// Call on page load; later updates arrive over the live stream
 fetchSystemStats();
-
-setInterval(fetchIdleTime, 10000);
 fetchIdleTime();
 
     window.restartProcess = function(processName) {
@@ -156,13 +151,7 @@ async function fetchActiveProcesses() {
         }
 
         loading.classList.add('hidden');
-
-        if (data.length === 0) {
-            container.innerHTML = '<div class="text-center py-6 text-gray-500"><p>No active processes found</p></div>';
-            return;
-        }
-
-        updateProcessList(data); // Make sure data is being passed correctly
+        applyProcessDelta({ version: Number(response.headers.get('X-Snapshot-Version')), full: true, processes: data });
     } catch (error) {
         console.error('❌ Error fetching processes:', error);
         loading.classList.add('hidden');
@@ -171,6 +160,49 @@ async function fetchActiveProcesses() {
     }
 }
 
+    // Process list kept client-side by pid; the server only sends what changed since processVersion
+    let processVersion = null;
+    let processMap = new Map();
+
+    function applyProcessDelta(data) {
+        if (data.full) {
+            processMap = new Map(data.processes.map(proc => [proc.pid, proc]));
+        } else {
+            data.removed.forEach(pid => processMap.delete(pid));
+            data.changed.forEach(proc => processMap.set(proc.pid, proc));
+        }
+        processVersion = data.version;
+        renderProcesses(Array.from(processMap.values()));
+    }
+
+    async function fetchProcessChanges() {
+        if (processVersion === null || Number.isNaN(processVersion)) {
+            return fetchActiveProcesses();
+        }
+        try {
+            const response = await fetch(`/api/list-processes?since=${processVersion}`);
+            if (response.status === 304) {
+                return;
+            }
+            if (!response.ok) {
+                throw new Error('Failed to fetch process changes');
+            }
+            document.getElementById('error-message').classList.add('hidden');
+            applyProcessDelta(await response.json());
+        } catch (error) {
+            console.error('❌ Error fetching process changes:', error);
+        }
+    }
+
+    function renderProcesses(processes) {
+        if (processes.length === 0) {
+            document.getElementById('active-applications').innerHTML =
+                '<div class="text-center py-6 text-gray-500"><p>No active processes found</p></div>';
+            return;
+        }
+        updateProcessList(processes);
+    }
+
     function updateProcessList(processes) {
         const container = document.getElementById('active-applications');
         container.innerHTML = '';
@@ -226,8 +258,31 @@ async function fetchActiveProcesses() {
     });
    
 
-    // Auto-refresh interval
-    setInterval(fetchActiveProcesses, 10000);
+    // Live updates; falls back to polling every 10 seconds
+    subscribeLive(['system', 'idle', 'processes'], {
+        system: data => {
+            updateProgress('cpu-progress-circle', 'cpu-percentage-text', data.cpu_usage);
+            updateProgress('memory-progress-circle', 'memory-percentage-text', data.memory_usage);
+        },
+        idle: data => {
+            document.getElementById('idle-time-text').innerText = `${data.latest_idle_min}m`;
+        },
+        processes: data => {
+            if (processVersion === null) {
+                return;  // The initial full list is still loading
+            }
+            if (data.full || data.base === processVersion) {
+                document.getElementById('error-message').classList.add('hidden');
+                applyProcessDelta(data);
+            } else {
+                fetchProcessChanges();  // Missed an update; catch up from our version
+            }
+        }
+    }, () => {
+        setInterval(fetchSystemStats, 10000);
+        setInterval(fetchIdleTime, 10000);
+        setInterval(fetchProcessChanges, 10000);
+    });
 });
 
    
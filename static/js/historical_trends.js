@@ -202,7 +202,9 @@ document.addEventListener('DOMContentLoaded', function() {
         setLoading('memory-loading', true);
         
         try {
-            const response = await fetch(`/api/historical-system-stats?range=${timeRange}`);
+            // No point sending more samples than the chart has pixels
+            const chartWidth = document.getElementById('cpu-chart').clientWidth || 800;
+            const response = await fetch(`/api/historical-system-stats?range=${timeRange}&max_points=${chartWidth}`);
             
             if (!response.ok) {
                 throw new Error(`Failed to fetch historical stats: ${response.status} ${response.statusText}`);
@@ -279,7 +281,9 @@ async function fetchResourceIntensiveProcesses() {
         // First try to fetch from resource-intensive endpoint
         let processes = [];
         try {
-            const response = await fetch('/api/resource-intensive-processes');
+            // Same period as the charts; the last 24 hours come straight from memory
+            const topWindow = { day: '24h', week: '7d', month: '30d' }[currentTimeRange] || '24h';
+            const response = await fetch(`/api/resource-intensive-processes?window=${topWindow}`);
             
             if (!response.ok) {
                 throw new Error(`Failed to fetch resource-intensive processes: ${response.status} ${response.statusText}`);
@@ -373,6 +377,7 @@ async function fetchResourceIntensiveProcesses() {
                 const newRange = this.getAttribute('data-range');
                 currentTimeRange = newRange;
                 fetchHistoricalStats(newRange);
+                fetchResourceIntensiveProcesses();
             });
         });
     }
@@ -386,11 +391,12 @@ async function fetchResourceIntensiveProcesses() {
         fetchHistoricalStats(currentTimeRange);
         fetchResourceIntensiveProcesses();
         
-        // Refresh data every 30 seconds
-        setInterval(() => {
+        // Refresh whenever a new minute is rolled up; falls back to every 30 seconds
+        const refresh = () => {
             fetchHistoricalStats(currentTimeRange);
             fetchResourceIntensiveProcesses();
-        }, 30000);
+        };
+        subscribeLive(['history'], { history: refresh }, () => setInterval(refresh, 30000));
     }
     
     // Start the application
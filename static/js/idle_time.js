@@ -191,6 +191,6 @@ document.addEventListener('DOMContentLoaded', function() {
     initChart();
     fetchIdleTimeData();
     
-    // Refresh every 30 seconds
-    setInterval(fetchIdleTimeData, 30000);
+    // Refresh when a new idle period is logged; falls back to every 30 seconds
+    subscribeLive(['idle'], { idle: fetchIdleTimeData }, () => setInterval(fetchIdleTimeData, 30000));
 });
\ No newline at end of file
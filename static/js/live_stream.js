@@ -0,0 +1,43 @@
+// Shared live updates over Server-Sent Events (/api/stream).
+// handlers maps a topic to a function receiving the event data; startPolling is
+// called once if the browser or server can't stream, so the page keeps its old timers.
+function subscribeLive(topics, handlers, startPolling) {
+    let pollingStarted = false;
+    function fallBackToPolling() {
+        if (!pollingStarted) {
+            pollingStarted = true;
+            startPolling();
+        }
+    }
+
+    if (typeof EventSource === 'undefined') {
+        fallBackToPolling();
+        return null;
+    }
+
+    const source = new EventSource(`/api/stream?topics=${topics.join(',')}`);
+    let connected = false;
+
+    source.onopen = () => {
+        connected = true;
+    };
+    source.onerror = () => {
+        // Never connected at all: streaming isn't available, poll instead.
+        // After a successful connection EventSource reconnects on its own.
+        if (!connected) {
+            source.close();
+            fallBackToPolling();
+        }
+    };
+
+    topics.forEach(topic => {
+        source.addEventListener(topic, event => {
+            try {
+                handlers[topic](JSON.parse(event.data));
+            } catch (error) {
+                console.error(`❌ Error handling ${topic} update:`, error);
+            }
+        });
+    });
+    return source;
+}
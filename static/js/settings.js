@@ -87,6 +87,29 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Wait until the backend has actually written the settings
+    function waitForSettingsApplied(data, label) {
+        if (!data.update_id) {
+            showNotification(data.error || 'Error saving settings', 'error');
+            return;
+        }
+        fetch(`/api/settings/status/${data.update_id}?wait=5`)
+            .then(response => response.json())
+            .then(status => {
+                if (status.status === 'applied') {
+                    showNotification(`${label} saved successfully!`);
+                } else if (status.status === 'failed') {
+                    showNotification(`Error saving ${label.toLowerCase()}: ${status.error}`, 'error');
+                } else {
+                    showNotification(`${label} queued, still being applied...`);
+                }
+            })
+            .catch(error => {
+                console.error("Error checking settings status:", error);
+                showNotification(`${label} queued`);
+            });
+    }
+
     // Save general settings
     const saveGeneralBtn = document.getElementById('save-general-settings');
     if (saveGeneralBtn) {
@@ -117,7 +140,7 @@ document.addEventListener('DOMContentLoaded', function() {
             .then(response => response.json())
             .then(data => {
                 console.log("Settings saved:", data);
-                showNotification('General settings saved successfully!');
+                waitForSettingsApplied(data, 'General settings');
             })
             .catch(error => {
                 console.error("Error saving settings:", error);
@@ -154,7 +177,7 @@ document.addEventListener('DOMContentLoaded', function() {
             .then(response => response.json())
             .then(data => {
                 console.log("Process settings saved:", data);
-                showNotification('Process settings saved successfully!');
+                waitForSettingsApplied(data, 'Process settings');
             })
             .catch(error => {
                 console.error("Error saving process settings:", error);
@@ -185,7 +208,7 @@ document.addEventListener('DOMContentLoaded', function() {
             .then(response => response.json())
             .then(data => {
                 console.log("Data settings saved:", data);
-                showNotification('Data settings saved successfully!');
+                waitForSettingsApplied(data, 'Data settings');
             })
             .catch(error => {
                 console.error("Error saving data settings:", error);
@@ -0,0 +1,298 @@
+import datetime
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+
+from config import STORAGE_BACKEND, SQLITE_PATH, SQLITE_BUSY_TIMEOUT
+
+
+class StorageBackend(ABC):
+    """What the collectors and the API need from a database.
+
+    Queries are written with MySQL-style %s placeholders; a backend translates
+    them if its driver wants something else. Anything that differs between SQL
+    dialects goes through a method here.
+    """
+
+    name = None
+
+    @abstractmethod
+    def cursor(self, dictionary=False):
+        """Context manager yielding a cursor; commits on success, rolls back on error."""
+
+    @abstractmethod
+    def stream_rows(self, query, params=(), batch_size=1000):
+        """Yields the result of a SELECT in lists of at most `batch_size` rows.
+
+        Rows are read from the database as the caller consumes them, so memory stays
+        at one batch however large the result is.
+        """
+
+    @abstractmethod
+    def insert_rows(self, cursor, table, columns, rows, upsert_key=None, batch_size=500):
+        """Inserts `rows` (tuples in `columns` order); rows with an existing `upsert_key` are replaced."""
+
+    @abstractmethod
+    def insert_ignore_sql(self, table, columns):
+        """Single-row INSERT that silently skips rows hitting a unique key."""
+
+    @abstractmethod
+    def epoch_sql(self, column):
+        """SQL expression giving a DATETIME column as Unix seconds (local time, like datetime.fromtimestamp)."""
+
+    @abstractmethod
+    def hour_sql(self, column):
+        """SQL expression truncating a DATETIME column to the start of its hour (compares equal to a DATETIME)."""
+
+    @abstractmethod
+    def delete_oldest_sql(self, table, column):
+        """DELETE of at most %s rows with `column` < %s, in `column` order. Parameters: (cutoff, limit)."""
+
+    def stats(self):
+        return {}
+
+
+class MySQLBackend(StorageBackend):
+    """MySQL through the shared connection pool in db_pool.py."""
+
+    name = 'mysql'
+
+    def __init__(self):
+        # Imported here so an SQLite install doesn't need mysql-connector
+        from db_pool import db_pool, get_db_cursor
+        self.pool = db_pool
+        self._get_db_cursor = get_db_cursor
+
+    def cursor(self, dictionary=False):
+        return self._get_db_cursor(dictionary=dictionary)
+
+    def stream_rows(self, query, params=(), batch_size=1000):
+        # Unbuffered cursor: the server sends rows as they are fetched instead of the client storing them all
+        conn = self.pool.get_connection()
+        finished = False
+        try:
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            cursor.close()
+            finished = True
+        finally:
+            # A result abandoned halfway (e.g. the client went away) leaves unread rows on the
+            # connection, so the pool closes it instead of handing it out again
+            self.pool.return_connection(conn, broken=not finished)
+
+    def insert_rows(self, cursor, table, columns, rows, upsert_key=None, batch_size=500):
+        # Multi-row INSERTs: one round trip per batch
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        for i in range(0, len(rows), batch_size):
+            chunk = rows[i:i + batch_size]
+            query = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+                     + ", ".join([placeholders] * len(chunk)))
+            if upsert_key:
+                updates = [f"{col} = VALUES({col})" for col in columns if col != upsert_key]
+                query += " ON DUPLICATE KEY UPDATE " + ", ".join(updates)
+            cursor.execute(query, [value for row in chunk for value in row])
+
+    def insert_ignore_sql(self, table, columns):
+        return f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+    def epoch_sql(self, column):
+        return f"UNIX_TIMESTAMP({column})"
+
+    def hour_sql(self, column):
+        return f"DATE_ADD(DATE({column}), INTERVAL HOUR({column}) HOUR)"
+
+    def delete_oldest_sql(self, table, column):
+        return f"DELETE FROM {table} WHERE {column} < %s ORDER BY {column} LIMIT %s"
+
+    def stats(self):
+        return self.pool.stats()
+
+
+# DATETIME values are stored as 'YYYY-MM-DD HH:MM:SS' text, which sorts and compares like MySQL's
+sqlite3.register_adapter(datetime.datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_converter('DATETIME', lambda value: datetime.datetime.strptime(value.decode()[:19], '%Y-%m-%d %H:%M:%S'))
+
+# A quoted string literal (left alone) or a %s placeholder
+_PLACEHOLDER = re.compile(r"'(?:[^']|'')*'|%s")
+
+
+@lru_cache(maxsize=512)
+def _to_qmark(query):
+    return _PLACEHOLDER.sub(lambda match: '?' if match.group(0) == '%s' else match.group(0), query)
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """sqlite3 cursor that accepts %s placeholders and can return rows as dicts."""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        if dictionary:
+            cursor.row_factory = _dict_row
+
+    def execute(self, query, params=()):
+        self._cursor.execute(_to_qmark(query), params or ())
+        return self
+
+    def executemany(self, query, seq_of_params):
+        self._cursor.executemany(_to_qmark(query), seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteBackend(StorageBackend):
+    """Embedded SQLite database in WAL mode for single-host installs; no database server needed.
+
+    Each thread gets its own connection. WAL lets readers run alongside the single
+    writer, and synchronous=NORMAL makes a commit an append to the log without an
+    fsync, so small writes take well under a millisecond.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path=SQLITE_PATH, busy_timeout=SQLITE_BUSY_TIMEOUT):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {
+            'connections': 0,
+            'commits': 0,
+            'rollbacks': 0,
+            'total_commit_ms': 0.0,
+            'max_commit_ms': 0.0,
+        }
+
+    def _connect(self):
+        # cached_statements keeps the prepared statements of the hot INSERTs and SELECTs around
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, detect_types=sqlite3.PARSE_DECLTYPES,
+                               cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._stats['connections'] += 1
+        return conn
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @contextmanager
+    def cursor(self, dictionary=False):
+        conn = self._connection()
+        cursor = SQLiteCursor(conn.cursor(), dictionary)
+        try:
+            yield cursor
+            start = time.perf_counter()
+            conn.commit()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._stats['commits'] += 1
+                self._stats['total_commit_ms'] += elapsed_ms
+                self._stats['max_commit_ms'] = max(self._stats['max_commit_ms'], elapsed_ms)
+        except Exception:
+            conn.rollback()
+            with self._lock:
+                self._stats['rollbacks'] += 1
+            raise
+        finally:
+            cursor.close()
+
+    def stream_rows(self, query, params=(), batch_size=1000):
+        # SQLite steps through the result as rows are fetched; nothing is read ahead
+        cursor = self._connection().execute(_to_qmark(query), params or ())
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def insert_rows(self, cursor, table, columns, rows, upsert_key=None, batch_size=500):
+        # One prepared single-row statement run for every row, all inside the caller's transaction
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+        if upsert_key:
+            updates = [f"{col} = excluded.{col}" for col in columns if col != upsert_key]
+            query += f" ON CONFLICT({upsert_key}) DO UPDATE SET " + ", ".join(updates)
+        cursor.executemany(query, rows)
+
+    def insert_ignore_sql(self, table, columns):
+        return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+    def epoch_sql(self, column):
+        # The 'utc' modifier treats the stored value as local time, like MySQL's UNIX_TIMESTAMP()
+        return f"((julianday({column}, 'utc') - 2440587.5) * 86400.0)"
+
+    def hour_sql(self, column):
+        # Same text form as stored DATETIME values, so it matches e.g. system_rollup_hour.bucket_start
+        return f"strftime('%Y-%m-%d %H:00:00', {column})"
+
+    def delete_oldest_sql(self, table, column):
+        # DELETE ... LIMIT needs a compile-time option, so select the rowids first
+        return (f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT rowid FROM {table} WHERE {column} < %s ORDER BY {column} LIMIT %s)")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['path'] = self.path
+        stats['avg_commit_ms'] = stats['total_commit_ms'] / stats['commits'] if stats['commits'] else 0.0
+        return stats
+
+
+def create_backend(name=STORAGE_BACKEND):
+    if name == 'sqlite':
+        return SQLiteBackend()
+    if name == 'mysql':
+        return MySQLBackend()
+    raise ValueError(f"Unknown storage backend {name!r}; use 'mysql' or 'sqlite'")
+
+
+storage = create_backend()
+
+
+def get_db_cursor(dictionary=False):
+    """Cursor on the configured backend; commits on success, rolls back on error."""
+    return storage.cursor(dictionary=dictionary)
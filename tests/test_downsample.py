@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downsample import downsample_rows, lttb_indices
+
+POINTS = 100000
+MAX_POINTS = 1000
+
+
+def _series_with_spikes():
+    rng = np.random.default_rng(7)
+    x = np.arange(POINTS, dtype=np.float64)
+    cpu = 20 + rng.normal(0, 2, POINTS)
+    memory = 50 + rng.normal(0, 0.5, POINTS)
+    # One-sample spikes, each far enough from the others to land in a bucket of its own
+    cpu_spikes = np.arange(1234, POINTS - 1000, 9973)
+    memory_spikes = cpu_spikes + 4567
+    cpu[cpu_spikes] = 100.0
+    memory[memory_spikes] = 95.0
+    return x, cpu, memory, cpu_spikes, memory_spikes
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x, cpu, memory, cpu_spikes, memory_spikes = _series_with_spikes()
+    kept = lttb_indices(x, (cpu, memory), MAX_POINTS)
+
+    assert len(kept) == MAX_POINTS
+    assert kept[0] == 0 and kept[-1] == POINTS - 1
+    assert np.all(np.diff(kept) > 0)
+    # A spike in either series keeps its point
+    assert set(cpu_spikes) <= set(kept.tolist())
+    assert set(memory_spikes) <= set(kept.tolist())
+
+
+def test_lttb_returns_everything_when_under_the_limit():
+    x = np.arange(10, dtype=np.float64)
+    assert lttb_indices(x, (x,), 10).tolist() == list(range(10))
+    assert lttb_indices(x, (x,), 50).tolist() == list(range(10))
+
+
+def test_downsample_rows_leaves_short_series_unchanged():
+    rows = [{'timestamp': i, 'cpu_percent': i % 7, 'memory_percent': 40.0} for i in range(20)]
+    assert downsample_rows(rows, 100) is rows
+    assert downsample_rows(rows, None) is rows
+
+
+def test_downsample_rows_keeps_whole_rows():
+    x, cpu, memory, cpu_spikes, _ = _series_with_spikes()
+    rows = [{'timestamp': i, 'cpu_percent': c, 'memory_percent': m} for i, c, m in zip(range(POINTS), cpu, memory)]
+    kept = downsample_rows(rows, MAX_POINTS)
+
+    assert len(kept) == MAX_POINTS
+    assert kept[0] is rows[0] and kept[-1] is rows[-1]
+    assert {row['timestamp'] for row in kept} >= set(cpu_spikes.tolist())
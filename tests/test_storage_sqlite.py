@@ -0,0 +1,82 @@
+import datetime
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['PROCESS_MONITOR_STORAGE'] = 'sqlite'
+
+import migrations
+import storage
+from storage import SQLiteBackend, _to_qmark
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    """SQLite backend on a fresh database under tmp_path, installed as the shared `storage`."""
+    db = SQLiteBackend(str(tmp_path / 'monitor.db'))
+    monkeypatch.setattr(storage, 'storage', db)
+    monkeypatch.setattr(migrations, 'storage', db)
+    return db
+
+
+def test_to_qmark_leaves_quoted_literals_alone():
+    assert _to_qmark("SELECT * FROM t WHERE a = %s AND b < %s") == "SELECT * FROM t WHERE a = ? AND b < ?"
+    assert (_to_qmark("SELECT strftime('%Y-%m-%d %H:00:00', ts), 'it''s %s' FROM t WHERE a = %s")
+            == "SELECT strftime('%Y-%m-%d %H:00:00', ts), 'it''s %s' FROM t WHERE a = ?")
+
+
+def test_run_migrations_applies_sqlite_schema(backend):
+    applied = migrations.run_migrations()
+    assert applied == [version for version, _, _ in migrations.SQLITE_MIGRATIONS]
+    with backend.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
+        names = {row[0] for row in cursor.fetchall()}
+        cursor.execute("SELECT COUNT(*) FROM monitor_settings")
+        settings_rows = cursor.fetchone()[0]
+    assert {'schema_migrations', 'system_logs', 'process_logs', 'idle_time_logs', 'monitor_settings',
+            'system_rollup_hour', 'processes', 'process_log_view'} <= names
+    assert settings_rows == 1
+    # Already applied versions are skipped on the next start
+    assert migrations.run_migrations() == []
+
+
+def test_insert_rows_upserts_on_key(backend):
+    columns = ('bucket_start', 'samples', 'cpu_avg')
+    hour = datetime.datetime(2024, 1, 1, 10)
+    with backend.cursor() as cursor:
+        cursor.execute("CREATE TABLE rollup (bucket_start DATETIME PRIMARY KEY, samples INTEGER, cpu_avg REAL)")
+        backend.insert_rows(cursor, 'rollup', columns, [(hour, 10, 5.0), (hour + datetime.timedelta(hours=1), 3, 1.0)],
+                            upsert_key='bucket_start')
+        backend.insert_rows(cursor, 'rollup', columns, [(hour, 20, 7.5)], upsert_key='bucket_start')
+    with backend.cursor() as cursor:
+        cursor.execute("SELECT bucket_start, samples, cpu_avg FROM rollup ORDER BY bucket_start")
+        rows = cursor.fetchall()
+    assert rows == [(hour, 20, 7.5), (hour + datetime.timedelta(hours=1), 3, 1.0)]
+
+
+def test_stream_rows_yields_batches(backend):
+    with backend.cursor() as cursor:
+        cursor.execute("CREATE TABLE numbers (n INTEGER)")
+        cursor.executemany("INSERT INTO numbers (n) VALUES (%s)", [(n,) for n in range(25)])
+    batches = list(backend.stream_rows("SELECT n FROM numbers WHERE n >= %s ORDER BY n", (0,), batch_size=10))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [row[0] for batch in batches for row in batch] == list(range(25))
+    assert list(backend.stream_rows("SELECT n FROM numbers WHERE n > %s", (100,))) == []
+
+
+def test_delete_oldest_sql_removes_only_oldest_before_cutoff(backend):
+    base = datetime.datetime(2024, 1, 1)
+    with backend.cursor() as cursor:
+        cursor.execute("CREATE TABLE logs (timestamp DATETIME NOT NULL)")
+        cursor.executemany("INSERT INTO logs (timestamp) VALUES (%s)",
+                           [(base + datetime.timedelta(minutes=n),) for n in range(10)])
+        cursor.execute(backend.delete_oldest_sql('logs', 'timestamp'), (base + datetime.timedelta(minutes=5), 3))
+        first_batch = cursor.rowcount
+        cursor.execute(backend.delete_oldest_sql('logs', 'timestamp'), (base + datetime.timedelta(minutes=5), 3))
+        second_batch = cursor.rowcount
+        cursor.execute("SELECT timestamp FROM logs ORDER BY timestamp")
+        remaining = [row[0] for row in cursor.fetchall()]
+    assert (first_batch, second_batch) == (3, 2)
+    assert remaining == [base + datetime.timedelta(minutes=n) for n in range(5, 10)]
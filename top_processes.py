@@ -0,0 +1,187 @@
+import datetime
+import heapq
+import threading
+import time
+from collections import deque
+
+from storage import get_db_cursor
+
+# Window name -> (length in seconds, sub-bucket length in seconds) for the windows kept in memory
+WINDOWS = {
+    '5m': (300, 30),
+    '1h': (3600, 300),
+    '24h': (86400, 3600),
+}
+# Longer windows are answered from process_logs
+QUERY_WINDOWS = {
+    '7d': 7 * 86400,
+    '30d': 30 * 86400,
+}
+TOP_N = 10
+# Processes a closed sub-bucket keeps, by CPU and by memory; the rest can't reach the top anyway
+BUCKET_KEEP = 100
+
+SORT_KEYS = ('cpu', 'memory')
+# Shared segment event carrying snapshot() from the headless collector to the API workers
+TOP_PROCESSES_EVENT = 'top_processes'
+
+
+class _Bucket:
+    def __init__(self, start):
+        self.start = start
+        # (pid, create_time) -> [name, pid, count, cpu_sum, memory_sum, cpu_peak, memory_peak]
+        self.stats = {}
+
+    def add(self, key, proc):
+        cpu, memory = proc['cpu_percent'] or 0.0, proc['memory_percent'] or 0.0
+        entry = self.stats.get(key)
+        if entry is None:
+            self.stats[key] = [proc['name'], proc['pid'], 1, cpu, memory, cpu, memory]
+            return
+        entry[2] += 1
+        entry[3] += cpu
+        entry[4] += memory
+        entry[5] = max(entry[5], cpu)
+        entry[6] = max(entry[6], memory)
+
+    def prune(self, keep):
+        if len(self.stats) <= keep:
+            return
+        stats = self.stats.items()
+        kept = heapq.nlargest(keep, stats, key=lambda item: item[1][3])
+        kept += heapq.nlargest(keep, stats, key=lambda item: item[1][4])
+        self.stats = dict(kept)
+
+
+class _WindowTopN:
+    """Per-process totals over one sliding window, as a ring of sub-buckets."""
+
+    def __init__(self, length, step):
+        self.length = length
+        self.step = step
+        self._buckets = deque()
+
+    def add(self, timestamp, processes):
+        start = timestamp - timestamp % self.step
+        if not self._buckets or self._buckets[-1].start != start:
+            if self._buckets:
+                self._buckets[-1].prune(BUCKET_KEEP)
+            self._buckets.append(_Bucket(start))
+        while self._buckets and self._buckets[0].start <= timestamp - self.length:
+            self._buckets.popleft()
+        bucket = self._buckets[-1]
+        for proc in processes:
+            bucket.add((proc['pid'], proc.get('create_time')), proc)
+
+    def top(self, n):
+        """{sort key: [rows]} with the n busiest processes by average CPU and by average memory."""
+        totals = {}
+        for bucket in self._buckets:
+            for key, (name, pid, count, cpu_sum, memory_sum, cpu_peak, memory_peak) in bucket.stats.items():
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = [name, pid, count, cpu_sum, memory_sum, cpu_peak, memory_peak]
+                else:
+                    total[2] += count
+                    total[3] += cpu_sum
+                    total[4] += memory_sum
+                    total[5] = max(total[5], cpu_peak)
+                    total[6] = max(total[6], memory_peak)
+
+        def rows(index):
+            return [_row(name, pid, count, cpu_sum / count, memory_sum / count, cpu_peak, memory_peak)
+                    for name, pid, count, cpu_sum, memory_sum, cpu_peak, memory_peak
+                    in heapq.nlargest(n, totals.values(), key=lambda total: total[index] / total[2])]
+
+        return {'cpu': rows(3), 'memory': rows(4)}
+
+
+def _row(name, pid, samples, cpu, memory, peak_cpu, peak_memory):
+    return {
+        'process_name': name,
+        'pid': pid,
+        'cpu_usage': round(cpu, 2),
+        'memory_usage': round(memory, 2),
+        'peak_cpu_usage': round(peak_cpu, 2),
+        'peak_memory_usage': round(peak_memory, 2),
+        'samples': samples,
+    }
+
+
+class RollingTopN:
+    """Busiest processes over the last 5 minutes, hour and day, from the logged process snapshots.
+
+    Each snapshot is folded into every window; the top-N lists are rebuilt right
+    then, so reading them costs the same no matter how much history is stored.
+    Until the engine has been running for a whole window, that window is reported
+    as not covered and callers query process_logs instead.
+    """
+
+    def __init__(self, windows=WINDOWS, n=TOP_N):
+        self.n = n
+        self._windows = {name: _WindowTopN(length, step) for name, (length, step) in windows.items()}
+        self._lock = threading.Lock()
+        self._started = None
+        self._top = {}
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Calls `callback(snapshot)` after every update; see snapshot()."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def add_snapshot(self, processes, timestamp=None):
+        timestamp = timestamp or time.time()
+        with self._lock:
+            if self._started is None:
+                self._started = timestamp
+            top = {}
+            for name, window in self._windows.items():
+                window.add(timestamp, processes)
+                top[name] = dict(window.top(self.n), covered=timestamp - self._started >= window.length)
+            self._top = top
+        snapshot = self.snapshot()
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[Error in top processes listener {getattr(callback, '__name__', callback)}] {e}")
+
+    def snapshot(self):
+        """{window: {'cpu': [rows], 'memory': [rows], 'covered': bool}}"""
+        with self._lock:
+            return self._top
+
+    def top(self, window, sort='cpu'):
+        """Cached top-N rows for an in-memory window, or None if it doesn't cover the window yet."""
+        entry = self.snapshot().get(window)
+        if not entry or not entry['covered']:
+            return None
+        return entry[sort]
+
+
+def query_top_processes(since, until=None, sort='cpu', limit=TOP_N):
+    """Top processes with since <= timestamp < until (default now) from process_logs (timestamp index)."""
+    order = 'avg_cpu' if sort == 'cpu' else 'avg_memory'
+    until = until or datetime.datetime.now()
+    with get_db_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT n.name, p.pid, t.samples, t.avg_cpu, t.avg_memory, t.peak_cpu, t.peak_memory
+            FROM (
+                SELECT process_id, COUNT(*) AS samples,
+                       AVG(cpu_usage) AS avg_cpu, AVG(memory_usage) AS avg_memory,
+                       MAX(cpu_usage) AS peak_cpu, MAX(memory_usage) AS peak_memory
+                FROM process_logs
+                WHERE timestamp >= %s AND timestamp < %s
+                GROUP BY process_id
+                ORDER BY {order} DESC
+                LIMIT %s
+            ) t
+            JOIN processes p ON p.id = t.process_id
+            JOIN process_names n ON n.id = p.name_id
+            ORDER BY t.{order} DESC""", (since, until, limit))
+        return [_row(name, pid, samples, cpu or 0.0, memory or 0.0, peak_cpu or 0.0, peak_memory or 0.0)
+                for name, pid, samples, cpu, memory, peak_cpu, peak_memory in cursor.fetchall()]
+
+
+top_processes = RollingTopN()